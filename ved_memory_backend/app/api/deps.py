@@ -1,12 +1,25 @@
-from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from jose import jwt
+from typing import Any, Callable
 
-from app.db.session import SessionLocal
+from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.profiling import profiled_call, timed
+from app.core.security import decode_token
 from app.models.user import User
 
 
+# Authenticated principals keyed by token subject (email).
+# Invalidate on any change to the user row.
+user_cache = TTLCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
 # --------------------
 # Database Dependency
 # --------------------
@@ -18,13 +31,15 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # --------------------
 # Current User Dependency
 # --------------------
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db),
-):
+def _token_claims(request: Request) -> dict:
     auth_header = request.headers.get("Authorization")
 
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -35,25 +50,96 @@ def get_current_user(
 
     token = auth_header.replace("Bearer ", "")
 
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        email: str = payload.get("sub")
-    except Exception:
+    # Refresh tokens are rejected here: they only work on /auth/refresh
+    payload = decode_token(token)
+
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
 
-    user = db.query(User).filter(User.email == email).first()
+    return payload
+
+
+def _user_query(claims: dict):
+    # Tokens carrying the user id resolve by primary key
+    statement = select(User).where(User.email == claims["sub"])
+    if claims.get("uid") is not None:
+        statement = statement.where(User.id == claims["uid"])
+    return statement
 
+
+def _cache_user(email: str, user):
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
-    return user
+    # Detached copy: safe to share across requests and sessions
+    principal = User(
+        id=user.id,
+        email=user.email,
+        hashed_password=user.hashed_password,
+        is_active=user.is_active,
+        resume_mode=user.resume_mode,
+    )
+    make_transient_to_detached(principal)
+
+    user_cache.set(email, principal)
+
+    return principal
+
+
+def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    with timed("auth"):
+        claims = _token_claims(request)
+
+        cached = user_cache.get(claims["sub"])
+        if cached is not None:
+            return cached
+
+        user = db.execute(_user_query(claims)).scalars().first()
+
+        return _cache_user(claims["sub"], user)
+
+
+async def get_current_user_async(
+    request: Request,
+    db=Depends(get_async_db),
+):
+    with timed("auth"):
+        claims = _token_claims(request)
+
+        cached = user_cache.get(claims["sub"])
+        if cached is not None:
+            return cached
+
+        result = await db.execute(_user_query(claims))
+
+        return _cache_user(claims["sub"], result.scalars().first())
+
+
+# --------------------
+# Mode-Switched Dependencies (DB_ASYNC)
+# --------------------
+# Routes written as `async def` use these so the same handler runs on
+# either the sync engine (threadpool) or the async engine (run_sync).
+get_session = get_async_db if settings.DB_ASYNC else get_db
+get_session_user = get_current_user_async if settings.DB_ASYNC else get_current_user
+
+
+async def run_in_session(db, fn: Callable[..., Any], **kwargs) -> Any:
+    """
+    Call a sync service function `fn(db=..., **kwargs)` without blocking
+    the event loop: through AsyncSession.run_sync on the async engine,
+    otherwise in the threadpool. Sampled requests profile `fn` there.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(profiled_call, fn, db=db, **kwargs)
+
+    return await db.run_sync(lambda sync_db: profiled_call(fn, db=sync_db, **kwargs))
@@ -0,0 +1,37 @@
+"""
+Weak ETags for read endpoints.
+
+    etag = weak_etag("projects", current_user.id, marker)
+    if matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+`marker` comes from app.services.revisions, so the check costs one
+small query and runs before the endpoint's real work.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """If-None-Match contains `etag` (weak comparison) or is `*`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates:
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
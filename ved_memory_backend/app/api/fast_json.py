@@ -0,0 +1,58 @@
+"""
+Opt-in fast path for large JSON responses (JSON_RESPONSE_BACKEND=orjson).
+
+Endpoints whose service already builds response-shaped data return
+
+    fast_json(content, response)
+
+With orjson enabled, the content is serialized directly by orjson. That
+skips FastAPI's response_model validation, which would rebuild and
+re-check every block and transcript, and the stdlib json encoder.
+Otherwise the content is returned unchanged, and FastAPI validates and
+serializes it as usual. Content must therefore match the response model
+exactly (all fields, JSON-compatible types).
+"""
+from typing import Any, Optional
+
+from fastapi import Response
+
+from app.core.config import settings
+from app.core.profiling import timed
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def fast_json_enabled() -> bool:
+    return settings.JSON_RESPONSE_BACKEND == "orjson" and orjson is not None
+
+
+def fields_of(schema, obj) -> dict:
+    """Response-shaped dict of an ORM object, without validating it."""
+    return {name: getattr(obj, name) for name in schema.model_fields}
+
+
+def fast_json(content: Any, response: Optional[Response] = None) -> Any:
+    if not fast_json_enabled():
+        return content
+
+    with timed("serialize"):
+        fast = ORJSONResponse(content)
+
+    # Headers set on the injected Response (e.g. ETag) are only merged
+    # by FastAPI when the endpoint does not return a Response itself
+    if response is not None:
+        fast.raw_headers.extend(response.headers.raw)
+
+    return fast
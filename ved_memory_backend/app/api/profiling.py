@@ -0,0 +1,228 @@
+"""
+Request profiling: ProfilingMiddleware times every HTTP request and
+reports the spans collected through app.core.profiling
+
+    Server-Timing: total;dur=41.2, auth;dur=0.3, db;dur=12.9;desc="9 queries",
+                   score;dur=18.1, passages;dur=4.0, serialize;dur=2.2,
+                   fetch;desc="6 rows, 52311 bytes"
+
+and as Prometheus metrics labelled by route template (GET /metrics).
+Server-Timing is sent with the response headers, so for streamed
+responses it only covers the work done before the first byte; the
+metrics cover the whole request.
+
+Routers use TimedRoute so the time between the endpoint returning and
+the response being built (response_model validation and rendering) is
+reported as "serialize".
+"""
+import asyncio
+import functools
+import logging
+import time
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.core.profiling import (
+    activate,
+    current_profile,
+    deactivate,
+    profiled_call,
+    start_request,
+)
+from app.core.prometheus import Counter, Histogram
+from app.db.instrumentation import track_fetches
+
+
+logger = logging.getLogger(__name__)
+
+
+REQUESTS = Counter(
+    "ved_http_requests_total", "HTTP requests", ("method", "route", "status")
+)
+DURATION = Histogram(
+    "ved_http_request_duration_seconds", "HTTP request duration", ("method", "route")
+)
+PHASE_SECONDS = Counter(
+    "ved_http_phase_seconds_total",
+    "Time spent in request phases (auth, db, score, passages, serialize)",
+    ("method", "route", "phase"),
+)
+DB_QUERIES = Counter(
+    "ved_http_db_queries_total", "SQL statements executed by requests", ("method", "route")
+)
+FETCHED_ROWS = Counter(
+    "ved_http_fetched_rows_total", "ORM rows loaded by requests", ("method", "route")
+)
+FETCHED_BYTES = Counter(
+    "ved_http_fetched_bytes_total", "ORM column bytes loaded by requests", ("method", "route")
+)
+SLOW_REQUESTS = Counter(
+    "ved_http_slow_requests_total",
+    "Requests slower than PROFILING_SLOW_REQUEST_MS",
+    ("method", "route"),
+)
+
+
+def server_timing(profile) -> str:
+    entries = [f"total;dur={profile.elapsed() * 1000:.1f}"]
+
+    if "auth" in profile.spans:
+        entries.append(f"auth;dur={profile.spans['auth'] * 1000:.1f}")
+
+    if profile.db_queries:
+        entries.append(f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.db_queries} queries"')
+
+    for name, seconds in profile.spans.items():
+        if name != "auth":
+            entries.append(f"{name};dur={seconds * 1000:.1f}")
+
+    if profile.fetch is not None and profile.fetch.rows:
+        entries.append(f'fetch;desc="{profile.fetch.rows} rows, {profile.fetch.bytes} bytes"')
+
+    return ", ".join(entries)
+
+
+# --------------------------------
+# Middleware
+# --------------------------------
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        profile = start_request()
+        token = activate(profile)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.PROFILING_SERVER_TIMING:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", server_timing(profile).encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            if settings.PROFILING_TRACK_FETCHES:
+                with track_fetches() as fetched:
+                    profile.fetch = fetched
+                    await self.app(scope, receive, send_with_timing)
+            else:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            deactivate(token)
+            _record(scope, profile, status)
+
+
+def _record(scope, profile, status: int) -> None:
+    elapsed = profile.elapsed()
+    route = scope.get("route")
+    if route is not None:
+        template = route.path
+    elif "endpoint" in scope:   # Starlette routes (/docs, /openapi.json)
+        template = scope["path"]
+    else:
+        template = "unmatched"
+
+    labels = {
+        "method": scope["method"],
+        # Route template keeps the label set small; unknown paths share one
+        "route": template,
+    }
+
+    REQUESTS.inc(status=status, **labels)
+    DURATION.observe(elapsed, **labels)
+    PHASE_SECONDS.inc(profile.db_seconds, phase="db", **labels)
+    DB_QUERIES.inc(profile.db_queries, **labels)
+    for phase, seconds in profile.spans.items():
+        PHASE_SECONDS.inc(seconds, phase=phase, **labels)
+    if profile.fetch is not None:
+        FETCHED_ROWS.inc(profile.fetch.rows, **labels)
+        FETCHED_BYTES.inc(profile.fetch.bytes, **labels)
+
+    slow_ms = settings.PROFILING_SLOW_REQUEST_MS
+    if not slow_ms or elapsed * 1000 < slow_ms:
+        return
+
+    SLOW_REQUESTS.inc(**labels)
+
+    dump = None
+    if profile.sampler is not None:
+        name = "{}-{}-{}-{:.0f}ms".format(
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"),
+            labels["method"],
+            labels["route"].strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root",
+            elapsed * 1000,
+        )
+        try:
+            dump = profile.sampler.dump(name)
+        except OSError:
+            logger.exception("Could not write the request profile")
+
+    logger.warning(
+        "Slow request %s %s -> %s in %.0f ms [%s]%s",
+        labels["method"],
+        scope["path"],
+        status,
+        elapsed * 1000,
+        server_timing(profile),
+        f", profile: {dump}" if dump else "",
+    )
+
+
+# --------------------------------
+# Route class
+# --------------------------------
+def _mark_endpoint_done() -> None:
+    profile = current_profile()
+    if profile is not None:
+        profile.endpoint_done = time.perf_counter()
+
+
+def _timed_endpoint(endpoint):
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        # Sync endpoints run in the threadpool: profile them there
+        @functools.wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            try:
+                return profiled_call(endpoint, *args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+
+    return timed_endpoint
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that reports response serialization as its own span."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+
+            profile = current_profile()
+            if profile is not None and profile.endpoint_done is not None:
+                profile.add("serialize", time.perf_counter() - profile.endpoint_done)
+
+            return response
+
+        return timed_handler
@@ -1,29 +1,156 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_session, get_session_user, run_in_session, user_cache
+from app.api.profiling import TimedRoute
 from app.core.config import settings
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    REFRESH_TOKEN,
+    check_password,
     create_access_token,
+    create_refresh_token,
+    decode_token,
+    hash_password,
+    new_token_id,
 )
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, Token
+from app.schemas.user import (
+    UserCreate,
+    UserLogin,
+    Token,
+    TokenRefresh,
+    Logout,
+    PasswordChange,
+)
+
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=TimedRoute)
+
+
+# Hashing runs in the password pool (app.core.security); these run the
+# database work on either engine through run_in_session
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(db: Session, email: str, hashed_password: str) -> User:
+    user = User(
+        email=email,
+        hashed_password=hashed_password,
+        is_active=True,
+        resume_mode="summary",
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _set_password_hash(
+    db: Session, user_id: int, hashed_password: str, revoke_tokens: bool = False
+) -> None:
+    user = db.get(User, user_id)
+    user.hashed_password = hashed_password
+
+    # Password change: every session has to log in again
+    if revoke_tokens:
+        db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete(
+            synchronize_session=False
+        )
+
+    db.commit()
+
+
+# Refresh tokens are usable while their jti has a row (app.models.refresh_token)
+def _refresh_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+# These build the token pair inside the session call: commit expires
+# `user`, and reading it afterwards on the event loop would load it there
+def _store_refresh_token(db: Session, user: User) -> dict:
+    claims = _claims(user)
+
+    # The user's expired tokens go whenever a new one is issued
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == claims["uid"],
+        RefreshToken.expires_at <= datetime.utcnow(),
+    ).delete(synchronize_session=False)
+
+    jti = new_token_id()
+    db.add(RefreshToken(jti=jti, user_id=claims["uid"], expires_at=_refresh_expiry()))
+    db.commit()
+
+    return _tokens(claims, jti)
+
+
+def _rotate_refresh_token(db: Session, user: User, old_jti: str) -> Optional[dict]:
+    """
+    Replace a live refresh token with a new one. None if it was
+    already rotated, revoked or expired: of two concurrent refreshes
+    with the same token, only one deletes its row.
+    """
+    claims = _claims(user)
+
+    deleted = db.query(RefreshToken).filter(
+        RefreshToken.jti == old_jti,
+        RefreshToken.user_id == claims["uid"],
+        RefreshToken.expires_at > datetime.utcnow(),
+    ).delete(synchronize_session=False)
+
+    if not deleted:
+        db.rollback()
+        return None
+
+    jti = new_token_id()
+    db.add(RefreshToken(jti=jti, user_id=claims["uid"], expires_at=_refresh_expiry()))
+    db.commit()
+
+    return _tokens(claims, jti)
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+
+def _revoke_refresh_tokens(db: Session, user_id: int, jti: str, everywhere: bool) -> None:
+    query = db.query(RefreshToken).filter(RefreshToken.user_id == user_id)
+
+    # Signing out everywhere needs a token that is still live
+    if everywhere and query.filter(RefreshToken.jti == jti).first():
+        query.delete(synchronize_session=False)
+    else:
+        query.filter(RefreshToken.jti == jti).delete(synchronize_session=False)
+
+    db.commit()
+
+
+def _claims(user: User) -> dict:
+    return {"sub": user.email, "uid": user.id}
+
+
+def _tokens(claims: dict, jti: str) -> dict:
+    return {
+        "access_token": create_access_token(
+            data=claims,
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        ),
+        "refresh_token": create_refresh_token(claims, jti),
+        "token_type": "bearer",
+    }
+
+
+async def _issue_tokens(db, user: User) -> dict:
+    return await run_in_session(db, _store_refresh_token, user=user)
 
 
 # -----------------------------------
 # REGISTER
 # -----------------------------------
 @router.post("/register", response_model=Token)
-def register(data: UserCreate, db: Session = Depends(get_db)):
+async def register(data: UserCreate, db=Depends(get_session)):
 
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == data.email).first()
+    existing_user = await run_in_session(db, _find_user, email=data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,38 +158,22 @@ def register(data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create user
-    hashed_password = get_password_hash(data.password)
-
-    new_user = User(
-        email=data.email,
-        hashed_password=hashed_password,
-        is_active=True,
-        resume_mode="summary",
-    )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_password = await hash_password(data.password)
 
-    # Create token
-    access_token = create_access_token(
-        data={"sub": new_user.email},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    new_user = await run_in_session(
+        db, _create_user, email=data.email, hashed_password=hashed_password
     )
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-    }
+    return await _issue_tokens(db, new_user)
 
 
 # -----------------------------------
 # LOGIN
 # -----------------------------------
 @router.post("/login", response_model=Token)
-def login(data: UserLogin, db: Session = Depends(get_db)):
+async def login(data: UserLogin, db=Depends(get_session)):
 
-    user = db.query(User).filter(User.email == data.email).first()
+    user = await run_in_session(db, _find_user, email=data.email)
 
     if not user:
         raise HTTPException(
@@ -70,18 +181,111 @@ def login(data: UserLogin, db: Session = Depends(get_db)):
             detail="Invalid credentials",
         )
 
-    if not verify_password(data.password, user.hashed_password):
+    valid, new_hash = await check_password(data.password, user.hashed_password)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
 
-    access_token = create_access_token(
-        data={"sub": user.email},
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    # Stored hash uses an older scheme: replace it while we have the password
+    if new_hash:
+        await run_in_session(
+            db, _set_password_hash, user_id=user.id, hashed_password=new_hash
+        )
+        user_cache.invalidate(data.email)
+
+    return await _issue_tokens(db, user)
+
+
+# -----------------------------------
+# REFRESH
+# -----------------------------------
+@router.post("/refresh", response_model=Token)
+async def refresh(data: TokenRefresh, db=Depends(get_session)):
+    """
+    New access and refresh token without re-checking the password.
+    The presented refresh token is used up: it works exactly once.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
     )
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-    }
+    claims = decode_token(data.refresh_token, REFRESH_TOKEN)
+
+    # Tokens issued before server-side storage have no jti
+    if not claims or not claims.get("jti"):
+        raise invalid
+
+    user = await run_in_session(db, _find_user, email=claims["sub"])
+
+    if not user or not user.is_active or user.id != claims.get("uid"):
+        raise invalid
+
+    tokens = await run_in_session(
+        db, _rotate_refresh_token, user=user, old_jti=claims["jti"]
+    )
+
+    if tokens is None:
+        raise invalid
+
+    return tokens
+
+
+# -----------------------------------
+# LOGOUT
+# -----------------------------------
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(data: Logout, db=Depends(get_session)):
+    """
+    Revoke a refresh token (with `everywhere`, all of the user's).
+    Access tokens stay valid until they expire.
+    """
+    claims = decode_token(data.refresh_token, REFRESH_TOKEN)
+
+    # Unknown or already revoked: nothing to do, logout is idempotent
+    if claims and claims.get("jti") and claims.get("uid") is not None:
+        await run_in_session(
+            db,
+            _revoke_refresh_tokens,
+            user_id=claims["uid"],
+            jti=claims["jti"],
+            everywhere=data.everywhere,
+        )
+
+
+# -----------------------------------
+# CHANGE PASSWORD
+# -----------------------------------
+@router.post("/password", response_model=Token)
+async def change_password(
+    data: PasswordChange,
+    db=Depends(get_session),
+    current_user: User = Depends(get_session_user),
+):
+    """
+    Set a new password and revoke every refresh token of the user.
+    Returns a fresh pair for the caller.
+    """
+    valid, _ = await check_password(data.current_password, current_user.hashed_password)
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials",
+        )
+
+    hashed_password = await hash_password(data.new_password)
+
+    await run_in_session(
+        db,
+        _set_password_hash,
+        user_id=current_user.id,
+        hashed_password=hashed_password,
+        revoke_tokens=True,
+    )
+    user_cache.invalidate(current_user.email)
+
+    return await _issue_tokens(db, current_user)
@@ -1,16 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import json
+import time
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer_group
 from datetime import datetime
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_session, get_session_user, run_in_session
+from app.api.fast_json import fast_json, fields_of
+from app.api.profiling import TimedRoute
+from app.core.config import settings
 from app.models.conversation import Conversation
 from app.models.project import Project
-from app.schemas.conversation import ConversationCreate, ConversationOut
+from app.schemas.conversation import (
+    BulkConversationItem,
+    BulkIngestResult,
+    ConversationAppend,
+    ConversationCreate,
+    ConversationOut,
+    ConversationSaveResult,
+)
+from app.services.ingest import (
+    APPENDED,
+    CREATED,
+    DUPLICATE,
+    ERROR,
+    BaseHashMismatch,
+    append_content,
+    find_existing,
+    insert_batch,
+    set_hashes,
+)
+from app.services.job_handlers import enqueue_conversation_index
+from app.services.revisions import touch_projects
+
+router = APIRouter(prefix="/conversations", tags=["Conversations"], route_class=TimedRoute)
+
+
+def _commit_content(db: Session, conversation: Conversation, status: str) -> dict:
+    db.flush()
 
-router = APIRouter(prefix="/conversations", tags=["Conversations"])
+    # Read before commit expires the (deferred) body
+    content_length = len(conversation.raw_content)
 
+    # Search index, passages and embeddings run in a job committed with
+    # the write; the response does not wait for them
+    job_id = enqueue_conversation_index(db, conversation).id
+    touch_projects(db, [conversation.project_id])
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent save claimed the same conversation_key
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Conversation was saved concurrently, retry")
+
+    db.refresh(conversation)
 
-@router.post("/save", response_model=ConversationOut)
+    return _save_result(conversation, status, content_length, job_id)
+
+
+def _save_result(
+    conversation: Conversation,
+    status: str,
+    content_length: int = None,
+    index_job_id: int = None,
+) -> dict:
+    if content_length is None:
+        content_length = len(conversation.raw_content)
+
+    return {
+        "id": conversation.id,
+        "created_at": conversation.created_at,
+        "user_id": conversation.user_id,
+        "project_id": conversation.project_id,
+        "conversation_key": conversation.conversation_key,
+        "content_hash": conversation.content_hash,
+        "content_length": content_length,
+        "status": status,
+        "index_job_id": index_job_id,
+    }
+
+
+@router.post("/save", response_model=ConversationSaveResult)
 def save_conversation(
     data: ConversationCreate,
     db: Session = Depends(get_db),
@@ -25,25 +99,182 @@ def save_conversation(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    existing, status = find_existing(
+        db,
+        current_user.id,
+        data.project_id,
+        data.raw_content,
+        data.conversation_key,
+    )
+
+    if status == DUPLICATE:
+        return _save_result(existing, DUPLICATE)
+
+    if existing:
+        # Same chat, grown or edited: one row per chat, not one per save
+        existing.raw_content = data.raw_content
+        set_hashes(existing)
+        return _commit_content(db, existing, status)
+
     conversation = Conversation(
         raw_content=data.raw_content,
         created_at=datetime.utcnow(),
         user_id=current_user.id,
-        project_id=data.project_id   # ✅ CRITICAL FIX
+        project_id=data.project_id,   # ✅ CRITICAL FIX
+        conversation_key=data.conversation_key,
     )
+    set_hashes(conversation)
 
     db.add(conversation)
-    db.commit()
-    db.refresh(conversation)
 
-    return conversation
+    return _commit_content(db, conversation, CREATED)
+
+
+async def _read_items(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Raw items from a JSON array body, or from NDJSON read line by line
+    as it streams in (Content-Type: application/x-ndjson).
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        index = 0
+        buffer = b""
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    for index, item in enumerate(data):
+        yield index, item
 
 
-@router.get("", response_model=list[ConversationOut])
-def list_conversations(
+def _parse_item(raw: Any) -> BulkConversationItem:
+    if isinstance(raw, (bytes, str)):
+        return BulkConversationItem.model_validate_json(raw)
+    return BulkConversationItem.model_validate(raw)
+
+
+@router.post("/bulk", response_model=BulkIngestResult)
+async def bulk_import(
+    request: Request,
+    db=Depends(get_session),
+    current_user = Depends(get_session_user),
+):
+    started = time.perf_counter()
+
+    owned: set = set()
+    items = []
+    results = []
+    job_ids = []
+
+    # Parse everything first: a request over the limit is rejected
+    # before any batch commits
+    async for index, raw in _read_items(request):
+        if index >= settings.BULK_INGEST_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.BULK_INGEST_MAX_ITEMS} conversations per request",
+            )
+
+        try:
+            items.append((index, _parse_item(raw)))
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            results.append({
+                "index": index,
+                "status": ERROR,
+                "error": f"{location}: {error['msg']}" if location else error["msg"],
+            })
+
+    for start in range(0, len(items), settings.BULK_INGEST_BATCH_SIZE):
+        batch_results, job_id = await run_in_session(
+            db,
+            insert_batch,
+            user_id=current_user.id,
+            items=items[start:start + settings.BULK_INGEST_BATCH_SIZE],
+            owned=owned,
+        )
+        results.extend(batch_results)
+        if job_id is not None:
+            job_ids.append(job_id)
+
+    results.sort(key=lambda result: result["index"])
+    created = sum(r["status"] == CREATED for r in results)
+
+    elapsed = time.perf_counter() - started
+
+    return {
+        "received": len(results),
+        "created": created,
+        "duplicates": sum(r["status"] == DUPLICATE for r in results),
+        "errors": sum(r["status"] == ERROR for r in results),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "per_second": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "index_job_ids": job_ids,
+        "items": results,
+    }
+
+
+@router.post("/{conversation_id}/append", response_model=ConversationSaveResult)
+def append_conversation(
+    conversation_id: int,
+    data: ConversationAppend,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    conversation = db.query(Conversation).options(undefer_group("body")).filter(
+        Conversation.id == conversation_id,
+        Conversation.user_id == current_user.id
+    ).first()
+
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    if not data.content:
+        return _save_result(conversation, DUPLICATE)
+
+    try:
+        append_content(conversation, data.base_hash, data.content)
+    except BaseHashMismatch:
+        raise HTTPException(
+            status_code=409,
+            detail="Conversation changed since base_hash, resend the full content",
+        )
+
+    return _commit_content(db, conversation, APPENDED)
+
+
+@router.get("/{conversation_id}", response_model=ConversationOut)
+def get_conversation(
+    conversation_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
-    return db.query(Conversation).filter(
+    conversation = db.query(Conversation).options(undefer_group("body")).filter(
+        Conversation.id == conversation_id,
         Conversation.user_id == current_user.id
-    ).order_by(Conversation.created_at.desc()).all()
+    ).first()
+
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    return fast_json(fields_of(ConversationOut, conversation))
@@ -1,41 +1,117 @@
-from fastapi import APIRouter, Depends
+import base64
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import exists
 
 from app.api.deps import get_db, get_current_user
+from app.api.etag import matches, not_modified, weak_etag
+from app.api.profiling import TimedRoute
 from app.models.conversation import Conversation
 from app.models.summary import Summary
 from app.models.user import User
+from app.schemas.conversation import ConversationPage
+from app.services.revisions import project_revision, user_revision
+
+router = APIRouter(prefix="/conversations", tags=["conversations"], route_class=TimedRoute)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-router = APIRouter(prefix="/conversations", tags=["conversations"])
 
+# ---------------------------------------------------
+# Keyset cursor: opaque "<created_at iso>|<id>"
+# ---------------------------------------------------
+def encode_cursor(created_at: datetime, conversation_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, conversation_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), int(conversation_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.get("")
+
+@router.get("", response_model=ConversationPage)
 def list_conversations(
+    request: Request,
+    response: Response,
+    project_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == current_user.id)
-        .order_by(Conversation.created_at.desc())
-        .all()
+    if project_id is not None:
+        marker = project_revision(db, current_user.id, project_id)
+    else:
+        marker = user_revision(db, current_user.id)
+
+    etag = weak_etag("conversations", current_user.id, marker, project_id, cursor, limit)
+    if matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    # ux_summaries_conversation_id: at most one summary per conversation,
+    # so a plain outer join keeps one row each and only touches the
+    # summaries of the page's conversations
+    statement = (
+        select(
+            Conversation.id,
+            Conversation.project_id,
+            Conversation.created_at,
+            Summary.conversation_id.label("summary_id"),
+            Summary.updated_at.label("summary_updated_at"),
+        )
+        .outerjoin(Summary, Summary.conversation_id == Conversation.id)
+        .where(Conversation.user_id == current_user.id)
     )
 
-    result = []
+    if project_id is not None:
+        statement = statement.where(Conversation.project_id == project_id)
 
-    for convo in conversations:
-        summary = (
-            db.query(Summary)
-            .filter(Summary.conversation_id == convo.id)
-            .first()
+    if cursor:
+        created_at, conversation_id = decode_cursor(cursor)
+        statement = statement.where(
+            or_(
+                Conversation.created_at < created_at,
+                and_(
+                    Conversation.created_at == created_at,
+                    Conversation.id < conversation_id,
+                ),
+            )
         )
 
-        result.append({
-            "id": convo.id,
-            "created_at": convo.created_at,
-            "has_summary": summary is not None,
-            "summary_updated_at": summary.updated_at if summary else None,
-        })
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(
+        statement
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
 
-    return result
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "project_id": row.project_id,
+                "created_at": row.created_at,
+                "has_summary": row.summary_id is not None,
+                "summary_updated_at": row.summary_updated_at,
+            }
+            for row in page
+        ],
+        "next_cursor": next_cursor,
+    }
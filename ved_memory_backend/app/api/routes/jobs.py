@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_user
+from app.api.profiling import TimedRoute
+from app.models.job import Job
+from app.schemas.job import JobOut
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], route_class=TimedRoute)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.user_id == current_user.id
+    ).first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
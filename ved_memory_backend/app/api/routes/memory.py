@@ -1,23 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_session, get_session_user, run_in_session
+from app.api.etag import matches, not_modified, weak_etag
+from app.api.fast_json import fast_json
+from app.api.profiling import TimedRoute
+from app.core.config import settings
 from app.models.user import User
 from app.schemas.memory import (
+    MemoryContextBatchRequest,
+    MemoryContextBatchResponse,
+    MemoryContextOptions,
     MemoryContextRequest,
     MemoryContextResponse,
 )
-from app.services.memory_engine import get_memory_context
+from app.services.memory_cache import cache_key, get_memory_cache, normalize_query
+from app.services.memory_engine import get_memory_context, get_memory_context_batch
+from app.services.revisions import project_revision
 
 
-router = APIRouter(prefix="/memory", tags=["Memory"])
+router = APIRouter(prefix="/memory", tags=["Memory"], route_class=TimedRoute)
+
+
+def _options(data: MemoryContextOptions) -> dict:
+    if data.limit is not None and data.limit > settings.MEMORY_CONTEXT_MAX_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be at most {settings.MEMORY_CONTEXT_MAX_LIMIT}",
+        )
+
+    return dict(
+        scorer=data.scorer or settings.MEMORY_DEFAULT_SCORER,
+        mode=data.mode,
+        neighbors=data.neighbors,
+        max_chars=data.max_chars or (
+            data.max_tokens * 4 if data.max_tokens else None
+        ),
+        include_raw=data.include_raw,
+        limit=data.limit or settings.MEMORY_CONTEXT_LIMIT,
+    )
 
 
 @router.post("/context", response_model=MemoryContextResponse)
-def memory_context(
+async def memory_context(
+    request: Request,
+    response: Response,
     data: MemoryContextRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db=Depends(get_session),
+    current_user: User = Depends(get_session_user),
 ):
     """
     Smart Memory Context Endpoint
@@ -25,28 +54,112 @@ def memory_context(
     - Requires authentication
     - Validates project ownership
     - Retrieves ranked context blocks
+    - Serves repeated lookups from the result cache until the
+      project changes, or 304 when the client's ETag still matches
     """
 
-    # 1️⃣ Call Service Layer
+    options = _options(data)
+
+    # 1️⃣ Unchanged Since The Client's Copy
+    revision = await run_in_session(
+        db, project_revision, user_id=current_user.id, project_id=data.project_id
+    )
+
+    if revision is not None:
+        etag = weak_etag(
+            "memory",
+            current_user.id,
+            data.project_id,
+            revision,
+            normalize_query(data.query),
+            sorted(options.items()),
+        )
+        if matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+
+    # 2️⃣ Cached Result
+    cache = get_memory_cache()
+    key = None
+
+    if cache is not None and data.query.strip():
+        # Generation first: a write committing meanwhile bumps it, so a
+        # result computed from older data is stored under the old key
+        key = cache_key(
+            current_user.id,
+            data.project_id,
+            data.query,
+            cache.generation(data.project_id),
+            **options,
+        )
+        result = cache.get(key)
+        if result is not None:
+            return fast_json(result, response)
+
+    # 3️⃣ Call Service Layer
     try:
-        result = get_memory_context(
+        result = await run_in_session(
+            db,
+            get_memory_context,
             project_id=data.project_id,
             query=data.query,
-            db=db,
             current_user=current_user,
+            **options,
         )
-    except ValueError:
+    except ValueError as exc:
         raise HTTPException(
             status_code=400,
-            detail="Query cannot be empty",
+            detail=str(exc),
         )
 
-    # 2️⃣ Project Not Found
+    # 4️⃣ Project Not Found
     if result is None:
         raise HTTPException(
             status_code=404,
             detail="Project not found",
         )
 
-    return result
+    if key is not None:
+        cache.set(key, result)
+
+    return fast_json(result, response)
+
+
+
+@router.post("/context/batch", response_model=MemoryContextBatchResponse)
+async def memory_context_batch(
+    response: Response,
+    data: MemoryContextBatchRequest,
+    db=Depends(get_session),
+    current_user: User = Depends(get_session_user),
+):
+    """
+    Several memory lookups in one request
+
+    - `lookups`: [{project_id, query}]; project_id "*" searches every
+      project of the user
+    - Options (scorer, mode, limit, budgets) apply to every lookup
+    - One result per (project, query), in request order, each with the
+      `index` of its lookup; unknown projects and empty queries get an
+      `error` instead of blocks
+    - Each project's queries are ranked together; results are not
+      cached
+    """
+
+    options = _options(data)
+
+    try:
+        results = await run_in_session(
+            db,
+            get_memory_context_batch,
+            current_user=current_user,
+            lookups=[(lookup.project_id, lookup.query) for lookup in data.lookups],
+            **options,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=str(exc),
+        )
 
+    return fast_json({"results": results}, response)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, user_cache
+from app.api.profiling import TimedRoute
+from app.core.prometheus import render, stats_families
+from app.db.session import pool_stats
+from app.services.jobs import queue_stats
+from app.services.memory_cache import get_memory_cache
+from app.services.memory_snapshot import get_snapshot_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"], route_class=TimedRoute)
+
+
+@router.get("", response_class=PlainTextResponse)
+def prometheus_metrics(db: Session = Depends(get_db)):
+    """
+    Prometheus text format: request counts, latency histograms and
+    phase timings per route (app.api.profiling), plus the pool, cache
+    and job counters below. Per worker process.
+    """
+    cache = get_memory_cache()
+
+    return PlainTextResponse(
+        render([
+            *stats_families(
+                "ved_db_pool", "Connection pool",
+                [({"engine": name}, stats) for name, stats in pool_stats().items()],
+            ),
+            *stats_families("ved_user_cache", "Authenticated-user cache", [({}, user_cache.stats())]),
+            *stats_families(
+                "ved_memory_cache", "/memory/context result cache",
+                [({}, cache.stats())] if cache is not None else [],
+            ),
+            *stats_families(
+                "ved_memory_snapshots", "In-memory project index snapshots",
+                [({}, get_snapshot_cache().stats())],
+            ),
+            *stats_families("ved_jobs", "Background jobs", [({}, queue_stats(db))]),
+        ]),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@router.get("/db-pool")
+def db_pool_metrics():
+    """
+    Connection pool usage per engine: checked-out connections,
+    checkout wait time, overflow events and timeouts.
+    """
+    return pool_stats()
+
+
+@router.get("/user-cache")
+def user_cache_metrics():
+    """Authenticated-user cache size and hit / miss / eviction counters."""
+    return user_cache.stats()
+
+
+@router.get("/jobs")
+def job_metrics(db: Session = Depends(get_db)):
+    """Background jobs per status and the number of worker threads."""
+    return queue_stats(db)
+
+
+@router.get("/memory-cache")
+def memory_cache_metrics():
+    """/memory/context result cache hit / miss / eviction counters."""
+    cache = get_memory_cache()
+    return cache.stats() if cache is not None else {"backend": "off"}
+
+
+@router.get("/memory-snapshots")
+def memory_snapshot_metrics():
+    """Snapshot engine: cached projects, bytes used and build / refresh counters."""
+    return get_snapshot_cache().stats()
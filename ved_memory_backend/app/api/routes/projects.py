@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from app.api.deps import get_db, get_current_user
+from app.api.etag import matches, not_modified, weak_etag
+from app.api.profiling import TimedRoute
 from app.models.project import Project
 from app.schemas.project import ProjectCreate, ProjectOut
+from app.services.revisions import user_revision
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(prefix="/projects", tags=["Projects"], route_class=TimedRoute)
 
 
 @router.post("/create", response_model=ProjectOut)
@@ -25,9 +28,16 @@ def create_project(
 
 @router.get("", response_model=list[ProjectOut])
 def list_projects(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
+    etag = weak_etag("projects", current_user.id, user_revision(db, current_user.id))
+    if matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     return db.query(Project).filter(
         Project.user_id == current_user.id
     ).all()
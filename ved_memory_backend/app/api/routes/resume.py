@@ -1,57 +1,104 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 
-from app.api.deps import get_db, get_current_user
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_session, get_session_user, run_in_session
+from app.api.etag import matches, not_modified, weak_etag
+from app.api.fast_json import fast_json
+from app.api.profiling import TimedRoute
+from app.core.config import settings
+from app.db.session import SessionLocal, AsyncSessionLocal
 from app.models.user import User
 from app.services.resume_engine import (
     get_latest_summary,
-    get_all_summaries,
     get_latest_full_context,
+    stream_all_summaries,
+    stream_all_summaries_async,
 )
+from app.services.revisions import user_revision
+
+router = APIRouter(prefix="/resume", tags=["Resume"], route_class=TimedRoute)
+
+
+# The stream owns its session: it outlives the request dependencies
+def _stream_sync(**kwargs):
+    db = SessionLocal()
+    try:
+        yield from stream_all_summaries(db, **kwargs)
+    finally:
+        db.close()
 
-router = APIRouter(prefix="/resume", tags=["Resume"])
+
+async def _stream_async(**kwargs):
+    async with AsyncSessionLocal() as db:
+        async for line in stream_all_summaries_async(db, **kwargs):
+            yield line
 
 
 @router.get("/context")
-def get_resume_context(
+async def get_resume_context(
+    request: Request,
+    response: Response,
     mode: str = Query("latest"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    # mode=all only
+    project_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_bytes: Optional[int] = Query(None, gt=0),
+    db=Depends(get_session),
+    current_user: User = Depends(get_session_user),
 ):
+    marker = await run_in_session(db, user_revision, user_id=current_user.id)
+    etag = weak_etag("resume", current_user.id, marker, mode, project_id, since, until, max_bytes)
+    if matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     if mode == "latest":
-        summary = get_latest_summary(current_user.id, db)
+        summary = await run_in_session(
+            db, get_latest_summary, user_id=current_user.id
+        )
 
         if not summary:
             return {"message": "No summary found"}
 
-        return {
+        return fast_json({
             "mode": "latest",
             "summary": summary.content,
             "updated_at": summary.updated_at,
-        }
+        }, response)
 
     elif mode == "all":
-        summaries = get_all_summaries(current_user.id, db)
-
-        merged = "\n\n".join([s.content for s in summaries])
+        # NDJSON: one summary per line, then {"done": true, ...}
+        stream = _stream_async if settings.DB_ASYNC else _stream_sync
 
-        return {
-            "mode": "all",
-            "merged_summary": merged,
-            "count": len(summaries),
-        }
+        return StreamingResponse(
+            stream(
+                user_id=current_user.id,
+                max_bytes=max_bytes,
+                project_id=project_id,
+                since=since,
+                until=until,
+            ),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag},
+        )
 
     elif mode == "full":
-        conversation, summary = get_latest_full_context(current_user.id, db)
+        conversation, summary = await run_in_session(
+            db, get_latest_full_context, user_id=current_user.id
+        )
 
         if not conversation:
             return {"message": "No conversation found"}
 
-        return {
+        return fast_json({
             "mode": "full",
             "raw_content": conversation.raw_content,
             "summary": summary.content if summary else None,
-        }
+        }, response)
 
     else:
         return {"error": "Invalid mode"}
@@ -1,17 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.api.deps import get_db, get_current_user
+from app.api.profiling import TimedRoute
 from app.models.summary import Summary
 from app.models.conversation import Conversation
-from app.schemas.summary import SummaryUpdate
+from app.schemas.summary import SummaryOut, SummaryUpdate
 from app.models.user import User
+from app.services.job_handlers import enqueue_summary_index
+from app.services.revisions import touch_projects
 
-router = APIRouter(prefix="/summaries", tags=["Summaries"])
+router = APIRouter(prefix="/summaries", tags=["Summaries"], route_class=TimedRoute)
 
 
-@router.post("/{conversation_id}")
+@router.post("/{conversation_id}", response_model=SummaryOut)
 def update_summary(
     conversation_id: int,
     data: SummaryUpdate,
@@ -47,7 +51,17 @@ def update_summary(
         )
         db.add(summary)
 
-    db.commit()
+    # Summary index and embedding run in a job committed with the write
+    enqueue_summary_index(db, conversation)
+    touch_projects(db, [conversation.project_id])
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request created the summary first (unique index)
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Summary was updated concurrently, retry")
+
     db.refresh(summary)
 
     return summary
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, user_cache
+from app.api.profiling import TimedRoute
 from app.models.user import User
 from pydantic import BaseModel
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=TimedRoute)
 
 
 # ---------------------------
@@ -38,11 +39,15 @@ def update_resume_mode(
     if data.resume_mode not in ["chat", "resume"]:
         raise HTTPException(status_code=400, detail="Invalid resume mode")
 
-    current_user.resume_mode = data.resume_mode
+    # current_user may be a cached, detached principal: update the row
+    user = db.get(User, current_user.id)
+    user.resume_mode = data.resume_mode
     db.commit()
-    db.refresh(current_user)
+    db.refresh(user)
+
+    user_cache.invalidate(user.email)
 
     return {
         "message": "Resume mode updated",
-        "resume_mode": current_user.resume_mode
+        "resume_mode": user.resume_mode
     }
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache with a per-entry time-to-live.
+    Keeps hit / miss / eviction counters for the metrics endpoints.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,206 @@
+"""
+Per-request timings, filled in while a request runs and reported by
+the profiling middleware (app.api.profiling) as Server-Timing headers
+and Prometheus metrics.
+
+    with timed("score"):
+        ...
+
+adds the block's duration to the current request's "score" span, and
+does nothing outside a request (job workers, scripts). Every statement
+executed on any engine is counted and timed through SQLAlchemy's
+before/after_cursor_execute events. The profile lives in a ContextVar,
+so like app.db.instrumentation it follows the request through the
+threadpool and run_sync.
+
+A sampled fraction of requests (PROFILING_SAMPLE_RATE) also runs its
+service calls under cProfile (or pyinstrument); when such a request is
+slower than PROFILING_SLOW_REQUEST_MS the profile is written to
+PROFILING_DUMP_DIR. Profilers are per thread: what is captured is the
+endpoint (sync routes) or each run_in_session call (async routes).
+"""
+import cProfile
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.instrumentation import FetchStats
+
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------
+# Sampled profiler
+# --------------------------------
+class Sampler:
+    """Collects the profiles of one request's service calls."""
+
+    def __init__(self, profiler: str):
+        self.profiler = profiler
+        self.stats: Optional[pstats.Stats] = None
+        self.text: List[str] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def run(self, fn, *args, **kwargs):
+        # Nested calls in a thread already being profiled run as is
+        if getattr(self._local, "active", False):
+            return fn(*args, **kwargs)
+
+        self._local.active = True
+        try:
+            if self.profiler == "pyinstrument":
+                return self._run_pyinstrument(fn, *args, **kwargs)
+            return self._run_cprofile(fn, *args, **kwargs)
+        finally:
+            self._local.active = False
+
+    def _run_cprofile(self, fn, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            with self._lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profile)
+                else:
+                    self.stats.add(profile)
+
+    def _run_pyinstrument(self, fn, *args, **kwargs):
+        from pyinstrument import Profiler
+
+        profiler = Profiler(async_mode="disabled")
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+            with self._lock:
+                self.text.append(profiler.output_text(unicode=True))
+
+    def dump(self, name: str) -> Optional[str]:
+        """Write the collected profile; returns the file path."""
+        if self.stats is None and not self.text:
+            return None
+
+        os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILING_DUMP_DIR, name)
+
+        if self.stats is not None:
+            path += ".prof"   # python -m pstats / snakeviz
+            self.stats.dump_stats(path)
+        else:
+            path += ".txt"
+            with open(path, "w") as f:
+                f.write("\n".join(self.text))
+
+        return path
+
+
+def _profiler_name() -> str:
+    name = settings.PROFILING_PROFILER
+    if name == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            logger.warning("pyinstrument is not installed, profiling with cProfile")
+            name = "cprofile"
+    return name
+
+
+# --------------------------------
+# Request profile
+# --------------------------------
+@dataclass
+class RequestProfile:
+    started: float = field(default_factory=time.perf_counter)
+    spans: Dict[str, float] = field(default_factory=dict)   # seconds
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    fetch: Optional[FetchStats] = None
+    # Set when the endpoint returns (app.api.profiling.TimedRoute)
+    endpoint_done: Optional[float] = None
+    sampler: Optional[Sampler] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def start_request() -> RequestProfile:
+    rate = settings.PROFILING_SAMPLE_RATE
+    sampled = rate > 0 and random.random() < rate
+
+    return RequestProfile(sampler=Sampler(_profiler_name()) if sampled else None)
+
+
+def activate(profile: RequestProfile):
+    return _current.set(profile)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+@contextmanager
+def timed(name: str):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def profiled_call(fn, *args, **kwargs):
+    """fn(*args, **kwargs), under the profiler when the request is sampled."""
+    profile = _current.get()
+    if profile is None or profile.sampler is None:
+        return fn(*args, **kwargs)
+    return profile.sampler.run(fn, *args, **kwargs)
+
+
+# --------------------------------
+# Database statements
+# --------------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.get("profiling_started")
+
+    if profile is None or not started:
+        return
+
+    profile.db_queries += 1
+    profile.db_seconds += time.perf_counter() - started.pop()
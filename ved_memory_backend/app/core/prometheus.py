@@ -0,0 +1,146 @@
+"""
+Prometheus text exposition (format 0.0.4) for GET /metrics, without
+the prometheus_client dependency: labelled counters and histograms kept
+in process, plus families built on demand from existing stats dicts
+(pool, caches, jobs).
+
+Values are per worker process; scrape each worker (or aggregate by
+instance) when running several.
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+# Seconds; request latencies from 5 ms to 10 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (name, type, help, [(labels, value[, name suffix]), ...])
+Family = Tuple[str, str, str, List[tuple]]
+
+
+def _escape_help(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def family(self) -> Family:
+        with self._lock:
+            samples = [
+                (dict(zip(self.labelnames, key)), value)
+                for key, value in self._values.items()
+            ]
+        return self.name, self.type, self.documentation, samples
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> ([count per bucket], sum, count)
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def family(self) -> Family:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = dict(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(({**labels, "le": _number(bound)}, cumulative, "_bucket"))
+                samples.append((labels, total, "_sum"))
+                samples.append((labels, count, "_count"))
+        return self.name, self.type, self.documentation, samples
+
+
+REGISTRY: List = []
+
+
+def stats_families(prefix: str, documentation: str, rows: Iterable[Tuple[Dict[str, str], Dict]]) -> List[Family]:
+    """
+    Families from stats dicts such as pool_stats(): one per numeric
+    key, keys ending in _total as counters, the rest as gauges.
+    """
+    families: Dict[str, Family] = {}
+
+    for labels, stats in rows:
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{prefix}_{key}"
+            kind = "counter" if key.endswith("_total") else "gauge"
+            family = families.setdefault(name, (name, kind, f"{documentation}: {key}", []))
+            family[3].append((labels, value))
+
+    return list(families.values())
+
+
+def render(extra: Iterable[Family] = ()) -> str:
+    lines = []
+
+    for name, kind, documentation, samples in [m.family() for m in REGISTRY] + list(extra):
+        lines.append(f"# HELP {name} {_escape_help(documentation)}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample in samples:
+            labels, value = sample[0], sample[1]
+            suffix = sample[2] if len(sample) > 2 else ""
+            lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
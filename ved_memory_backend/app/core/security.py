@@ -1,13 +1,52 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
+
+logger = logging.getLogger(__name__)
+
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _crypt_context() -> CryptContext:
+    """
+    PASSWORD_SCHEME hashes new passwords; hashes in the other scheme
+    still verify and are replaced on the next login (deprecated="auto").
+    """
+    scheme = settings.PASSWORD_SCHEME
+
+    if scheme == "argon2":
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            logger.warning("argon2-cffi is not installed, hashing with bcrypt")
+            scheme = "bcrypt"
+
+    schemes = [scheme] + [s for s in ("bcrypt", "argon2") if s != scheme]
+
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+        argon2__type="ID",
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+    )
+
+
+pwd_context = _crypt_context()
 
 
 def get_password_hash(password: str) -> str:
@@ -18,6 +57,94 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash or None): a new hash when the stored one is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# --------------------------------
+# Hashing off the API workers
+# --------------------------------
+class PasswordHashBusy(Exception):
+    """More than PASSWORD_HASH_MAX_PENDING hashes are waiting."""
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending = 0
+
+
+def _hash_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_hash_pool() -> None:
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def _offload(fn, *args):
+    """
+    Run `fn` in the hashing process pool (PASSWORD_HASH_WORKERS > 0),
+    otherwise in the threadpool. Raises PasswordHashBusy when too many
+    hashes are already waiting.
+    """
+    global _pending
+
+    with _pool_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHashBusy()
+        _pending += 1
+
+    try:
+        pool = _hash_pool()
+        if pool is None:
+            return await run_in_threadpool(fn, *args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (or could not start: spawn re-imports __main__,
+            # which must be import-safe); start a fresh pool next time
+            logger.warning("Password hashing pool is broken, hashing in a thread")
+            shutdown_hash_pool()
+            return await run_in_threadpool(fn, *args)
+    finally:
+        with _pool_lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _offload(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _offload(verify_and_update, plain_password, hashed_password)
+
+
+# --------------------------------
+# Tokens
+# --------------------------------
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
 
@@ -37,3 +164,36 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     )
 
     return encoded_jwt
+
+
+def new_token_id() -> str:
+    return uuid.uuid4().hex
+
+
+def create_refresh_token(data: dict, jti: str) -> str:
+    """
+    Long-lived token accepted only by /auth/refresh, and only while
+    its `jti` is stored server-side (see app.models.refresh_token).
+    """
+    return create_access_token(
+        {**data, "typ": REFRESH_TOKEN, "jti": jti},
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN) -> Optional[dict]:
+    """Claims of a valid token of `token_type`, else None."""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+        )
+    except Exception:
+        return None
+
+    # Access tokens issued before refresh tokens existed have no "typ"
+    if payload.get("typ", ACCESS_TOKEN) != token_type or not payload.get("sub"):
+        return None
+
+    return payload
@@ -5,3 +5,12 @@ from app.models.user import User
 from app.models.project import Project
 from app.models.conversation import Conversation
 from app.models.summary import Summary
+from app.models.passage import ConversationPassage
+from app.models.job import Job
+from app.models.refresh_token import RefreshToken
+from app.models.search_index import (
+    SearchDocument,
+    SearchPosting,
+    SearchTermStat,
+    SearchCorpusStat,
+)
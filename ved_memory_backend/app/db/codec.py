@@ -0,0 +1,193 @@
+"""
+Compressed storage for large text columns.
+
+A packed body is one codec byte followed by the payload:
+
+    0x01  zlib
+    0x02  zstd
+    0x03  zstd with the shared dictionary (BODY_COMPRESSION_DICT_PATH)
+
+Models keep the plain Text column (empty when packed) next to a
+LargeBinary column and expose the text through `packed_text()`, which
+decodes on first access only.
+"""
+import logging
+import threading
+import zlib
+from typing import List, Optional
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = 0x01
+CODEC_ZSTD = 0x02
+CODEC_ZSTD_DICT = 0x03
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+# ---------------------------------------------------
+# zstd contexts (thread-local: zstandard contexts are not thread-safe)
+# ---------------------------------------------------
+_local = threading.local()
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+
+def _zstd_dictionary():
+    global _dictionary
+
+    if not settings.BODY_COMPRESSION_DICT_PATH:
+        return None
+
+    with _dictionary_lock:
+        if _dictionary is None:
+            with open(settings.BODY_COMPRESSION_DICT_PATH, "rb") as f:
+                _dictionary = zstandard.ZstdCompressionDict(f.read())
+        return _dictionary
+
+
+def _zstd_compressor(use_dict: bool):
+    key = "compressor_dict" if use_dict else "compressor"
+    compressor = getattr(_local, key, None)
+
+    if compressor is None:
+        compressor = zstandard.ZstdCompressor(
+            level=settings.BODY_COMPRESSION_LEVEL,
+            dict_data=_zstd_dictionary() if use_dict else None,
+        )
+        setattr(_local, key, compressor)
+
+    return compressor
+
+
+def _zstd_decompressor(use_dict: bool):
+    key = "decompressor_dict" if use_dict else "decompressor"
+    decompressor = getattr(_local, key, None)
+
+    if decompressor is None:
+        dictionary = _zstd_dictionary() if use_dict else None
+        if use_dict and dictionary is None:
+            raise RuntimeError("Body was packed with a dictionary but BODY_COMPRESSION_DICT_PATH is not set")
+
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        setattr(_local, key, decompressor)
+
+    return decompressor
+
+
+def reset_codecs() -> None:
+    """Drop cached contexts and dictionary after changing the settings."""
+    global _local, _dictionary
+
+    with _dictionary_lock:
+        _local = threading.local()
+        _dictionary = None
+
+
+def _codec() -> Optional[str]:
+    codec = settings.BODY_COMPRESSION
+
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, compressing with zlib")
+        return "zlib"
+
+    return codec if codec in ("zlib", "zstd") else None
+
+
+# ---------------------------------------------------
+# Encode / decode
+# ---------------------------------------------------
+def pack(text: str, force: bool = False) -> Optional[bytes]:
+    """
+    Packed bytes for `text`, or None when it should stay plain
+    (compression off, shorter than BODY_COMPRESSION_MIN_BYTES, or
+    not smaller once compressed). `force` skips both size checks.
+    """
+    codec = _codec()
+    if codec is None or text is None:
+        return None
+
+    data = text.encode("utf-8")
+    if len(data) < settings.BODY_COMPRESSION_MIN_BYTES and not force:
+        return None
+
+    if codec == "zstd":
+        use_dict = bool(settings.BODY_COMPRESSION_DICT_PATH)
+        header = CODEC_ZSTD_DICT if use_dict else CODEC_ZSTD
+        packed = bytes([header]) + _zstd_compressor(use_dict).compress(data)
+    else:
+        packed = bytes([CODEC_ZLIB]) + zlib.compress(data, settings.BODY_COMPRESSION_LEVEL)
+
+    # Incompressible bodies stay plain
+    if len(packed) >= len(data) and not force:
+        return None
+
+    return packed
+
+
+def unpack(blob: bytes) -> str:
+    codec, payload = blob[0], blob[1:]
+
+    if codec == CODEC_ZLIB:
+        data = zlib.decompress(payload)
+    elif codec in (CODEC_ZSTD, CODEC_ZSTD_DICT):
+        if zstandard is None:
+            raise RuntimeError("Body is zstd-compressed but zstandard is not installed")
+        data = _zstd_decompressor(codec == CODEC_ZSTD_DICT).decompress(payload)
+    else:
+        raise ValueError(f"Unknown body codec {codec:#x}")
+
+    return data.decode("utf-8")
+
+
+def unpack_text(text: Optional[str], blob: Optional[bytes]) -> Optional[str]:
+    """Body from a (plain column, packed column) pair selected directly."""
+    return unpack(blob) if blob is not None else text
+
+
+def train_dictionary(samples: List[str], size: int = 112 * 1024) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed")
+
+    return zstandard.train_dictionary(
+        size, [sample.encode("utf-8") for sample in samples]
+    ).as_bytes()
+
+
+# ---------------------------------------------------
+# Model attribute
+# ---------------------------------------------------
+def packed_text(text_attr: str, blob_attr: str) -> property:
+    """
+    Text property over a plain / packed column pair. Reads decode once
+    per loaded blob; writes pack according to the current settings.
+    """
+    cache_attr = f"_{blob_attr}_decoded"
+
+    def getter(self):
+        blob = getattr(self, blob_attr)
+        if blob is None:
+            return getattr(self, text_attr)
+
+        cached = self.__dict__.get(cache_attr)
+        if cached is None or cached[0] is not blob:
+            cached = (blob, unpack(blob))
+            self.__dict__[cache_attr] = cached
+
+        return cached[1]
+
+    def setter(self, value):
+        blob = pack(value)
+        setattr(self, blob_attr, blob)
+        setattr(self, text_attr, "" if blob is not None else value)
+
+        if blob is not None:
+            self.__dict__[cache_attr] = (blob, value)
+
+    return property(getter, setter)
@@ -0,0 +1,151 @@
+"""
+Dialect-specific full-text search schema.
+
+PostgreSQL: generated tsvector columns on conversations.raw_content and
+summaries.content, each with a GIN index.
+
+SQLite: external-content FTS5 tables kept in sync by triggers.
+
+Installed by migration 0010 (and `python -m app.manage install-fulltext`,
+which is idempotent, for databases created without Alembic).
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# to_tsvector fails once a document's lexemes exceed 1 MB,
+# so only the head of very large transcripts is indexed.
+FULLTEXT_MAX_CHARS = 1_000_000
+
+TEXT_SEARCH_CONFIG = "english"
+
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE conversations
+    ADD COLUMN IF NOT EXISTS raw_tsv tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('{TEXT_SEARCH_CONFIG}', left(coalesce(raw_content, ''), {FULLTEXT_MAX_CHARS}))
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_conversations_raw_tsv
+    ON conversations USING GIN (raw_tsv)
+    """,
+    f"""
+    ALTER TABLE summaries
+    ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('{TEXT_SEARCH_CONFIG}', left(coalesce(content, ''), {FULLTEXT_MAX_CHARS}))
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_summaries_content_tsv
+    ON summaries USING GIN (content_tsv)
+    """,
+]
+
+
+def _sqlite_fts_ddl(table: str, column: str) -> list:
+    fts = f"{table}_fts"
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5({column}, content='{table}', content_rowid='id')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+            INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column});
+        END
+        """,
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+SQLITE_DDL = (
+    _sqlite_fts_ddl("conversations", "raw_content")
+    + _sqlite_fts_ddl("summaries", "content")
+)
+
+
+# Objects created here but not in the ORM metadata: Alembic autogenerate
+# must not propose dropping them (see migrations/env.py)
+FULLTEXT_TABLE_PREFIXES = ("conversations_fts", "summaries_fts")  # + FTS5 shadow tables
+FULLTEXT_COLUMNS = {"raw_tsv", "content_tsv"}
+FULLTEXT_INDEXES = {"ix_conversations_raw_tsv", "ix_summaries_content_tsv"}
+
+
+def is_fulltext_object(name: str, type_: str) -> bool:
+    if type_ == "table":
+        return name.startswith(FULLTEXT_TABLE_PREFIXES)
+    if type_ == "column":
+        return name in FULLTEXT_COLUMNS
+    if type_ == "index":
+        return name in FULLTEXT_INDEXES
+    return False
+
+
+def install_fulltext(connection: Connection) -> bool:
+    """
+    Create the full-text objects for the connected dialect.
+    Idempotent. Returns False when the dialect is not supported.
+    """
+    dialect = connection.dialect.name
+
+    if dialect == "postgresql":
+        statements = POSTGRES_DDL
+    elif dialect == "sqlite":
+        statements = SQLITE_DDL
+    else:
+        return False
+
+    for statement in statements:
+        connection.execute(text(statement))
+
+    return True
+
+
+POSTGRES_DROP_DDL = [
+    "DROP INDEX IF EXISTS ix_summaries_content_tsv",
+    "ALTER TABLE summaries DROP COLUMN IF EXISTS content_tsv",
+    "DROP INDEX IF EXISTS ix_conversations_raw_tsv",
+    "ALTER TABLE conversations DROP COLUMN IF EXISTS raw_tsv",
+]
+
+SQLITE_DROP_DDL = [
+    statement
+    for fts in ("conversations_fts", "summaries_fts")
+    for statement in (
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TABLE IF EXISTS {fts}",
+    )
+]
+
+
+def uninstall_fulltext(connection: Connection) -> bool:
+    """Drop the full-text objects (migration downgrade). Idempotent."""
+    dialect = connection.dialect.name
+
+    if dialect == "postgresql":
+        statements = POSTGRES_DROP_DDL
+    elif dialect == "sqlite":
+        statements = SQLITE_DROP_DDL
+    else:
+        return False
+
+    for statement in statements:
+        connection.execute(text(statement))
+
+    return True
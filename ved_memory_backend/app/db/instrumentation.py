@@ -0,0 +1,86 @@
+"""
+Counts the rows and bytes the ORM materializes while tracking is on.
+
+    with track_fetches() as stats:
+        ...
+    stats.rows, stats.bytes, stats.by_table
+
+Entity loads and later deferred / expired attribute loads are counted;
+column-only queries (select(Model.col)) are not, since they never build
+entities. Tracking is per context (contextvars), so it follows a
+request through the threadpool and run_sync. Trackers nest.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect
+
+from app.db.session import Base
+
+
+@dataclass
+class FetchStats:
+    rows: int = 0
+    bytes: int = 0
+    by_table: Counter = field(default_factory=Counter)
+
+
+_current: ContextVar[Optional[FetchStats]] = ContextVar("fetch_stats", default=None)
+
+
+@contextmanager
+def track_fetches():
+    """
+    Nests: an inner tracker (e.g. the profiling middleware's per-request
+    one) adds its counts to the enclosing tracker when it exits.
+    """
+    parent = _current.get()
+    stats = FetchStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.rows += stats.rows
+            parent.bytes += stats.bytes
+            parent.by_table.update(stats.by_table)
+
+
+def _size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return 8
+
+
+def _record(target, keys: Iterable[str], new_row: bool) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+
+    state = inspect(target)
+    column_keys = state.mapper.column_attrs.keys()
+    size = sum(_size(state.dict.get(key)) for key in keys if key in column_keys)
+
+    if new_row:
+        stats.rows += 1
+    stats.bytes += size
+    stats.by_table[state.mapper.local_table.name] += size
+
+
+@event.listens_for(Base, "load", propagate=True)
+def _on_load(target, context):
+    _record(target, inspect(target).dict.keys(), new_row=True)
+
+
+@event.listens_for(Base, "refresh", propagate=True)
+def _on_refresh(target, context, attrs):
+    # Deferred columns and attributes expired by commit
+    _record(target, attrs or inspect(target).dict.keys(), new_row=False)
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Counters for one connection pool (thread-safe)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def record(self, waited: float, overflowed: bool) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.overflow_events += int(overflowed)
+
+    def record_timeout(self) -> None:
+        with self.lock:
+            self.timeouts += 1
+
+
+class InstrumentedPoolMixin:
+    """
+    Times every checkout (queue wait + connect + pre-ping) and counts
+    checkouts that had to open an overflow connection.
+    """
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        overflow_before = self.overflow()
+        start = time.perf_counter()
+
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+
+        overflow_after = self.overflow()
+        self.metrics.record(
+            time.perf_counter() - start,
+            overflow_after > 0 and overflow_after > overflow_before,
+        )
+
+        return connection
+
+    def stats(self) -> Dict:
+        m = self.metrics
+        with m.lock:
+            return {
+                "pool_size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": max(0, self.overflow()),
+                "checkouts_total": m.checkouts,
+                "wait_seconds_total": round(m.wait_seconds_total, 6),
+                "wait_seconds_max": round(m.wait_seconds_max, 6),
+                "overflow_events_total": m.overflow_events,
+                "timeouts_total": m.timeouts,
+            }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
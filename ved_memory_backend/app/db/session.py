@@ -1,13 +1,45 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+
+# --------------------------------
+# Engine options (pool, timeouts)
+# --------------------------------
+def engine_options(url: str, is_async: bool = False) -> dict:
+    parsed = make_url(url)
+    options = {"echo": settings.DB_ECHO}
+
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite keeps its single-connection pool
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+    if parsed.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
 
 
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=True,  # shows SQL logs (good for development)
+    **engine_options(settings.DATABASE_URL),
 )
 
 
@@ -21,3 +53,51 @@ SessionLocal = sessionmaker(
 
 # Base class for all models
 Base = declarative_base()
+
+
+# --------------------------------
+# Async engine (DB_ASYNC=true only)
+# --------------------------------
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+
+    url = make_url(settings.DATABASE_URL)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(),
+        **engine_options(async_database_url(), is_async=True),
+    )
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def pool_stats() -> dict:
+    """Checkout / wait / overflow counters for each engine's pool."""
+    stats = {}
+
+    for name, eng in (("sync", engine), ("async", async_engine and async_engine.sync_engine)):
+        if eng is not None and hasattr(eng.pool, "stats"):
+            stats[name] = eng.pool.stats()
+
+    return stats
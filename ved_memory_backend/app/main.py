@@ -1,6 +1,11 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 
+from app.api.profiling import ProfilingMiddleware
 from app.api.routes.auth import router as auth_router
 from app.api.routes.conversations import router as conversations_router
 from app.api.routes.conversations_list import router as conversations_list_router
@@ -9,9 +14,54 @@ from app.api.routes.resume import router as resume_router
 from app.api.routes.users import router as users_router
 from app.api.routes.projects import router as projects_router
 from app.api.routes.memory import router as memory_router
+from app.api.routes.metrics import router as metrics_router
+from app.api.routes.jobs import router as jobs_router
+from app.core.config import settings
+from app.core.security import PasswordHashBusy, shutdown_hash_pool
+from app.services.jobs import JobQueueFull, start_workers, stop_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background job workers (indexing, passages, embeddings)
+    start_workers()
+    yield
+    stop_workers()
+    shutdown_hash_pool()
+
 
+app = FastAPI(title="Ved Memory", lifespan=lifespan)
 
-app = FastAPI(title="Ved Memory")
+
+# --------------------------
+# Response Compression
+# --------------------------
+if settings.RESPONSE_COMPRESSION == "gzip":
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+        compresslevel=settings.RESPONSE_COMPRESSION_LEVEL,
+    )
+
+# --------------------------
+# Backpressure
+# --------------------------
+@app.exception_handler(JobQueueFull)
+async def job_queue_full(request: Request, exc: JobQueueFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too much background work queued, retry later"},
+        headers={"Retry-After": "30"},
+    )
+
+
+@app.exception_handler(PasswordHashBusy)
+async def password_hash_busy(request: Request, exc: PasswordHashBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins in progress, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 # --------------------------
 # CORS Configuration
@@ -22,8 +72,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],   # read by the dashboard / popup caches
 )
 
+# --------------------------
+# Request Profiling (outermost: times the whole stack)
+# --------------------------
+app.add_middleware(ProfilingMiddleware)
+
 # --------------------------
 # Router Registration
 # --------------------------
@@ -35,3 +91,5 @@ app.include_router(conversations_list_router)
 app.include_router(summaries_router)
 app.include_router(resume_router)
 app.include_router(memory_router)
+app.include_router(metrics_router)
+app.include_router(jobs_router)
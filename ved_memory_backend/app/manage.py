@@ -0,0 +1,247 @@
+"""
+Maintenance commands.
+
+Usage:
+    python -m app.manage reindex [--project-id ID]
+    python -m app.manage install-fulltext
+    python -m app.manage embed [--project-id ID]
+    python -m app.manage compress
+    python -m app.manage train-dict --output PATH [--samples N] [--size BYTES]
+    python -m app.manage run-jobs [--workers N] [--once]
+    python -m app.manage purge-jobs [--days N]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import undefer_group
+
+from app.core.config import settings
+from app.db.codec import train_dictionary
+from app.db.fulltext import install_fulltext
+from app.db.session import SessionLocal, engine
+from app.models.conversation import Conversation
+from app.models.project import Project
+from app.models.summary import Summary
+from app.services import job_handlers  # noqa: F401  (registers the handlers)
+from app.services.embeddings import embed_field
+from app.services.jobs import drain, purge_finished, start_workers, stop_workers
+from app.services.passages import store_passages
+from app.services.search_index import rebuild_project_index
+
+
+def reindex(project_id: int = None) -> None:
+    db = SessionLocal()
+    try:
+        query = db.query(Project.id)
+        if project_id is not None:
+            query = query.filter(Project.id == project_id)
+
+        for (pid,) in query.all():
+            indexed = rebuild_project_index(db, pid)
+
+            for conversation in (
+                db.query(Conversation)
+                .options(undefer_group("body"))
+                .filter(Conversation.project_id == pid)
+                .yield_per(200)
+            ):
+                store_passages(db, conversation)
+            db.commit()
+
+            print(f"project {pid}: indexed {indexed} conversations")
+    finally:
+        db.close()
+
+
+def fulltext() -> None:
+    with engine.begin() as connection:
+        installed = install_fulltext(connection)
+
+    if installed:
+        print(f"full-text search installed for {engine.dialect.name}")
+    else:
+        print(f"no full-text support for {engine.dialect.name}")
+
+
+def embed(project_id: int = None) -> None:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Conversation, Summary)
+            .options(undefer_group("body"))
+            .outerjoin(Summary, Summary.conversation_id == Conversation.id)
+        )
+        if project_id is not None:
+            rows = rows.filter(Conversation.project_id == project_id)
+
+        embedded = 0
+        for conversation, summary in rows.yield_per(100):
+            embed_field(conversation.project_id, conversation.id, "raw", conversation.raw_content)
+            if summary is not None:
+                embed_field(conversation.project_id, conversation.id, "summary", summary.content)
+            embedded += 1
+
+        print(f"embedded {embedded} conversations")
+    finally:
+        db.close()
+
+
+def _stored_size(text, blob) -> int:
+    return len(blob) if blob is not None else len((text or "").encode("utf-8"))
+
+
+def compress(batch_size: int = 200) -> None:
+    """Repack every body with the current BODY_COMPRESSION settings."""
+    db = SessionLocal()
+    try:
+        for model, text_attr, blob_attr, attr in (
+            (Conversation, "raw_text", "raw_packed", "raw_content"),
+            (Summary, "content_text", "content_packed", "content"),
+        ):
+            before = after = rows = 0
+            last_id = 0
+
+            while True:
+                batch = (
+                    db.query(model)
+                    .options(undefer_group("body"))
+                    .filter(model.id > last_id)
+                    .order_by(model.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not batch:
+                    break
+
+                for row in batch:
+                    before += _stored_size(getattr(row, text_attr), getattr(row, blob_attr))
+                    setattr(row, attr, getattr(row, attr))
+                    after += _stored_size(getattr(row, text_attr), getattr(row, blob_attr))
+                    rows += 1
+
+                last_id = batch[-1].id
+                db.commit()
+                db.expunge_all()
+
+            if not before:
+                print(f"{model.__tablename__}: nothing to compress")
+                continue
+
+            saved = before - after
+            print(
+                f"{model.__tablename__}: {rows} rows, {before} -> {after} bytes "
+                f"({saved} saved, {saved / before:.1%})"
+            )
+    finally:
+        db.close()
+
+
+def train_dict(output: str, samples: int, size: int) -> None:
+    db = SessionLocal()
+    try:
+        bodies = [
+            conversation.raw_content
+            for conversation in (
+                db.query(Conversation)
+                .options(undefer_group("body"))
+                .order_by(Conversation.id.desc())
+                .limit(samples)
+            )
+        ]
+    finally:
+        db.close()
+
+    dictionary = train_dictionary(bodies, size)
+    with open(output, "wb") as f:
+        f.write(dictionary)
+
+    print(f"trained {len(dictionary)} byte dictionary on {len(bodies)} conversations")
+    print(f"set BODY_COMPRESSION_DICT_PATH={output} and run `compress`")
+
+
+def run_jobs(workers: int, once: bool) -> None:
+    """Job workers outside the API process (set JOBS_WORKERS=0 there)."""
+    if once:
+        print(f"ran {drain()} jobs")
+        return
+
+    start_workers(workers)
+    print(f"{workers} job workers running, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        stop_workers()
+
+
+def purge_jobs(days: int) -> None:
+    db = SessionLocal()
+    try:
+        purged = purge_finished(db, datetime.utcnow() - timedelta(days=days))
+    finally:
+        db.close()
+
+    print(f"purged {purged} finished jobs older than {days} days")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reindex_cmd = commands.add_parser(
+        "reindex", help="Rebuild the memory search index"
+    )
+    reindex_cmd.add_argument("--project-id", type=int, default=None)
+
+    commands.add_parser(
+        "install-fulltext", help="Create database full-text search objects"
+    )
+
+    embed_cmd = commands.add_parser(
+        "embed", help="Embed conversations for semantic search"
+    )
+    embed_cmd.add_argument("--project-id", type=int, default=None)
+
+    commands.add_parser(
+        "compress", help="Repack stored bodies with the current compression settings"
+    )
+
+    dict_cmd = commands.add_parser(
+        "train-dict", help="Train a zstd dictionary on stored conversations"
+    )
+    dict_cmd.add_argument("--output", required=True)
+    dict_cmd.add_argument("--samples", type=int, default=2000)
+    dict_cmd.add_argument("--size", type=int, default=112 * 1024)
+
+    jobs_cmd = commands.add_parser(
+        "run-jobs", help="Run background jobs (indexing, embeddings)"
+    )
+    jobs_cmd.add_argument("--workers", type=int, default=2)
+    jobs_cmd.add_argument("--once", action="store_true", help="Run queued jobs, then exit")
+
+    purge_cmd = commands.add_parser(
+        "purge-jobs", help="Delete finished jobs older than the retention period"
+    )
+    purge_cmd.add_argument("--days", type=int, default=settings.JOBS_RETENTION_DAYS)
+
+    args = parser.parse_args()
+
+    if args.command == "reindex":
+        reindex(args.project_id)
+    elif args.command == "install-fulltext":
+        fulltext()
+    elif args.command == "embed":
+        embed(args.project_id)
+    elif args.command == "compress":
+        compress()
+    elif args.command == "train-dict":
+        train_dict(args.output, args.samples, args.size)
+    elif args.command == "run-jobs":
+        run_jobs(args.workers, args.once)
+    elif args.command == "purge-jobs":
+        purge_jobs(args.days)
+
+
+if __name__ == "__main__":
+    main()
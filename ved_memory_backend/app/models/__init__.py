@@ -2,3 +2,12 @@ from .user import User
 from .project import Project
 from .conversation import Conversation
 from .summary import Summary
+from .passage import ConversationPassage
+from .job import Job
+from .refresh_token import RefreshToken
+from .search_index import (
+    SearchDocument,
+    SearchPosting,
+    SearchTermStat,
+    SearchCorpusStat,
+)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, ForeignKey, DateTime, Index
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
+from app.db.codec import packed_text
 from app.db.session import Base
 
 
@@ -9,8 +10,19 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, index=True)
-    raw_content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Body is plain in raw_text or compressed in raw_packed (app.db.codec);
+    # always read and write it through `raw_content`. Both columns are
+    # deferred: queries that need the body use undefer_group("body").
+    raw_text = deferred(Column("raw_content", Text, nullable=False, default=""), group="body")
+    raw_packed = deferred(Column("raw_content_packed", LargeBinary, nullable=True), group="body")
+    raw_content = packed_text("raw_text", "raw_packed")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Ingest dedup (see app.services.ingest): client chat key,
+    # sha256 of raw_content, sha256 of the first turn
+    conversation_key = Column(String(255), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    head_hash = Column(String(64), nullable=True)
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -18,3 +30,13 @@ class Conversation(Base):
     user = relationship("User")
     project = relationship("Project", back_populates="conversations")
     summary = relationship("Summary", back_populates="conversation", uselist=False)
+
+    # Hot query shapes: per-project recency (memory, listing) and
+    # per-user recency (resume, listing without a project filter)
+    __table_args__ = (
+        Index("ix_conversations_user_project_created", "user_id", "project_id", "created_at"),
+        Index("ix_conversations_user_created", "user_id", "created_at"),
+        Index("ux_conversations_user_project_key", "user_id", "project_id", "conversation_key", unique=True),
+        Index("ix_conversations_user_project_content_hash", "user_id", "project_id", "content_hash"),
+        Index("ix_conversations_user_project_head_hash", "user_id", "project_id", "head_hash"),
+    )
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
+from datetime import datetime
+
+from app.db.session import Base
+
+
+class Job(Base):
+    """
+    Durable background job (see app.services.jobs).
+
+    status: queued -> running -> succeeded | failed
+    (running -> queued again on a retryable error).
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # canonical JSON
+
+    status = Column(String(16), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String(64), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    idempotency_key = Column(String(255), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Claim query: next runnable job
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # Coalescing: queued job of the same kind and payload
+        Index("ix_jobs_kind_status", "kind", "status"),
+        # Retention: finished jobs past JOBS_RETENTION_DAYS
+        Index("ix_jobs_status_finished_at", "status", "finished_at"),
+        Index("ux_jobs_idempotency_key", "idempotency_key", unique=True),
+    )
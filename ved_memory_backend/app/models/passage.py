@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+
+from app.db.session import Base
+
+
+class ConversationPassage(Base):
+    """
+    A span of a conversation's raw_content, cut on USER:/ASSISTANT:
+    turn boundaries at ingest. Offsets index into raw_content.
+    """
+
+    __tablename__ = "conversation_passages"
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+
+    position = Column(Integer, nullable=False)
+    role = Column(String(16), nullable=True)
+    start_offset = Column(Integer, nullable=False)
+    end_offset = Column(Integer, nullable=False)
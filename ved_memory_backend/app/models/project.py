@@ -11,6 +11,8 @@ class Project(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped by every write to the project's data (see app.services.revisions)
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+
+from app.db.session import Base
+
+
+class RefreshToken(Base):
+    """
+    A refresh token that can still be exchanged at /auth/refresh.
+
+    The token itself is a JWT carrying `jti`; the row is what makes it
+    usable. Rotation, logout and password changes delete rows.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
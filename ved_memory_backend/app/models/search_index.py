@@ -0,0 +1,72 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+
+from app.db.session import Base
+
+
+class SearchDocument(Base):
+    """
+    One row per indexed conversation.
+
+    Carries the columns retrieval needs for ranking (project, recency)
+    so scoring never has to touch the conversations table.
+    """
+
+    __tablename__ = "search_documents"
+
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False)
+
+    raw_length = Column(Integer, nullable=False, default=0)
+    summary_length = Column(Integer, nullable=False, default=0)
+
+    # Set whenever the postings change (in-memory snapshots diff on it)
+    indexed_at = Column(DateTime, nullable=True)
+
+
+class SearchPosting(Base):
+    """
+    Inverted index entry: how often `term` occurs in one field
+    ("raw" or "summary") of one conversation.
+    """
+
+    __tablename__ = "search_postings"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    term = Column(String(64), nullable=False)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
+    field = Column(String(16), nullable=False)
+    tf = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_postings_project_term", "project_id", "term"),
+    )
+
+
+class SearchTermStat(Base):
+    """
+    Document frequency of a term within one field of a project.
+    Maintained incrementally alongside the postings.
+    """
+
+    __tablename__ = "search_term_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    field = Column(String(16), primary_key=True)
+    term = Column(String(64), primary_key=True)
+    df = Column(Integer, nullable=False, default=0)
+
+
+class SearchCorpusStat(Base):
+    """
+    Per-project, per-field corpus totals used for length normalization
+    (document count and total token length).
+    """
+
+    __tablename__ = "search_corpus_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    field = Column(String(16), primary_key=True)
+    doc_count = Column(Integer, nullable=False, default=0)
+    total_length = Column(Integer, nullable=False, default=0)
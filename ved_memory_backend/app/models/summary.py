@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Text, LargeBinary, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
+from app.db.codec import packed_text
 from app.db.session import Base
 
 
@@ -11,8 +12,17 @@ class Summary(Base):
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
 
-    content = Column(Text, nullable=False)
+    # Plain in content_text, or compressed in content_packed above
+    # BODY_COMPRESSION_MIN_BYTES; read and write through `content`
+    content_text = Column("content", Text, nullable=False, default="")
+    content_packed = Column("content_packed", LargeBinary, nullable=True)
+    content = packed_text("content_text", "content_packed")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     conversation = relationship("Conversation", back_populates="summary")
+
+    # One summary per conversation (the relationship is uselist=False)
+    __table_args__ = (
+        Index("ux_summaries_conversation_id", "conversation_id", unique=True),
+    )
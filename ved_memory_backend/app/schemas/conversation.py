@@ -1,10 +1,54 @@
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
 class ConversationCreate(BaseModel):
     raw_content: str
     project_id: int
+    # Stable client-side chat id (e.g. from the chat URL); repeated
+    # saves of the same chat update one conversation
+    conversation_key: Optional[str] = Field(None, max_length=255)
+
+
+class BulkConversationItem(ConversationCreate):
+    # Original timestamp from an export; defaults to now
+    created_at: Optional[datetime] = None
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "duplicate", "error"]
+    error: Optional[str] = None
+
+
+class BulkIngestResult(BaseModel):
+    received: int
+    created: int
+    duplicates: int
+    errors: int
+    elapsed_ms: float
+    per_second: float  # conversations received per second
+    index_job_ids: List[int] = []  # GET /jobs/{id}; one per inserted batch
+    items: List[BulkItemResult]
+
+
+class ConversationAppend(BaseModel):
+    base_hash: str  # content_hash the client last received
+    content: str    # text to append, separators included
+
+
+class ConversationSaveResult(BaseModel):
+    id: int
+    created_at: datetime
+    user_id: int
+    project_id: int
+    conversation_key: Optional[str]
+    content_hash: str
+    content_length: int
+    status: Literal["created", "duplicate", "appended", "replaced"]
+    index_job_id: Optional[int] = None  # GET /jobs/{id}; None for duplicates
 
 
 class ConversationOut(BaseModel):
@@ -16,3 +60,16 @@ class ConversationOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ConversationListItem(BaseModel):
+    id: int
+    project_id: int
+    created_at: datetime
+    has_summary: bool
+    summary_updated_at: Optional[datetime]
+
+
+class ConversationPage(BaseModel):
+    items: List[ConversationListItem]
+    next_cursor: Optional[str]  # pass back as ?cursor= for the next page
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str   # queued | running | succeeded | failed
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -1,19 +1,56 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 
 
-class MemoryContextRequest(BaseModel):
+class MemoryContextOptions(BaseModel):
+    # None uses the server default (MEMORY_DEFAULT_SCORER)
+    scorer: Optional[Literal["legacy", "bm25", "fulltext"]] = None
+    # semantic / hybrid require SEMANTIC_SEARCH_ENABLED
+    mode: Literal["keyword", "semantic", "hybrid"] = "keyword"
+
+    # Passage selection
+    neighbors: int = Field(1, ge=0, le=5)
+    max_chars: Optional[int] = Field(None, gt=0)
+    max_tokens: Optional[int] = Field(None, gt=0)  # ~4 chars per token
+    include_raw: bool = False
+
+    # Conversations returned; None uses MEMORY_CONTEXT_LIMIT
+    limit: Optional[int] = Field(None, gt=0)
+
+
+class MemoryContextRequest(MemoryContextOptions):
     project_id: int
     query: str
 
 
+class MemoryLookup(BaseModel):
+    # "*" searches every project of the user
+    project_id: Union[int, Literal["*"]]
+    query: str
+
+
+class MemoryContextBatchRequest(MemoryContextOptions):
+    lookups: List[MemoryLookup] = Field(..., min_length=1)
+
+
+class MemoryPassage(BaseModel):
+    position: int
+    role: Optional[str]
+    start: int  # offsets into the parent conversation's raw_content
+    end: int
+    text: str
+    score: float
+    matched: bool  # False for neighbor context
+
+
 class MemoryBlock(BaseModel):
     conversation_id: int
     score: float
-    raw_content: str
+    raw_content: Optional[str] = None  # only with include_raw
     summary: Optional[str]
     created_at: datetime
+    passages: List[MemoryPassage] = []
 
 
 class MemoryContextResponse(BaseModel):
@@ -22,3 +59,12 @@ class MemoryContextResponse(BaseModel):
     total_scanned: int
     context_blocks: List[MemoryBlock]
 
+
+
+class MemoryBatchResult(MemoryContextResponse):
+    index: int  # position of the lookup in the request
+    error: Optional[str] = None
+
+
+class MemoryContextBatchResponse(BaseModel):
+    results: List[MemoryBatchResult]
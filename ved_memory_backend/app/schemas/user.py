@@ -16,6 +16,20 @@ class UserLogin(BaseModel):
     password: str
 
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
+class Logout(BaseModel):
+    refresh_token: str
+    everywhere: bool = False  # revoke all of the user's refresh tokens
+
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+
 # =========================
 # Response Schemas
 # =========================
@@ -23,6 +37,7 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class ResumeModeUpdate(BaseModel):
@@ -0,0 +1,148 @@
+import logging
+import threading
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import undefer_group
+
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.summary import Summary
+from app.services.passages import segment
+from app.services.search_index import content_terms, tokenize
+from app.services.vector_store import chunk_key, open_project_store
+
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------
+# Embedders
+# ---------------------------------------------------
+class HashingEmbedder:
+    """
+    Offline fallback: signed feature hashing of unigrams and bigrams
+    (log-scaled counts), L2-normalized. Deterministic across processes.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            terms = content_terms(tokenize(text))
+            features = Counter(terms)
+            features.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+
+            for feature, count in features.items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.dim] += sign * (1.0 + np.log(count))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class SentenceTransformerEmbedder:
+    """Small CPU-only local model (sentence-transformers, optional)."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=32,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    global _embedder
+
+    with _embedder_lock:
+        if _embedder is None:
+            if settings.EMBEDDING_BACKEND == "sentence-transformers":
+                try:
+                    _embedder = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL)
+                except Exception as exc:
+                    logger.warning("Local embedding model unavailable, using hashing: %s", exc)
+                    _embedder = HashingEmbedder()
+            else:
+                _embedder = HashingEmbedder()
+
+        return _embedder
+
+
+# ---------------------------------------------------
+# Indexing (run by the conversation.index / summary.index jobs)
+# ---------------------------------------------------
+def embed_field(project_id: int, conversation_id: int, field: str, text: str) -> int:
+    """
+    Embed a field's chunks. Chunks already stored with the same span
+    and text (e.g. the unchanged start of an appended conversation)
+    keep their vectors; only new or edited chunks are embedded.
+    """
+    embedder = get_embedder()
+    text = text or ""
+    chunks = [chunk_key(text, span.start, span.end) for span in segment(text)]
+
+    with open_project_store(project_id, embedder.dim, embedder.name) as store:
+        while True:
+            stored = store.stored_chunks(conversation_id, field)
+            missing = [key for key in chunks if key not in stored]
+            vectors = embedder.embed([text[start:end] for start, end, _ in missing]) if missing else []
+
+            if store.replace(conversation_id, field, chunks, dict(zip(missing, vectors))):
+                break
+
+        store.maybe_train()
+
+    return len(chunks)
+
+
+def embed_conversation(db, conversation_id: int, field: str) -> None:
+    conversation = db.get(Conversation, conversation_id, options=[undefer_group("body")])
+    if not conversation:
+        return
+
+    if field == "raw":
+        text = conversation.raw_content
+    else:
+        summary = (
+            db.query(Summary)
+            .filter(Summary.conversation_id == conversation_id)
+            .first()
+        )
+        text = summary.content if summary else ""
+
+    embed_field(conversation.project_id, conversation_id, field, text)
+
+
+# ---------------------------------------------------
+# Retrieval
+# ---------------------------------------------------
+def semantic_search(project_id: int, query: str, k: int) -> List[Tuple[int, int, int, int, float]]:
+    embedder = get_embedder()
+    query_vector = embedder.embed([query])[0]
+
+    with open_project_store(project_id, embedder.dim, embedder.name) as store:
+        return store.search(query_vector, k)
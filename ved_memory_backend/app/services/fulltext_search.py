@@ -0,0 +1,142 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+from app.db.fulltext import TEXT_SEARCH_CONFIG
+
+
+class FullTextUnavailable(Exception):
+    """Raised when the database has no usable full-text objects."""
+
+
+# ---------------------------------------------------
+# Ranked queries (only top-k ids and scores are returned)
+# ---------------------------------------------------
+POSTGRES_SEARCH = f"""
+WITH q AS (
+    SELECT replace(
+        plainto_tsquery('{TEXT_SEARCH_CONFIG}', :query)::text, '&', '|'
+    )::tsquery AS query
+),
+hits AS (
+    SELECT c.id AS conversation_id,
+           ts_rank(c.raw_tsv, q.query) * :raw_weight AS score
+    FROM conversations c, q
+    WHERE c.project_id = :project_id
+      AND c.user_id = :user_id
+      AND c.raw_tsv @@ q.query
+    UNION ALL
+    SELECT s.conversation_id,
+           ts_rank(s.content_tsv, q.query) * :summary_weight AS score
+    FROM summaries s
+    JOIN conversations sc ON sc.id = s.conversation_id, q
+    WHERE sc.project_id = :project_id
+      AND sc.user_id = :user_id
+      AND s.content_tsv @@ q.query
+)
+SELECT c.id AS conversation_id,
+       SUM(h.score) AS score,
+       c.created_at AS created_at,
+       COUNT(*) OVER () AS total
+FROM hits h
+JOIN conversations c ON c.id = h.conversation_id
+WHERE c.project_id = :project_id
+  AND c.user_id = :user_id
+GROUP BY c.id, c.created_at
+ORDER BY score DESC, c.created_at DESC
+LIMIT :limit
+"""
+
+SQLITE_SEARCH = """
+WITH hits AS (
+    SELECT rowid AS conversation_id,
+           -bm25(conversations_fts) * :raw_weight AS score
+    FROM conversations_fts
+    WHERE conversations_fts MATCH :query
+    UNION ALL
+    SELECT s.conversation_id,
+           -bm25(summaries_fts) * :summary_weight AS score
+    FROM summaries_fts
+    JOIN summaries s ON s.id = summaries_fts.rowid
+    WHERE summaries_fts MATCH :query
+)
+SELECT c.id AS conversation_id,
+       SUM(h.score) AS score,
+       c.created_at AS created_at,
+       COUNT(*) OVER () AS total
+FROM hits h
+JOIN conversations c ON c.id = h.conversation_id
+WHERE c.project_id = :project_id
+  AND c.user_id = :user_id
+GROUP BY c.id, c.created_at
+ORDER BY score DESC, c.created_at DESC
+LIMIT :limit
+"""
+
+
+def _fts5_match(terms: List[str]) -> str:
+    # Quote every term so FTS5 operators in user input are inert
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_fulltext(
+    db: Session,
+    project_id: int,
+    user_id: int,
+    query: str,
+    terms: List[str],
+    weights: Dict[str, float],
+    limit: int,
+) -> Tuple[List[Dict], int]:
+    """
+    Rank a project's conversations inside the database.
+
+    Returns (top-k [{conversation_id, score, created_at}], total_matches).
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        sql, match = POSTGRES_SEARCH, query
+    elif dialect == "sqlite":
+        if not terms:
+            return [], 0
+        sql, match = SQLITE_SEARCH, _fts5_match(terms)
+    else:
+        raise FullTextUnavailable(f"No full-text backend for {dialect}")
+
+    statement = text(sql).columns(
+        conversation_id=Integer,
+        score=Float,
+        created_at=DateTime,
+        total=Integer,
+    )
+
+    try:
+        # Savepoint keeps a failed lookup from aborting the outer transaction
+        with db.begin_nested():
+            rows = db.execute(
+                statement,
+                {
+                    "query": match,
+                    "project_id": project_id,
+                    "user_id": user_id,
+                    "raw_weight": weights["raw"],
+                    "summary_weight": weights["summary"],
+                    "limit": limit,
+                },
+            ).all()
+    except (OperationalError, ProgrammingError) as exc:
+        raise FullTextUnavailable(str(exc)) from exc
+
+    total = rows[0].total if rows else 0
+
+    return [
+        {
+            "conversation_id": row.conversation_id,
+            "score": round(row.score, 4),
+            "created_at": row.created_at,
+        }
+        for row in rows
+    ], total
@@ -0,0 +1,304 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.codec import pack
+from app.models.conversation import Conversation
+from app.models.project import Project
+from app.schemas.conversation import BulkConversationItem
+from app.services.job_handlers import enqueue_conversation_index_batch
+from app.services.revisions import touch_projects
+from app.services.passages import segment
+
+
+# Outcomes reported back to the client
+CREATED = "created"
+DUPLICATE = "duplicate"
+APPENDED = "appended"
+REPLACED = "replaced"
+ERROR = "error"
+
+
+class BaseHashMismatch(Exception):
+    """The client's view of the conversation is stale (append rejected)."""
+
+
+# ---------------------------------------------------
+# Hashing
+# ---------------------------------------------------
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def head_hash(text: str) -> Optional[str]:
+    """
+    Hash of the first turn, stripped, so a growing chat keeps the same
+    head hash across saves. Used to find the chat without a client key.
+    """
+    spans = segment(text)
+    if not spans:
+        return None
+    return content_hash(text[spans[0].start:spans[0].end].strip())
+
+
+def set_hashes(conversation: Conversation) -> None:
+    conversation.content_hash = content_hash(conversation.raw_content)
+    conversation.head_hash = head_hash(conversation.raw_content)
+
+
+def is_prefix_of(conversation: Conversation, text: str) -> bool:
+    length = len(conversation.raw_content)
+    return len(text) >= length and content_hash(text[:length]) == conversation.content_hash
+
+
+# ---------------------------------------------------
+# Matching an incoming save to a stored conversation
+# ---------------------------------------------------
+def find_existing(
+    db: Session,
+    user_id: int,
+    project_id: int,
+    raw_content: str,
+    conversation_key: Optional[str],
+) -> Tuple[Optional[Conversation], Optional[str]]:
+    """
+    Returns (conversation, outcome) for a save that matches a stored
+    conversation, or (None, None) for a new one:
+
+    - same content                  -> DUPLICATE
+    - keyed chat, content extended  -> APPENDED
+    - keyed chat, content rewritten -> REPLACED (edited / regenerated turns)
+    - unkeyed chat whose latest save is a prefix of the content -> APPENDED
+    """
+    scope = db.query(Conversation).filter(
+        Conversation.user_id == user_id,
+        Conversation.project_id == project_id,
+    )
+
+    digest = content_hash(raw_content)
+
+    if conversation_key:
+        existing = scope.filter(Conversation.conversation_key == conversation_key).first()
+        if existing:
+            if existing.content_hash == digest:
+                return existing, DUPLICATE
+            if is_prefix_of(existing, raw_content):
+                return existing, APPENDED
+            return existing, REPLACED
+
+    duplicate = scope.filter(Conversation.content_hash == digest).first()
+    if duplicate:
+        return duplicate, DUPLICATE
+
+    if conversation_key:
+        return None, None
+
+    head = head_hash(raw_content)
+    if head is None:
+        return None, None
+
+    for candidate in (
+        scope.filter(
+            Conversation.head_hash == head,
+            Conversation.conversation_key.is_(None),
+        )
+        .order_by(Conversation.created_at.desc())
+        .limit(5)
+    ):
+        if is_prefix_of(candidate, raw_content):
+            return candidate, APPENDED
+
+    return None, None
+
+
+def append_content(conversation: Conversation, base_hash: str, content: str) -> None:
+    """Append a delta to a conversation the client last saw as `base_hash`."""
+    if base_hash != conversation.content_hash:
+        raise BaseHashMismatch(conversation.content_hash)
+
+    conversation.raw_content = conversation.raw_content + content
+    set_hashes(conversation)
+
+
+# ---------------------------------------------------
+# Bulk import
+# ---------------------------------------------------
+def owned_project_ids(db: Session, user_id: int, project_ids: Iterable[int]) -> Set[int]:
+    return set(db.scalars(
+        select(Project.id).where(
+            Project.user_id == user_id,
+            Project.id.in_(set(project_ids)),
+        )
+    ))
+
+
+def _key_conflict(db: Session, user_id: int, index: int, row: Dict) -> Dict:
+    """Result for a row whose conversation_key was inserted concurrently."""
+    existing = db.execute(
+        select(Conversation.id, Conversation.content_hash).where(
+            Conversation.user_id == user_id,
+            Conversation.project_id == row["project_id"],
+            Conversation.conversation_key == row["conversation_key"],
+        )
+    ).first()
+
+    if existing is not None and existing.content_hash == row["content_hash"]:
+        return {"index": index, "id": existing.id, "status": DUPLICATE}
+
+    return {
+        "index": index,
+        "status": ERROR,
+        "error": "conversation_key already exists with different content, use /conversations/save",
+    }
+
+
+def insert_batch(
+    db: Session,
+    user_id: int,
+    items: List[Tuple[int, BulkConversationItem]],
+    owned: Set[int],
+) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Insert one batch of import items in a single multi-row INSERT and
+    commit, together with one job indexing the new rows. Exact duplicates
+    (same content in the project) resolve to the existing id instead of
+    a new row; a conversation_key that already exists with different
+    content is reported as an error item.
+
+    `owned` caches project ownership across batches (checked once per
+    project). Returns one result per item, in input order, and the
+    index job id (None when nothing was inserted).
+    """
+    unseen = {item.project_id for _, item in items} - owned
+    if unseen:
+        owned |= owned_project_ids(db, user_id, unseen)
+
+    valid = [(index, item, content_hash(item.raw_content)) for index, item in items if item.project_id in owned]
+    project_ids = {item.project_id for _, item, _ in valid}
+    hashes = {digest for _, _, digest in valid}
+    keys = {item.conversation_key for _, item, _ in valid if item.conversation_key}
+
+    by_hash: Dict[Tuple[int, str], int] = {}
+    by_key: Dict[Tuple[int, str], Tuple[int, str]] = {}
+
+    if valid:
+        conditions = [Conversation.content_hash.in_(hashes)]
+        if keys:
+            conditions.append(Conversation.conversation_key.in_(keys))
+
+        for row in db.execute(
+            select(
+                Conversation.id,
+                Conversation.project_id,
+                Conversation.content_hash,
+                Conversation.conversation_key,
+            ).where(
+                Conversation.user_id == user_id,
+                Conversation.project_id.in_(project_ids),
+                or_(*conditions),
+            )
+        ):
+            by_hash.setdefault((row.project_id, row.content_hash), row.id)
+            if row.conversation_key:
+                by_key[(row.project_id, row.conversation_key)] = (row.id, row.content_hash)
+
+    results: Dict[int, Dict] = {}
+    job_id = None
+    pending: List[Tuple[int, Dict]] = []
+    batch_hashes: Dict[Tuple[int, str], int] = {}
+    batch_keys: Dict[Tuple[int, str], int] = {}
+    now = datetime.utcnow()
+
+    for index, item in items:
+        if item.project_id not in owned:
+            results[index] = {"index": index, "status": ERROR, "error": "Project not found"}
+
+    for index, item, digest in valid:
+        scope_hash = (item.project_id, digest)
+        scope_key = (item.project_id, item.conversation_key) if item.conversation_key else None
+
+        if scope_hash in by_hash:
+            results[index] = {"index": index, "id": by_hash[scope_hash], "status": DUPLICATE}
+            continue
+
+        if scope_key and scope_key in by_key:
+            results[index] = {
+                "index": index,
+                "status": ERROR,
+                "error": "conversation_key already exists with different content, use /conversations/save",
+            }
+            continue
+
+        if scope_hash in batch_hashes:
+            # Repeated within this request: resolved to the first copy below
+            results[index] = {"index": index, "status": DUPLICATE, "first": batch_hashes[scope_hash]}
+            continue
+
+        if scope_key and scope_key in batch_keys:
+            results[index] = {
+                "index": index,
+                "status": ERROR,
+                "error": "conversation_key repeated in this request with different content",
+            }
+            continue
+
+        batch_hashes[scope_hash] = index
+        if scope_key:
+            batch_keys[scope_key] = index
+
+        packed = pack(item.raw_content)
+        pending.append((index, {
+            "raw_text": "" if packed is not None else item.raw_content,
+            "raw_packed": packed,
+            "created_at": item.created_at or now,
+            "user_id": user_id,
+            "project_id": item.project_id,
+            "conversation_key": item.conversation_key,
+            "content_hash": digest,
+            "head_hash": head_hash(item.raw_content),
+        }))
+
+    if pending:
+        try:
+            ids = db.scalars(
+                insert(Conversation).returning(Conversation.id, sort_by_parameter_order=True),
+                [row for _, row in pending],
+            ).all()
+            inserted = [(index, conversation_id) for (index, _), conversation_id in zip(pending, ids)]
+        except IntegrityError:
+            # A concurrent import took one of the keys after the lookup
+            # above (nothing else is written yet): retry row by row
+            db.rollback()
+            inserted = []
+
+            for index, row in pending:
+                try:
+                    with db.begin_nested():
+                        conversation_id = db.scalars(
+                            insert(Conversation).returning(Conversation.id), [row]
+                        ).one()
+                    inserted.append((index, conversation_id))
+                except IntegrityError:
+                    results[index] = _key_conflict(db, user_id, index, row)
+
+        if inserted:
+            job_id = enqueue_conversation_index_batch(
+                db, user_id, [conversation_id for _, conversation_id in inserted]
+            ).id
+            rows = dict(pending)
+            touch_projects(db, {rows[index]["project_id"] for index, _ in inserted})
+            db.commit()
+
+        for index, conversation_id in inserted:
+            results[index] = {"index": index, "id": conversation_id, "status": CREATED}
+
+    for result in results.values():
+        first = result.pop("first", None)
+        if first is not None:
+            result["id"] = results[first]["id"]
+
+    return [results[index] for index, _ in items], job_id
@@ -0,0 +1,120 @@
+"""
+Post-write work run by the job workers (see app.services.jobs).
+
+Each handler reads the current state of the conversation, so running a
+job twice, or after a later save, leaves the index correct.
+"""
+from typing import List
+
+from sqlalchemy.orm import Session, undefer_group
+
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.job import Job
+from app.models.summary import Summary
+from app.services.embeddings import embed_conversation
+from app.services.jobs import enqueue, handler
+from app.services.passages import store_passages
+from app.services.revisions import touch_projects
+from app.services.search_index import index_conversation, index_summary
+
+
+INDEX_CONVERSATION = "conversation.index"
+INDEX_CONVERSATION_BATCH = "conversation.index_batch"
+INDEX_SUMMARY = "summary.index"
+
+
+def _locked_conversation(db: Session, conversation_id: int):
+    # Row lock serializes concurrent jobs for one conversation: the index
+    # update is a diff against the previously indexed terms
+    return (
+        db.query(Conversation)
+        .options(undefer_group("body"))
+        .filter(Conversation.id == conversation_id)
+        .with_for_update()
+        .first()
+    )
+
+
+def _index_raw(db: Session, conversation: Conversation) -> None:
+    index_conversation(db, conversation)
+    store_passages(db, conversation)
+
+    if settings.SEMANTIC_SEARCH_ENABLED:
+        embed_conversation(db, conversation.id, "raw")
+
+
+# ---------------------------------------------------
+# Handlers
+# ---------------------------------------------------
+@handler(INDEX_CONVERSATION)
+def run_index_conversation(db: Session, payload: dict) -> None:
+    conversation = _locked_conversation(db, payload["conversation_id"])
+    if conversation:   # deleted since: nothing to index
+        _index_raw(db, conversation)
+        # Last, so the project row stays locked only until the commit
+        touch_projects(db, [conversation.project_id])
+
+
+@handler(INDEX_CONVERSATION_BATCH)
+def run_index_conversation_batch(db: Session, payload: dict) -> None:
+    project_ids = set()
+
+    for conversation_id in payload["conversation_ids"]:
+        conversation = _locked_conversation(db, conversation_id)
+        if conversation:
+            _index_raw(db, conversation)
+            project_ids.add(conversation.project_id)
+
+    touch_projects(db, project_ids)
+
+
+@handler(INDEX_SUMMARY)
+def run_index_summary(db: Session, payload: dict) -> None:
+    conversation = _locked_conversation(db, payload["conversation_id"])
+    if not conversation:
+        return
+
+    summary = (
+        db.query(Summary)
+        .filter(Summary.conversation_id == conversation.id)
+        .first()
+    )
+    index_summary(db, conversation, summary.content if summary else "")
+
+    if settings.SEMANTIC_SEARCH_ENABLED:
+        embed_conversation(db, conversation.id, "summary")
+
+    touch_projects(db, [conversation.project_id])
+
+
+# ---------------------------------------------------
+# Enqueue helpers (caller commits)
+# ---------------------------------------------------
+def enqueue_conversation_index(db: Session, conversation: Conversation) -> Job:
+    return enqueue(
+        db,
+        INDEX_CONVERSATION,
+        {"conversation_id": conversation.id},
+        user_id=conversation.user_id,
+        coalesce=True,
+    )
+
+
+def enqueue_conversation_index_batch(db: Session, user_id: int, conversation_ids: List[int]) -> Job:
+    return enqueue(
+        db,
+        INDEX_CONVERSATION_BATCH,
+        {"conversation_ids": conversation_ids},
+        user_id=user_id,
+    )
+
+
+def enqueue_summary_index(db: Session, conversation: Conversation) -> Job:
+    return enqueue(
+        db,
+        INDEX_SUMMARY,
+        {"conversation_id": conversation.id},
+        user_id=conversation.user_id,
+        coalesce=True,
+    )
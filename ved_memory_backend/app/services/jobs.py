@@ -0,0 +1,386 @@
+"""
+Durable background jobs for post-write work (indexing, passages,
+embeddings).
+
+    enqueue(db, "conversation.index", {"conversation_id": 1})
+    db.commit()   # the job becomes visible with the write that needs it
+
+Jobs live in the `jobs` table and are enqueued in the caller's
+transaction, so a committed write always has its follow-up work
+recorded and a rolled-back write never does. Worker threads (started
+with the app, see JOBS_WORKERS) claim jobs with SELECT ... FOR UPDATE
+SKIP LOCKED on PostgreSQL; elsewhere a conditional UPDATE on the status
+decides which worker wins. Failed jobs are retried with exponential
+backoff up to max_attempts; jobs left `running` by a dead worker are
+claimed again after JOBS_LOCK_TIMEOUT_SECONDS. Idle workers delete
+finished jobs older than JOBS_RETENTION_DAYS, so the table only holds
+recent history (and idempotency keys are remembered that long).
+
+Handlers must be idempotent: a job can run more than once.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import Job
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# Rows deleted per statement by purge_finished
+PURGE_BATCH_SIZE = 1000
+
+
+class JobQueueFull(Exception):
+    """More than JOBS_MAX_PENDING jobs are waiting (backpressure)."""
+
+
+# ---------------------------------------------------
+# Handlers
+# ---------------------------------------------------
+_handlers: Dict[str, Callable[[Session, dict], None]] = {}
+
+
+def handler(kind: str):
+    """Register `fn(db, payload)` for a job kind. The worker commits."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+# ---------------------------------------------------
+# Enqueue (caller's transaction)
+# ---------------------------------------------------
+def _encode(payload: dict) -> str:
+    # Canonical form so equal payloads compare equal (coalescing)
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def pending_count(db: Session) -> int:
+    return db.scalar(select(func.count(Job.id)).where(Job.status == QUEUED))
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict,
+    idempotency_key: Optional[str] = None,
+    user_id: Optional[int] = None,
+    coalesce: bool = False,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Add a job to the current transaction (committed by the caller).
+
+    idempotency_key: returns the job already recorded under this key,
+        whatever its status, instead of adding another.
+    coalesce: returns an identical job (same kind and payload) that is
+        still queued, e.g. one re-index per conversation however many
+        saves arrive before a worker gets to it.
+
+    Raises JobQueueFull above JOBS_MAX_PENDING queued jobs.
+    """
+    encoded = _encode(payload)
+
+    if idempotency_key:
+        existing = db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+        if existing:
+            return existing
+
+    if coalesce:
+        existing = db.query(Job).filter(
+            Job.kind == kind,
+            Job.status == QUEUED,
+            Job.payload == encoded,
+        ).first()
+        if existing:
+            return existing
+
+    if pending_count(db) >= settings.JOBS_MAX_PENDING:
+        raise JobQueueFull(kind)
+
+    job = Job(
+        kind=kind,
+        payload=encoded,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+        idempotency_key=idempotency_key,
+        user_id=user_id,
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    db.flush()
+
+    db.info["jobs_enqueued"] = True
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session):
+    if session.info.pop("jobs_enqueued", False):
+        notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("jobs_enqueued", None)
+
+
+# ---------------------------------------------------
+# Claim / run
+# ---------------------------------------------------
+def _runnable(now: datetime):
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS)
+
+    return or_(
+        and_(Job.status == QUEUED, Job.run_after <= now),
+        and_(Job.status == RUNNING, Job.locked_at < stale),
+    )
+
+
+def claim(db: Session, worker_id: str) -> Optional[Job]:
+    """Lock the next runnable job for `worker_id`, or None."""
+    now = datetime.utcnow()
+
+    candidates = (
+        select(Job.id)
+        .where(_runnable(now))
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    job_id = db.scalar(candidates)
+    if job_id is None:
+        db.rollback()
+        return None
+
+    # Conditional on the job still being runnable: without row locks the
+    # first worker to update wins and the others see rowcount 0
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, _runnable(now))
+        .values(
+            status=RUNNING,
+            attempts=Job.attempts + 1,
+            locked_at=now,
+            locked_by=worker_id,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+
+    if not claimed:
+        return None
+
+    return db.get(Job, job_id)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def run_one(worker_id: str = "local") -> Optional[Job]:
+    """Claim and run one job. Returns it, or None when nothing is runnable."""
+    db = SessionLocal()
+    try:
+        job = claim(db, worker_id)
+        if job is None:
+            return None
+
+        job_id, kind, attempts = job.id, job.kind, job.attempts
+
+        try:
+            fn = _handlers.get(kind)
+            if fn is None:
+                raise LookupError(f"No handler for job kind {kind!r}")
+
+            fn(db, json.loads(job.payload))
+
+            # Handler writes and completion commit together
+            job.status = SUCCEEDED
+            job.finished_at = datetime.utcnow()
+            job.last_error = None
+            db.commit()
+
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Job %s (%s) attempt %s failed: %s", job_id, kind, attempts, exc)
+
+            job = db.get(Job, job_id)
+            job.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+
+            if attempts >= job.max_attempts:
+                job.status = FAILED
+                job.finished_at = datetime.utcnow()
+                logger.error("Job %s (%s) failed permanently", job_id, kind)
+            else:
+                job.status = QUEUED
+                job.run_after = datetime.utcnow() + _retry_delay(attempts)
+
+            db.commit()
+
+        return job
+    finally:
+        db.close()
+
+
+def drain(max_jobs: Optional[int] = None) -> int:
+    """Run runnable jobs in the calling thread until none are left."""
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        if run_one(worker_id=f"drain-{os.getpid()}") is None:
+            break
+        ran += 1
+    return ran
+
+
+# ---------------------------------------------------
+# Retention
+# ---------------------------------------------------
+def purge_finished(db: Session, older_than: datetime) -> int:
+    """
+    Delete succeeded / failed jobs that finished before `older_than`,
+    in short transactions. Returns the number of jobs deleted.
+    """
+    purged = 0
+
+    while True:
+        ids = db.scalars(
+            select(Job.id)
+            .where(Job.status.in_(FINISHED), Job.finished_at < older_than)
+            .limit(PURGE_BATCH_SIZE)
+        ).all()
+        if not ids:
+            return purged
+
+        db.execute(
+            delete(Job)
+            .where(Job.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        purged += len(ids)
+
+
+_last_purge: Optional[float] = None
+_purge_lock = threading.Lock()
+
+
+def _maybe_purge() -> None:
+    """Purge from one idle worker at most every JOBS_PURGE_INTERVAL_SECONDS."""
+    global _last_purge
+
+    if settings.JOBS_RETENTION_DAYS <= 0:
+        return
+
+    with _purge_lock:
+        now = time.monotonic()
+        if _last_purge is not None and now - _last_purge < settings.JOBS_PURGE_INTERVAL_SECONDS:
+            return
+        _last_purge = now
+
+    db = SessionLocal()
+    try:
+        purged = purge_finished(
+            db, datetime.utcnow() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+        )
+        if purged:
+            logger.info("Purged %s finished jobs", purged)
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------
+# Worker threads
+# ---------------------------------------------------
+_wakeup = threading.Event()
+_stopping = threading.Event()
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+
+
+def notify() -> None:
+    """Wake idle workers (called after a commit that enqueued jobs)."""
+    _wakeup.set()
+
+
+def _work(worker_id: str) -> None:
+    while not _stopping.is_set():
+        try:
+            ran = run_one(worker_id)
+        except Exception:
+            logger.exception("Job worker %s error", worker_id)
+            ran = None
+
+        if ran is None:
+            try:
+                _maybe_purge()
+            except Exception:
+                logger.exception("Job worker %s purge error", worker_id)
+
+            _wakeup.wait(settings.JOBS_POLL_INTERVAL_SECONDS)
+            _wakeup.clear()
+
+
+def start_workers(count: Optional[int] = None) -> None:
+    count = settings.JOBS_WORKERS if count is None else count
+
+    with _workers_lock:
+        if _workers:
+            return
+
+        _stopping.clear()
+        prefix = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+        for index in range(count):
+            worker = threading.Thread(
+                target=_work,
+                args=(f"{prefix}-{index}",),
+                name=f"job-worker-{index}",
+                daemon=True,
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def stop_workers(timeout: float = 10.0) -> None:
+    """Stop after the jobs in progress; queued jobs stay in the table."""
+    with _workers_lock:
+        _stopping.set()
+        _wakeup.set()
+
+        for worker in _workers:
+            worker.join(timeout)
+        _workers.clear()
+
+
+def queue_stats(db: Session) -> dict:
+    counts = dict(
+        db.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+    )
+    return {
+        "workers": len(_workers),
+        "max_pending": settings.JOBS_MAX_PENDING,
+        **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)},
+    }
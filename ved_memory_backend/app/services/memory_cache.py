@@ -0,0 +1,158 @@
+"""
+Result cache for /memory/context.
+
+Entries are keyed by (user, project, normalized query, scorer, mode,
+budget options) plus the project's generation counter. Any committed
+write that can change a project's results calls `mark_project_changed`;
+the generation is bumped after the commit, so later lookups use a new
+key and stale entries are never served (they age out of the LRU).
+
+The generation is read before the result is computed: a lookup that
+races a write stores its (possibly old) result under the old generation.
+
+Backends:
+    MEMORY_CACHE_BACKEND=local   per-process LRU + TTL (default)
+    MEMORY_CACHE_BACKEND=off     no caching
+    MEMORY_CACHE_BACKEND=pkg.module:factory
+        shared backend for multi-worker deployments; `factory()` returns
+        an object implementing `MemoryCacheBackend` (generations must be
+        shared too, e.g. Redis INCR, or workers will serve stale results)
+"""
+import importlib
+import logging
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """Interface for result cache backends."""
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    def generation(self, project_id: int) -> int:
+        raise NotImplementedError
+
+    def bump(self, project_id: int) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class LocalMemoryCache(MemoryCacheBackend):
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.results = TTLCache(max_entries, ttl_seconds)
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self.results.get(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.results.set(key, value)
+
+    def generation(self, project_id: int) -> int:
+        return self._generations.get(project_id, 0)
+
+    def bump(self, project_id: int) -> None:
+        with self._lock:
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "local", "invalidations": self.invalidations, **self.results.stats()}
+
+
+_backend: Optional[MemoryCacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_memory_cache() -> Optional[MemoryCacheBackend]:
+    """Configured backend, or None when caching is off."""
+    global _backend
+
+    name = settings.MEMORY_CACHE_BACKEND
+    if name == "off":
+        return None
+
+    with _backend_lock:
+        if _backend is None:
+            if name == "local":
+                _backend = LocalMemoryCache(
+                    settings.MEMORY_CACHE_MAX_ENTRIES,
+                    settings.MEMORY_CACHE_TTL_SECONDS,
+                )
+            else:
+                module, _, factory = name.partition(":")
+                _backend = getattr(importlib.import_module(module), factory)()
+
+        return _backend
+
+
+def reset_memory_cache() -> None:
+    """Drop the backend after changing the settings."""
+    global _backend
+
+    with _backend_lock:
+        _backend = None
+
+
+# ---------------------------------------------------
+# Keys
+# ---------------------------------------------------
+def normalize_query(query: str) -> str:
+    # The engine lowercases and tokenizes, so case and spacing never
+    # change results
+    return " ".join(query.lower().split())
+
+
+def cache_key(user_id: int, project_id: int, query: str, generation: int, **options) -> tuple:
+    return (
+        user_id,
+        project_id,
+        normalize_query(query),
+        generation,
+        tuple(sorted(options.items())),
+    )
+
+
+# ---------------------------------------------------
+# Invalidation (after commit)
+# ---------------------------------------------------
+def mark_project_changed(db: Session, project_id: int) -> None:
+    """Bump the project's generation once the current transaction commits."""
+    db.info.setdefault("memory_changed_projects", set()).add(project_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_generations(session):
+    projects = session.info.pop("memory_changed_projects", None)
+    cache = get_memory_cache() if projects else None
+
+    if cache is None:
+        return
+
+    for project_id in projects:
+        try:
+            cache.bump(project_id)
+        except Exception:
+            logger.exception("Could not invalidate memory cache for project %s", project_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop("memory_changed_projects", None)
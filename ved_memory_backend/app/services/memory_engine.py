@@ -1,11 +1,505 @@
-from typing import List, Dict
-from sqlalchemy.orm import Session, joinedload
+import logging
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session, joinedload, undefer_group
 from sqlalchemy import desc
 
+from app.core.config import settings
+from app.core.profiling import timed
 from app.models.project import Project
 from app.models.conversation import Conversation
-from app.models.summary import Summary
 from app.models.user import User
+from app.services.search_index import (
+    RAW_FIELD,
+    SUMMARY_FIELD,
+    Candidate,
+    content_terms,
+    load_corpus_stats,
+    lookup_candidates,
+    tokenize,
+)
+from app.services.fulltext_search import FullTextUnavailable, search_fulltext
+from app.services.embeddings import semantic_search
+from app.services.memory_snapshot import get_snapshot_cache
+from app.services.passages import (
+    keyword_passage_scorer,
+    load_spans,
+    select_passages,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Field weights shared by every scorer
+FIELD_WEIGHTS = {RAW_FIELD: 5, SUMMARY_FIELD: 3}
+
+
+# ---------------------------------------------------
+# Scorers
+# ---------------------------------------------------
+class Scorer:
+    """
+    Pluggable keyword scorer.
+
+    `query_terms` turns the tokenized query into the terms to look up,
+    `prepare` loads whatever corpus statistics the scorer needs (once per
+    query) and `score` rates one candidate from its posting data.
+    `score_postings` is the vectorized form used by the snapshot
+    engine: one (field, term) contribution for many documents at once.
+    """
+
+    name: str = ""
+
+    # Multiplier on the 0..1 recency boost added to keyword scores
+    recency_weight: float = 1.0
+
+    def query_terms(self, tokens: List[str]) -> List[str]:
+        return tokens
+
+    def prepare(self, db: Session, project_id: int, terms: List[str]) -> None:
+        pass
+
+    def score(self, candidate: Candidate, query_term_counts: Counter) -> float:
+        raise NotImplementedError
+
+    def score_postings(
+        self,
+        field: str,
+        term: str,
+        occurrences: int,
+        tf: np.ndarray,
+        lengths: np.ndarray,
+    ) -> np.ndarray:
+        raise NotImplementedError
+
+
+class LegacyScorer(Scorer):
+    """
+    Original behavior: weighted occurrence counts (raw x5, summary x3).
+    """
+
+    name = "legacy"
+
+    def score(self, candidate: Candidate, query_term_counts: Counter) -> float:
+        total = 0
+
+        for field, weight in FIELD_WEIGHTS.items():
+            tf = candidate.tf[field]
+            for word, occurrences in query_term_counts.items():
+                total += tf.get(word, 0) * occurrences * weight
+
+        return total
+
+    def score_postings(self, field, term, occurrences, tf, lengths):
+        return tf.astype(np.float64) * occurrences * FIELD_WEIGHTS[field]
+
+
+class BM25Scorer(Scorer):
+    """
+    Okapi BM25 per field, combined with the field weights.
+    Stopwords are removed from the query. Document frequencies and
+    average lengths come from the incrementally maintained corpus stats.
+    """
+
+    name = "bm25"
+    recency_weight = 0.01
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def query_terms(self, tokens: List[str]) -> List[str]:
+        return content_terms(tokens)
+
+    def prepare(self, db: Session, project_id: int, terms: List[str]) -> None:
+        self.stats = load_corpus_stats(db, project_id, terms)
+
+    def _idf(self, field: str, term: str) -> float:
+        n = self.stats.doc_count[field]
+        df = self.stats.df[field].get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def score(self, candidate: Candidate, query_term_counts: Counter) -> float:
+        total = 0.0
+
+        for field, weight in FIELD_WEIGHTS.items():
+            avg_length = self.stats.avg_length[field] or 1.0
+            norm = self.k1 * (
+                1 - self.b + self.b * candidate.lengths[field] / avg_length
+            )
+
+            for word, occurrences in query_term_counts.items():
+                tf = candidate.tf[field].get(word, 0)
+                if not tf:
+                    continue
+                total += (
+                    weight
+                    * occurrences
+                    * self._idf(field, word)
+                    * tf * (self.k1 + 1) / (tf + norm)
+                )
+
+        return total
+
+    def score_postings(self, field, term, occurrences, tf, lengths):
+        # Same operations, in the same order, as `score`
+        avg_length = self.stats.avg_length[field] or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        tf = tf.astype(np.float64)
+
+        return (
+            FIELD_WEIGHTS[field]
+            * occurrences
+            * self._idf(field, term)
+            * tf * (self.k1 + 1) / (tf + norm)
+        )
+
+
+SCORERS = {
+    LegacyScorer.name: LegacyScorer,
+    BM25Scorer.name: BM25Scorer,
+}
+
+
+def get_scorer(name: str) -> Scorer:
+    try:
+        return SCORERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown scorer: {name}")
+
+
+# ---------------------------------------------------
+# Recency
+# ---------------------------------------------------
+class Recency:
+    """
+    Continuous recency boost in (0, 1]: halves for every
+    MEMORY_RECENCY_HALF_LIFE_DAYS a conversation is older than the
+    project's newest one. Counting from the newest conversation rather
+    than the clock keeps results fixed between writes (cache entries
+    and ETags follow projects.revision), and old history keeps a
+    small boost instead of dropping out of a fixed window.
+    """
+
+    def __init__(self, newest: datetime, half_life_days: float):
+        self.newest = newest
+        self.half_life = timedelta(days=half_life_days)
+
+    def boost(self, created_at: datetime) -> float:
+        age = max(self.newest - created_at, timedelta(0))
+        return 0.5 ** (age / self.half_life)
+
+
+# ---------------------------------------------------
+# Search Backends
+# ---------------------------------------------------
+class SearchBackend:
+    """
+    Where ranking happens. `rank` returns the top `limit` results as
+    [{conversation_id, score, ...}] plus the number of documents
+    (or chunks) that were considered.
+    """
+
+    def rank(
+        self,
+        db: Session,
+        project_id: int,
+        user_id: int,
+        query: str,
+        limit: int,
+        recency: Recency,
+    ) -> Tuple[List[Dict], int]:
+        raise NotImplementedError
+
+    def rank_many(
+        self,
+        db: Session,
+        project_id: int,
+        user_id: int,
+        queries: List[str],
+        limit: int,
+        recency: Recency,
+    ) -> List[Tuple[List[Dict], int]]:
+        """`rank` for several queries against one project."""
+        return [
+            self.rank(db, project_id, user_id, query, limit, recency)
+            for query in queries
+        ]
+
+
+class IndexSearchBackend(SearchBackend):
+    """Python scoring over the inverted index posting lists."""
+
+    def __init__(self, scorer: Scorer):
+        self.scorer = scorer
+
+    def rank(self, db, project_id, user_id, query, limit, recency):
+        return self.rank_many(db, project_id, user_id, [query], limit, recency)[0]
+
+    def rank_many(self, db, project_id, user_id, queries, limit, recency):
+        # One posting lookup and one stats read for all the queries
+        term_counts = [Counter(self.scorer.query_terms(tokenize(q))) for q in queries]
+        terms = list(dict.fromkeys(t for counts in term_counts for t in counts))
+
+        candidates = lookup_candidates(db, project_id, terms)
+        self.scorer.prepare(db, project_id, terms)
+
+        if len(queries) == 1:
+            return [self._rank(candidates, term_counts[0], limit, recency)]
+
+        return [
+            self._rank(
+                {
+                    cid: candidate
+                    for cid, candidate in candidates.items()
+                    if any(term in tf for tf in candidate.tf.values() for term in counts)
+                },
+                counts,
+                limit,
+                recency,
+            )
+            for counts in term_counts
+        ]
+
+    def _rank(self, candidates, query_term_counts, limit, recency):
+        ranked_results = []
+
+        for conversation_id, candidate in candidates.items():
+            keyword_score = self.scorer.score(candidate, query_term_counts)
+
+            if keyword_score <= 0:
+                continue
+
+            final_score = (
+                keyword_score
+                + self.scorer.recency_weight * recency.boost(candidate.created_at)
+            )
+
+            ranked_results.append({
+                "conversation_id": conversation_id,
+                "score": round(final_score, 4),
+                "created_at": candidate.created_at,
+            })
+
+        # Full ties in id order, whatever order the postings came in
+        ranked_results.sort(
+            key=lambda x: (x["score"], x["created_at"], -x["conversation_id"]),
+            reverse=True
+        )
+
+        return ranked_results[:limit], len(candidates)
+
+
+class SnapshotSearchBackend(SearchBackend):
+    """
+    The scorer evaluated with NumPy over an in-memory snapshot of the
+    project's index (app.services.memory_snapshot): the scores of every
+    document for all query terms come from one np.bincount over their
+    posting arrays, and only the few documents that can reach the top k
+    (np.argpartition) get their recency boost looked up and are sorted.
+
+    Contributions are summed in the order `Scorer.score` adds them, so
+    results are identical to IndexSearchBackend's.
+    """
+
+    # Slack for documents whose rounded score ties the k-th best
+    ROUNDING = 1e-4
+
+    def __init__(self, scorer: Scorer):
+        self.scorer = scorer
+
+    def rank(self, db, project_id, user_id, query, limit, recency):
+        return self.rank_many(db, project_id, user_id, [query], limit, recency)[0]
+
+    def rank_many(self, db, project_id, user_id, queries, limit, recency):
+        term_counts = [Counter(self.scorer.query_terms(tokenize(q))) for q in queries]
+        terms = list(dict.fromkeys(t for counts in term_counts for t in counts))
+        if not terms:
+            return [([], 0) for _ in queries]
+
+        snapshot = get_snapshot_cache().get(db, project_id)
+        self.scorer.prepare(db, project_id, terms)
+
+        return [
+            self._rank(snapshot, counts, limit, recency) if counts else ([], 0)
+            for counts in term_counts
+        ]
+
+    def _rank(self, snapshot, query_term_counts, limit, recency):
+        rows, contributions = [], []
+
+        for field in FIELD_WEIGHTS:
+            lengths = snapshot.lengths[field]
+            for word, occurrences in query_term_counts.items():
+                term_rows, tf = snapshot.postings_for(field, word)
+                if len(term_rows):
+                    rows.append(term_rows)
+                    contributions.append(self.scorer.score_postings(
+                        field, word, occurrences, tf, lengths[term_rows]
+                    ))
+
+        if not rows:
+            return [], 0
+
+        rows = np.concatenate(rows)
+        keyword = np.bincount(
+            rows, weights=np.concatenate(contributions), minlength=snapshot.size
+        )
+        matched = np.flatnonzero(np.bincount(rows, minlength=snapshot.size))
+
+        candidates = matched[keyword[matched] > 0]
+        scores = keyword[candidates]
+
+        # Recency adds at most recency_weight: nothing further than that
+        # below the k-th best keyword score can make the top k
+        weight = self.scorer.recency_weight
+        if len(candidates) > limit:
+            kth = scores[np.argpartition(scores, -limit)[-limit]]
+            near = scores >= kth - weight - self.ROUNDING
+            candidates, scores = candidates[near], scores[near]
+
+        ids = snapshot.conversation_ids[candidates].tolist()
+        created_at = [snapshot.created_at_of(row) for row in candidates.tolist()]
+        boosts = np.fromiter(map(recency.boost, created_at), dtype=np.float64, count=len(ids))
+        rounded = [round(score, 4) for score in (scores + weight * boosts).tolist()]
+
+        # Score, then created_at, descending; full ties in id order, as
+        # the index backend returns them
+        order = np.lexsort((
+            -snapshot.conversation_ids[candidates],
+            snapshot.created_at[candidates].astype(np.int64),
+            np.asarray(rounded),
+        ))[::-1][:limit]
+
+        ranked_results = [
+            {
+                "conversation_id": ids[i],
+                "score": rounded[i],
+                "created_at": created_at[i],
+            }
+            for i in order.tolist()
+        ]
+
+        return ranked_results, len(matched)
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Matching and ranking pushed into the database
+    (PostgreSQL tsvector/GIN + ts_rank, SQLite FTS5 + bm25).
+    Only the top-k ids and scores cross the wire.
+    """
+
+    name = "fulltext"
+
+    def rank(self, db, project_id, user_id, query, limit, recency):
+        # The database objects index the plain body column, which is
+        # empty for packed rows: they would silently never match
+        if settings.BODY_COMPRESSION != "none":
+            raise FullTextUnavailable("bodies are compressed (BODY_COMPRESSION)")
+
+        return search_fulltext(
+            db,
+            project_id=project_id,
+            user_id=user_id,
+            query=query,
+            terms=content_terms(tokenize(query)),
+            weights=FIELD_WEIGHTS,
+            limit=limit,
+        )
+
+
+class SemanticSearchBackend(SearchBackend):
+    """
+    Nearest-neighbour search over embedded chunks. A conversation
+    scores as its best-matching chunk (cosine similarity).
+    """
+
+    # Chunks fetched per requested result, before grouping
+    CHUNKS_PER_RESULT = 8
+
+    def rank(self, db, project_id, user_id, query, limit, recency):
+        chunks = semantic_search(project_id, query, limit * self.CHUNKS_PER_RESULT)
+
+        best: Dict[int, float] = {}
+        for conversation_id, _field, _start, _end, similarity in chunks:
+            if similarity > best.get(conversation_id, 0.0):
+                best[conversation_id] = similarity
+
+        ranked_results = sorted(
+            (
+                {"conversation_id": cid, "score": round(similarity, 4)}
+                for cid, similarity in best.items()
+            ),
+            key=lambda x: x["score"],
+            reverse=True,
+        )
+
+        return ranked_results[:limit], len(chunks)
+
+
+class HybridSearchBackend(SearchBackend):
+    """
+    Reciprocal rank fusion of a keyword backend and the semantic backend.
+    """
+
+    RRF_K = 60
+    CANDIDATES = 50
+
+    def __init__(self, keyword: SearchBackend, semantic: SearchBackend):
+        self.keyword = keyword
+        self.semantic = semantic
+
+    def rank(self, db, project_id, user_id, query, limit, recency):
+        fused: Dict[int, float] = {}
+        scanned = 0
+
+        for backend in (self.keyword, self.semantic):
+            results, considered = backend.rank(
+                db, project_id, user_id, query, self.CANDIDATES, recency
+            )
+            scanned = max(scanned, considered)
+
+            for position, result in enumerate(results):
+                cid = result["conversation_id"]
+                fused[cid] = fused.get(cid, 0.0) + 1.0 / (self.RRF_K + position + 1)
+
+        ranked_results = sorted(
+            (
+                {"conversation_id": cid, "score": round(score, 6)}
+                for cid, score in fused.items()
+            ),
+            key=lambda x: x["score"],
+            reverse=True,
+        )
+
+        return ranked_results[:limit], scanned
+
+
+def get_search_backend(name: str, mode: str = "keyword") -> SearchBackend:
+    if name == DatabaseSearchBackend.name:
+        keyword: SearchBackend = DatabaseSearchBackend()
+    elif settings.MEMORY_KEYWORD_ENGINE == "snapshot":
+        keyword = SnapshotSearchBackend(get_scorer(name))
+    else:
+        keyword = IndexSearchBackend(get_scorer(name))
+
+    if mode == "keyword":
+        return keyword
+
+    if not settings.SEMANTIC_SEARCH_ENABLED:
+        raise ValueError("Semantic search is not enabled")
+
+    if mode == "semantic":
+        return SemanticSearchBackend()
+    if mode == "hybrid":
+        return HybridSearchBackend(keyword, SemanticSearchBackend())
+
+    raise ValueError(f"Unknown search mode: {mode}")
 
 
 # ---------------------------------------------------
@@ -16,6 +510,12 @@ def get_memory_context(
     query: str,
     db: Session,
     current_user: User,
+    scorer: Optional[str] = None,
+    mode: str = "keyword",
+    neighbors: int = 1,
+    max_chars: Optional[int] = None,
+    include_raw: bool = False,
+    limit: Optional[int] = None,
 ) -> Dict:
     """
     Deterministic memory retrieval engine.
@@ -23,11 +523,13 @@ def get_memory_context(
     Behavior:
     - Validates project ownership
     - Parses query words
-    - Fetches latest 1000 conversations for project
-    - Eager loads summary (avoids N+1)
-    - Applies deterministic scoring
-    - Applies recency boost
-    - Returns top 5 ranked conversations
+    - Ranks through a search backend: the Python inverted index
+      (legacy counts or BM25), the database's full-text engine,
+      embeddings (semantic) or a fusion of both (hybrid)
+    - Applies a recency boost decaying with age (Recency)
+    - Returns the top `limit` (default MEMORY_CONTEXT_LIMIT) ranked
+      conversations with their best-matching passages (plus
+      neighbors) under a shared character budget
     """
 
     # ---------------------------------------------
@@ -37,7 +539,9 @@ def get_memory_context(
         raise ValueError("Query cannot be empty")
 
     query = query.lower().strip()
-    query_words = [word for word in query.split(" ") if word]
+    limit = limit or settings.MEMORY_CONTEXT_LIMIT
+
+    backend = get_search_backend(scorer or settings.MEMORY_DEFAULT_SCORER, mode)
 
     # ---------------------------------------------
     # 2️⃣ Validate Project Ownership
@@ -55,23 +559,11 @@ def get_memory_context(
         return None  # Route layer will convert to 404
 
     # ---------------------------------------------
-    # 3️⃣ Fetch Conversations (Max 1000 Recent)
+    # 3️⃣ Latest Conversations (recency reference & fallback)
     # ---------------------------------------------
-    conversations: List[Conversation] = (
-        db.query(Conversation)
-        .options(joinedload(Conversation.summary))
-        .filter(
-            Conversation.project_id == project_id,
-            Conversation.user_id == current_user.id,
-        )
-        .order_by(desc(Conversation.created_at))
-        .limit(1000)
-        .all()
-    )
+    latest, recency = _latest_conversations(db, project_id, current_user.id, limit)
 
-    total_scanned = len(conversations)
-
-    if total_scanned == 0:
+    if not latest:
         return {
             "project_id": project_id,
             "query": query,
@@ -80,68 +572,283 @@ def get_memory_context(
         }
 
     # ---------------------------------------------
-    # 4️⃣ Scoring Logic
+    # 4️⃣ Scoring Logic (delegated to the search backend)
+    # ---------------------------------------------
+    [(ranked_results, total_scanned)] = _rank_queries(
+        backend, db, project_id, current_user.id, [query], limit, recency
+    )
+
+    # ---------------------------------------------
+    # 5️⃣ Filter Matches
+    # ---------------------------------------------
+    if not ranked_results:
+        ranked_results = _latest(latest, recency)
+
+    # ---------------------------------------------
+    # 6️⃣ Hydrate Top-K & Select Passages
     # ---------------------------------------------
-    ranked_results = []
+    with timed("passages"):
+        [blocks], conversations = _load_blocks(db, [ranked_results], include_raw)
 
-    for index, convo in enumerate(conversations):
-        raw_text = (convo.raw_content or "").lower()
-        summary_text = (
-            (convo.summary.content.lower() if convo.summary else "")
+        select_passages(
+            blocks,
+            texts={c.id: c.raw_content or "" for c in conversations},
+            spans=load_spans(db, conversations),
+            score_passages=_passage_scorer(db, project_id, query),
+            neighbors=neighbors,
+            max_chars=max_chars or settings.MEMORY_CONTEXT_CHAR_BUDGET,
         )
 
-        raw_count = 0
-        summary_count = 0
+    return {
+        "project_id": project_id,
+        "query": query,
+        "total_scanned": total_scanned,
+        "context_blocks": blocks,
+    }
 
-        for word in query_words:
-            raw_count += raw_text.count(word)
-            summary_count += summary_text.count(word)
 
-        keyword_score = (raw_count * 5) + (summary_count * 3)
+def get_memory_context_batch(
+    db: Session,
+    current_user: User,
+    lookups: List[Tuple[Union[int, str], str]],
+    scorer: Optional[str] = None,
+    mode: str = "keyword",
+    neighbors: int = 1,
+    max_chars: Optional[int] = None,
+    include_raw: bool = False,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Several (project_id, query) lookups in one call; project_id "*"
+    stands for every project of the user.
 
-        # Recency boost (newer conversations get slightly higher score)
-        recency_boost = max(0, (1000 - index) / 1000)
+    Returns one result per (project, query), in request order, each
+    shaped like get_memory_context's plus the `index` of its lookup.
+    A lookup for a project the user does not own, or with an empty
+    query, gets an `error` instead of blocks.
 
-        final_score = keyword_score + recency_boost
+    Ownership is checked with one query. Per project, the latest
+    conversations are read once and all of its queries are ranked together
+    (SearchBackend.rank_many: one posting lookup for the index
+    engine). The top conversations of every result are hydrated at
+    once.
+    """
 
-        ranked_results.append({
-            "conversation_id": convo.id,
-            "score": round(final_score, 4),
-            "raw_content": convo.raw_content,
-            "summary": convo.summary.content if convo.summary else None,
-            "created_at": convo.created_at,
-            "keyword_score": keyword_score,
-        })
+    limit = limit or settings.MEMORY_CONTEXT_LIMIT
+    backend = get_search_backend(scorer or settings.MEMORY_DEFAULT_SCORER, mode)
 
     # ---------------------------------------------
-    # 5️⃣ Filter Matches
+    # 1️⃣ Expand "*" & Validate Ownership
     # ---------------------------------------------
-    matches = [r for r in ranked_results if r["keyword_score"] > 0]
+    owned = [
+        project_id
+        for (project_id,) in db.query(Project.id)
+        .filter(Project.user_id == current_user.id)
+        .order_by(Project.id)
+    ]
+    owned_ids = set(owned)
 
-    if not matches:
-        # Fallback to latest 5 conversations
-        top_fallback = ranked_results[:5]
-        return {
-            "project_id": project_id,
-            "query": query,
-            "total_scanned": total_scanned,
-            "context_blocks": top_fallback,
-        }
+    results: List[Dict] = []
+
+    for index, (project_id, query) in enumerate(lookups):
+        query = (query or "").lower().strip()
+
+        for pid in owned if project_id == "*" else [project_id]:
+            error = None
+            if not query:
+                error = "Query cannot be empty"
+            elif pid not in owned_ids:
+                error = "Project not found"
+
+            results.append({
+                "index": index,
+                "project_id": pid,
+                "query": query,
+                "total_scanned": 0,
+                "context_blocks": [],
+                "error": error,
+            })
+
+    if len(results) > settings.MEMORY_BATCH_MAX_LOOKUPS:
+        raise ValueError(
+            f"At most {settings.MEMORY_BATCH_MAX_LOOKUPS} lookups per batch "
+            f"(got {len(results)} after expanding \"*\")"
+        )
+
+    by_project: Dict[int, List[Dict]] = {}
+    for result in results:
+        if result["error"] is None:
+            by_project.setdefault(result["project_id"], []).append(result)
 
     # ---------------------------------------------
-    # 6️⃣ Sort & Limit
+    # 2️⃣ Rank Every Project's Queries Together
     # ---------------------------------------------
-    matches.sort(
-        key=lambda x: (x["score"], x["created_at"]),
-        reverse=True
-    )
+    ranked: Dict[int, List[Dict]] = {}   # id(result) -> ranked results
 
-    top_results = matches[:5]
+    for project_id, group in by_project.items():
+        latest, recency = _latest_conversations(db, project_id, current_user.id, limit)
+        if not latest:
+            continue
 
-    return {
-        "project_id": project_id,
-        "query": query,
-        "total_scanned": total_scanned,
-        "context_blocks": top_results,
+        queries = list(dict.fromkeys(result["query"] for result in group))
+        rankings = dict(zip(queries, _rank_queries(
+            backend, db, project_id, current_user.id, queries, limit, recency
+        )))
+
+        for result in group:
+            ranked_results, result["total_scanned"] = rankings[result["query"]]
+            ranked[id(result)] = ranked_results or _latest(latest, recency)
+
+    # ---------------------------------------------
+    # 3️⃣ Hydrate All Results & Select Passages
+    # ---------------------------------------------
+    hydrated = [result for result in results if id(result) in ranked]
+
+    with timed("passages"):
+        block_lists, conversations = _load_blocks(
+            db, [ranked[id(result)] for result in hydrated], include_raw
+        )
+        texts = {c.id: c.raw_content or "" for c in conversations}
+        spans = load_spans(db, conversations)
+        scorers: Dict[Tuple[int, str], Callable] = {}
+
+        for result, blocks in zip(hydrated, block_lists):
+            key = (result["project_id"], result["query"])
+            if key not in scorers:
+                scorers[key] = _passage_scorer(db, *key)
+
+            select_passages(
+                blocks,
+                texts=texts,
+                spans=spans,
+                score_passages=scorers[key],
+                neighbors=neighbors,
+                max_chars=max_chars or settings.MEMORY_CONTEXT_CHAR_BUDGET,
+            )
+            result["context_blocks"] = blocks
+
+    return results
+
+
+# ---------------------------------------------------
+# Shared Steps
+# ---------------------------------------------------
+def _latest_conversations(
+    db: Session,
+    project_id: int,
+    user_id: int,
+    limit: int,
+) -> Tuple[List[Tuple[int, datetime]], Optional[Recency]]:
+    """
+    The `limit` newest (id, created_at) of a project and the recency
+    boost counted from the newest one (None for an empty project).
+    """
+    latest = [
+        (row.id, row.created_at)
+        for row in (
+            db.query(Conversation.id, Conversation.created_at)
+            .filter(
+                Conversation.project_id == project_id,
+                Conversation.user_id == user_id,
+            )
+            .order_by(desc(Conversation.created_at))
+            .limit(limit)
+        )
+    ]
+
+    if not latest:
+        return latest, None
+
+    return latest, Recency(latest[0][1], settings.MEMORY_RECENCY_HALF_LIFE_DAYS)
+
+
+def _rank_queries(
+    backend: SearchBackend,
+    db: Session,
+    project_id: int,
+    user_id: int,
+    queries: List[str],
+    limit: int,
+    recency: Recency,
+) -> List[Tuple[List[Dict], int]]:
+    with timed("score"):
+        try:
+            return backend.rank_many(db, project_id, user_id, queries, limit, recency)
+        except FullTextUnavailable as exc:
+            # Database has no full-text objects: use the Python index instead
+            logger.warning("Full-text search unavailable, falling back: %s", exc)
+            return IndexSearchBackend(BM25Scorer()).rank_many(
+                db, project_id, user_id, queries, limit, recency
+            )
+
+
+def _latest(latest: List[Tuple[int, datetime]], recency: Recency) -> List[Dict]:
+    """No keyword match: fall back to the latest conversations."""
+    return [
+        {
+            "conversation_id": cid,
+            "score": round(recency.boost(created_at), 4),
+        }
+        for cid, created_at in latest
+    ]
+
+
+def _passage_scorer(db: Session, project_id: int, query: str):
+    terms = content_terms(tokenize(query))
+    stats = load_corpus_stats(db, project_id, terms)
+
+    n = stats.doc_count[RAW_FIELD]
+    idf = {
+        term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for term in terms
+        for df in [stats.df[RAW_FIELD].get(term, 0)]
     }
 
+    return keyword_passage_scorer(terms, idf)
+
+
+def _load_blocks(
+    db: Session,
+    rankings: List[List[Dict]],
+    include_raw: bool,
+) -> Tuple[List[List[Dict]], List[Conversation]]:
+    """
+    Hydrate only the final top-k conversations (with summary), one
+    query for all rankings; blocks come back per ranking, in ranked
+    order.
+    """
+    ids = {r["conversation_id"] for ranked in rankings for r in ranked}
+
+    conversations = {
+        convo.id: convo
+        for convo in (
+            db.query(Conversation)
+            .options(joinedload(Conversation.summary), undefer_group("body"))
+            .filter(Conversation.id.in_(ids))
+            .all()
+        )
+    }
+
+    block_lists = []
+
+    for ranked in rankings:
+        blocks = []
+
+        for r in ranked:
+            convo = conversations.get(r["conversation_id"])
+            if not convo:
+                continue
+
+            blocks.append({
+                "conversation_id": convo.id,
+                "score": r["score"],
+                "raw_content": convo.raw_content if include_raw else None,
+                "summary": convo.summary.content if convo.summary else None,
+                "created_at": convo.created_at,
+            })
+
+        block_lists.append(blocks)
+
+    returned = {b["conversation_id"] for blocks in block_lists for b in blocks}
+
+    return block_lists, [conversations[cid] for cid in conversations if cid in returned]
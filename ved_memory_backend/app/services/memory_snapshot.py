@@ -0,0 +1,552 @@
+"""
+Columnar in-memory snapshots of a project's search index, scored with
+NumPy instead of per-candidate Python loops
+(MEMORY_KEYWORD_ENGINE=snapshot, see SnapshotSearchBackend).
+
+A snapshot holds what the scorers read from the posting lists, as
+arrays rather than rows:
+
+    documents   one row per indexed conversation: conversation id,
+                created_at and the token length of each field
+    postings    per field, a term x document sparse matrix of term
+                frequencies in CSC layout; for term id t the documents
+                containing it are rows[indptr[t]:indptr[t + 1]], with
+                their frequencies in tf[...]
+
+Terms are the index's tokens (lowercased and tokenized once, when the
+conversation was indexed) mapped to integer ids by a per-project
+vocabulary, so a query never touches transcript text.
+
+Freshness: a snapshot remembers the projects.revision it was built
+at. A query that finds a newer revision re-reads only the documents
+whose search_documents.indexed_at changed: their old rows are masked
+out and the new postings go to a small unsorted delta, merged into the
+CSC arrays once it outgrows MEMORY_SNAPSHOT_COMPACT_RATIO of them.
+Writes made by other processes are picked up the same way.
+
+Snapshots live in a per-process LRU bounded by
+MEMORY_SNAPSHOT_MAX_BYTES. A published snapshot is never modified: a
+refresh builds a new one that shares the unchanged arrays.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.project import Project
+from app.models.search_index import SearchDocument, SearchPosting
+from app.services.search_index import FIELDS, RAW_FIELD, SUMMARY_FIELD
+
+
+logger = logging.getLogger(__name__)
+
+# Approximate cost of one Python dict entry (vocabulary, id -> row)
+DICT_ENTRY_BYTES = 100
+
+# Deltas smaller than this are never worth a compaction
+COMPACT_MIN_POSTINGS = 10000
+
+# Keeps IN (...) lists under driver bind-parameter limits
+LOAD_BATCH_SIZE = 500
+
+EMPTY = np.zeros(0, dtype=np.int32)
+
+
+# ---------------------------------------------------
+# Building blocks
+# ---------------------------------------------------
+class Vocabulary:
+    """
+    Append-only term -> id mapping, shared by successive snapshots of
+    one project. Ids are never reused, so older snapshots stay valid.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, term: str) -> Optional[int]:
+        return self.ids.get(term)
+
+    def encode(self, terms: List[str]) -> np.ndarray:
+        ids = self.ids
+        with self._lock:
+            return np.fromiter(
+                (ids.setdefault(term, len(ids)) for term in terms),
+                dtype=np.int32,
+                count=len(terms),
+            )
+
+
+def _csc(term_ids: np.ndarray, rows: np.ndarray, tf: np.ndarray, n_terms: int):
+    """Sort (term, row, tf) triples by term; returns indptr, rows, tf."""
+    order = np.lexsort((rows, term_ids))
+
+    indptr = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=n_terms), out=indptr[1:])
+
+    return indptr, rows[order], tf[order]
+
+
+class FieldPostings:
+    """Term frequencies of one field: CSC arrays plus the recent delta."""
+
+    def __init__(self, indptr, rows, tf, delta_terms=EMPTY, delta_rows=EMPTY, delta_tf=EMPTY):
+        self.indptr = indptr
+        self.rows = rows
+        self.tf = tf
+        # Postings of documents refreshed since the last compaction
+        self.delta_terms = delta_terms
+        self.delta_rows = delta_rows
+        self.delta_tf = delta_tf
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.indptr, self.rows, self.tf,
+            self.delta_terms, self.delta_rows, self.delta_tf,
+        ))
+
+    def lookup(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term_id < len(self.indptr) - 1:
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows, tf = self.rows[start:end], self.tf[start:end]
+        else:
+            rows, tf = EMPTY, EMPTY
+
+        if len(self.delta_terms):
+            hit = self.delta_terms == term_id
+            if hit.any():
+                rows = np.concatenate((rows, self.delta_rows[hit]))
+                tf = np.concatenate((tf, self.delta_tf[hit]))
+
+        return rows, tf
+
+    def with_delta(self, terms, rows, tf) -> "FieldPostings":
+        return FieldPostings(
+            self.indptr, self.rows, self.tf,
+            np.concatenate((self.delta_terms, terms)),
+            np.concatenate((self.delta_rows, rows)),
+            np.concatenate((self.delta_tf, tf)),
+        )
+
+
+# ---------------------------------------------------
+# Snapshot
+# ---------------------------------------------------
+class ProjectSnapshot:
+    def __init__(
+        self,
+        project_id: int,
+        revision: int,
+        vocabulary: Vocabulary,
+        conversation_ids: np.ndarray,
+        created_at: np.ndarray,
+        indexed_at: List[Optional[datetime]],
+        lengths: Dict[str, np.ndarray],
+        postings: Dict[str, FieldPostings],
+        alive: Optional[np.ndarray] = None,
+    ):
+        self.project_id = project_id
+        self.revision = revision
+        self.vocabulary = vocabulary
+
+        self.conversation_ids = conversation_ids   # int64
+        self.created_at = created_at               # datetime64[us]
+        self.indexed_at = indexed_at
+        self.lengths = lengths                     # field -> int32
+        self.postings = postings
+
+        # Rows replaced by a refresh stay in the arrays until compaction
+        self.alive = alive if alive is not None else np.ones(len(conversation_ids), dtype=bool)
+        self.dead = int(len(self.alive) - np.count_nonzero(self.alive))
+
+        self.row_of = {
+            cid: row
+            for row, (cid, live) in enumerate(zip(conversation_ids.tolist(), self.alive.tolist()))
+            if live
+        }
+
+        self.nbytes = (
+            conversation_ids.nbytes
+            + created_at.nbytes
+            + self.alive.nbytes
+            + sum(a.nbytes for a in lengths.values())
+            + sum(p.nbytes for p in postings.values())
+            + (len(indexed_at) + len(self.row_of) + len(vocabulary)) * DICT_ENTRY_BYTES
+        )
+
+    @property
+    def size(self) -> int:
+        """Number of rows, including replaced ones (see `alive`)."""
+        return len(self.conversation_ids)
+
+    @property
+    def documents(self) -> int:
+        return len(self.row_of)
+
+    def postings_for(self, field: str, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, tf) of the live documents containing `term` in `field`."""
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return EMPTY, EMPTY
+
+        rows, tf = self.postings[field].lookup(term_id)
+
+        if self.dead:
+            keep = self.alive[rows]
+            rows, tf = rows[keep], tf[keep]
+
+        return rows, tf
+
+    def created_at_of(self, row: int) -> datetime:
+        return self.created_at[row].item()
+
+    # ---------------------------------------------
+    # Refresh
+    # ---------------------------------------------
+    def refreshed(self, db: Session, revision: int) -> "ProjectSnapshot":
+        """Snapshot at `revision`, re-reading only the changed documents."""
+        documents = _load_documents(db, self.project_id)
+        listed = {doc[0] for doc in documents}
+
+        changed = [
+            doc for doc in documents
+            if doc[0] not in self.row_of or self.indexed_at[self.row_of[doc[0]]] != doc[2]
+        ]
+        removed = [cid for cid in self.row_of if cid not in listed]
+
+        if len(changed) > len(documents) // 2:
+            # Mostly new (e.g. after a rebuild): one project scan is cheaper
+            return build_snapshot(db, self.project_id, revision, self.vocabulary, documents)
+
+        if not changed and not removed:
+            return self._replace(revision=revision)
+
+        alive = np.concatenate((self.alive, np.ones(len(changed), dtype=bool)))
+        for cid in removed:
+            alive[self.row_of[cid]] = False
+        for doc in changed:
+            if doc[0] in self.row_of:
+                alive[self.row_of[doc[0]]] = False
+
+        first_row = self.size
+        columns = _load_postings(
+            db,
+            self.project_id,
+            {doc[0]: first_row + offset for offset, doc in enumerate(changed)},
+            [doc[0] for doc in changed],
+        )
+        ids, created_at, indexed_at, lengths = _document_columns(changed)
+
+        snapshot = ProjectSnapshot(
+            self.project_id,
+            revision,
+            self.vocabulary,
+            np.concatenate((self.conversation_ids, ids)),
+            np.concatenate((self.created_at, created_at)),
+            self.indexed_at + indexed_at,
+            {f: np.concatenate((self.lengths[f], lengths[f])) for f in FIELDS},
+            {
+                f: self.postings[f].with_delta(
+                    self.vocabulary.encode(terms),
+                    np.asarray(rows, dtype=np.int32),
+                    np.asarray(tf, dtype=np.int32),
+                )
+                for f, (terms, rows, tf) in columns.items()
+            },
+            alive,
+        )
+
+        return snapshot.compacted() if snapshot._needs_compaction() else snapshot
+
+    def _replace(self, **changes) -> "ProjectSnapshot":
+        fields = {
+            "project_id": self.project_id,
+            "revision": self.revision,
+            "vocabulary": self.vocabulary,
+            "conversation_ids": self.conversation_ids,
+            "created_at": self.created_at,
+            "indexed_at": self.indexed_at,
+            "lengths": self.lengths,
+            "postings": self.postings,
+            "alive": self.alive,
+        }
+        fields.update(changes)
+        return ProjectSnapshot(**fields)
+
+    def _needs_compaction(self) -> bool:
+        ratio = settings.MEMORY_SNAPSHOT_COMPACT_RATIO
+
+        delta = sum(len(p.delta_rows) for p in self.postings.values())
+        base = sum(len(p.rows) for p in self.postings.values())
+
+        return (
+            delta >= max(COMPACT_MIN_POSTINGS, ratio * base)
+            or self.dead > ratio * self.size
+        )
+
+    def compacted(self) -> "ProjectSnapshot":
+        """Drop replaced rows and merge the deltas into the CSC arrays."""
+        keep = np.flatnonzero(self.alive)
+        new_row = np.full(self.size, -1, dtype=np.int32)
+        new_row[keep] = np.arange(len(keep), dtype=np.int32)
+
+        n_terms = len(self.vocabulary)
+        postings = {}
+
+        for field, p in self.postings.items():
+            base_terms = np.repeat(
+                np.arange(len(p.indptr) - 1, dtype=np.int32), np.diff(p.indptr)
+            )
+            terms = np.concatenate((base_terms, p.delta_terms))
+            rows = new_row[np.concatenate((p.rows, p.delta_rows))]
+            tf = np.concatenate((p.tf, p.delta_tf))
+
+            live = rows >= 0
+            postings[field] = FieldPostings(*_csc(terms[live], rows[live], tf[live], n_terms))
+
+        return ProjectSnapshot(
+            self.project_id,
+            self.revision,
+            self.vocabulary,
+            self.conversation_ids[keep],
+            self.created_at[keep],
+            [self.indexed_at[row] for row in keep.tolist()],
+            {f: lengths[keep] for f, lengths in self.lengths.items()},
+            postings,
+        )
+
+
+# ---------------------------------------------------
+# Loading
+# ---------------------------------------------------
+def _load_documents(db: Session, project_id: int) -> List[tuple]:
+    return db.query(
+        SearchDocument.conversation_id,
+        SearchDocument.created_at,
+        SearchDocument.indexed_at,
+        SearchDocument.raw_length,
+        SearchDocument.summary_length,
+    ).filter(
+        SearchDocument.project_id == project_id
+    ).order_by(
+        SearchDocument.conversation_id
+    ).all()
+
+
+def _document_columns(documents: List[tuple]):
+    ids = np.fromiter((doc[0] for doc in documents), dtype=np.int64, count=len(documents))
+    created_at = np.array([doc[1] for doc in documents], dtype="datetime64[us]")
+    indexed_at = [doc[2] for doc in documents]
+    lengths = {
+        RAW_FIELD: np.fromiter((doc[3] for doc in documents), dtype=np.int32, count=len(documents)),
+        SUMMARY_FIELD: np.fromiter((doc[4] for doc in documents), dtype=np.int32, count=len(documents)),
+    }
+    return ids, created_at, indexed_at, lengths
+
+
+def _load_postings(
+    db: Session,
+    project_id: int,
+    row_of: Dict[int, int],
+    conversation_ids: Optional[List[int]] = None,
+) -> Dict[str, Tuple[List[str], List[int], List[int]]]:
+    """
+    Postings of the project (or of `conversation_ids` only) as
+    field -> (terms, rows, tf) columns.
+    """
+    columns = {f: ([], [], []) for f in FIELDS}
+
+    query = db.query(
+        SearchPosting.conversation_id,
+        SearchPosting.field,
+        SearchPosting.term,
+        SearchPosting.tf,
+    ).filter(SearchPosting.project_id == project_id)
+
+    if conversation_ids is None:
+        batches = [query]
+    else:
+        batches = [
+            query.filter(SearchPosting.conversation_id.in_(
+                conversation_ids[start:start + LOAD_BATCH_SIZE]
+            ))
+            for start in range(0, len(conversation_ids), LOAD_BATCH_SIZE)
+        ]
+
+    for batch in batches:
+        for conversation_id, field, term, tf in batch:
+            row = row_of.get(conversation_id)
+            column = columns.get(field)
+            if row is None or column is None:
+                continue   # posting without a document row
+            column[0].append(term)
+            column[1].append(row)
+            column[2].append(tf)
+
+    return columns
+
+
+def build_snapshot(
+    db: Session,
+    project_id: int,
+    revision: int,
+    vocabulary: Optional[Vocabulary] = None,
+    documents: Optional[List[tuple]] = None,
+) -> ProjectSnapshot:
+    """Full snapshot of one project: one scan of its documents and postings."""
+    vocabulary = vocabulary or Vocabulary()
+    if documents is None:
+        documents = _load_documents(db, project_id)
+
+    columns = _load_postings(
+        db, project_id, {doc[0]: row for row, doc in enumerate(documents)}
+    )
+    ids, created_at, indexed_at, lengths = _document_columns(documents)
+
+    postings = {}
+    for field, (terms, rows, tf) in columns.items():
+        term_ids = vocabulary.encode(terms)
+        postings[field] = FieldPostings(*_csc(
+            term_ids,
+            np.asarray(rows, dtype=np.int32),
+            np.asarray(tf, dtype=np.int32),
+            len(vocabulary),
+        ))
+
+    return ProjectSnapshot(
+        project_id, revision, vocabulary, ids, created_at, indexed_at, lengths, postings
+    )
+
+
+# ---------------------------------------------------
+# Cache (LRU across projects, bounded by bytes)
+# ---------------------------------------------------
+class SnapshotCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+        self._snapshots: "OrderedDict[int, ProjectSnapshot]" = OrderedDict()
+        self._building: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.builds = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def _current(self, project_id: int, revision: int) -> Optional[ProjectSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(project_id)
+            if snapshot is None or snapshot.revision != revision:
+                return None
+            self._snapshots.move_to_end(project_id)
+            self.hits += 1
+            return snapshot
+
+    def get(self, db: Session, project_id: int) -> ProjectSnapshot:
+        """The project's snapshot, brought up to its current revision."""
+        # Usually already in the identity map (ownership check): no query
+        project = db.get(Project, project_id)
+        revision = project.revision if project is not None else 0
+
+        snapshot = self._current(project_id, revision)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            building = self._building.setdefault(project_id, threading.Lock())
+
+        # One build or refresh per project at a time; waiters reuse it
+        with building:
+            snapshot = self._current(project_id, revision)
+            if snapshot is not None:
+                return snapshot
+
+            with self._lock:
+                previous = self._snapshots.get(project_id)
+
+            if previous is None:
+                snapshot = build_snapshot(db, project_id, revision)
+            else:
+                snapshot = previous.refreshed(db, revision)
+
+            self._store(snapshot, refreshed=previous is not None)
+
+        return snapshot
+
+    def _store(self, snapshot: ProjectSnapshot, refreshed: bool) -> None:
+        with self._lock:
+            if refreshed:
+                self.refreshes += 1
+            else:
+                self.builds += 1
+
+            previous = self._snapshots.pop(snapshot.project_id, None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+
+            if snapshot.nbytes > self.max_bytes:
+                logger.warning(
+                    "Snapshot of project %s (%d bytes) exceeds MEMORY_SNAPSHOT_MAX_BYTES, not cached",
+                    snapshot.project_id, snapshot.nbytes,
+                )
+                return
+
+            self._snapshots[snapshot.project_id] = snapshot
+            self.bytes += snapshot.nbytes
+
+            while self.bytes > self.max_bytes:
+                project_id, evicted = self._snapshots.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self._building.pop(project_id, None)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._building.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "projects": len(self._snapshots),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "builds": self.builds,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[SnapshotCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_snapshot_cache() -> SnapshotCache:
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = SnapshotCache(settings.MEMORY_SNAPSHOT_MAX_BYTES)
+        return _cache
+
+
+def reset_snapshot_cache() -> None:
+    """Drop every snapshot (and pick up changed settings)."""
+    global _cache
+
+    with _cache_lock:
+        _cache = None
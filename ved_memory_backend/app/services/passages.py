@@ -0,0 +1,218 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.conversation import Conversation
+from app.models.passage import ConversationPassage
+from app.services.search_index import tokenize
+
+
+# Turn headers as written by the extension's extractConversation()
+TURN_PATTERN = re.compile(r"^(USER|ASSISTANT):[ \t]*$", re.MULTILINE)
+MAX_PASSAGE_CHARS = 1200
+
+
+@dataclass
+class Span:
+    position: int
+    role: Optional[str]
+    start: int
+    end: int
+
+
+# ---------------------------------------------------
+# Segmentation
+# ---------------------------------------------------
+def segment(text: str, max_chars: int = MAX_PASSAGE_CHARS) -> List[Span]:
+    """
+    Cut on USER:/ASSISTANT: turn boundaries; turns longer than
+    `max_chars` are split further on whitespace. Whitespace-only
+    spans are dropped.
+    """
+    if not text:
+        return []
+
+    turns = [(m.start(), m.group(1).lower()) for m in TURN_PATTERN.finditer(text)]
+    if not turns or turns[0][0] != 0:
+        turns.insert(0, (0, None))
+    bounds = [start for start, _ in turns] + [len(text)]
+
+    spans: List[Span] = []
+
+    for (start, role), end in zip(turns, bounds[1:]):
+        while end - start > max_chars:
+            cut = text.rfind(" ", start + max_chars // 2, start + max_chars)
+            if cut == -1:
+                cut = start + max_chars
+            spans.append(Span(len(spans), role, start, cut))
+            start = cut
+
+        if text[start:end].strip():
+            spans.append(Span(len(spans), role, start, end))
+
+    return spans
+
+
+def store_passages(db: Session, conversation: Conversation) -> None:
+    """
+    (Re)write the passage rows for a flushed conversation,
+    inside the caller's transaction.
+    """
+    db.query(ConversationPassage).filter(
+        ConversationPassage.conversation_id == conversation.id
+    ).delete(synchronize_session=False)
+
+    db.bulk_insert_mappings(
+        ConversationPassage,
+        [
+            {
+                "conversation_id": conversation.id,
+                "project_id": conversation.project_id,
+                "position": span.position,
+                "role": span.role,
+                "start_offset": span.start,
+                "end_offset": span.end,
+            }
+            for span in segment(conversation.raw_content)
+        ],
+    )
+
+
+def load_spans(db: Session, conversations: List[Conversation]) -> Dict[int, List[Span]]:
+    """
+    Stored passages for each conversation; conversations saved before
+    passages existed are segmented on the fly.
+    """
+    ids = [c.id for c in conversations]
+    spans: Dict[int, List[Span]] = {cid: [] for cid in ids}
+
+    if ids:
+        for row in (
+            db.query(ConversationPassage)
+            .filter(ConversationPassage.conversation_id.in_(ids))
+            .order_by(ConversationPassage.conversation_id, ConversationPassage.position)
+        ):
+            spans[row.conversation_id].append(
+                Span(row.position, row.role, row.start_offset, row.end_offset)
+            )
+
+    for convo in conversations:
+        if not spans[convo.id]:
+            spans[convo.id] = segment(convo.raw_content)
+
+    return spans
+
+
+# ---------------------------------------------------
+# Passage scoring & budgeted selection
+# ---------------------------------------------------
+def keyword_passage_scorer(
+    query_terms: List[str],
+    idf: Dict[str, float],
+) -> Callable[[List[str]], List[float]]:
+    """
+    Scores passages by sum(tf * idf) over the query terms, with a mild
+    length normalization so one huge passage does not always win.
+    """
+    wanted = Counter(query_terms)
+
+    def score(texts: List[str]) -> List[float]:
+        scores = []
+        for text in texts:
+            tokens = tokenize(text)
+            counts = Counter(t for t in tokens if t in wanted)
+            raw = sum(
+                tf * wanted[term] * idf.get(term, 1.0)
+                for term, tf in counts.items()
+            )
+            scores.append(raw / math.sqrt(1 + len(tokens) / 100))
+        return scores
+
+    return score
+
+
+def select_passages(
+    blocks: List[Dict],
+    texts: Dict[int, str],
+    spans: Dict[int, List[Span]],
+    score_passages: Callable[[List[str]], List[float]],
+    neighbors: int,
+    max_chars: int,
+) -> None:
+    """
+    Fill block["passages"] for every block under a shared character
+    budget. Blocks are visited round-robin in rank order: each round
+    adds the next-best matched passage of every block together with
+    `neighbors` passages on either side.
+    """
+    ranked: Dict[int, List[int]] = {}
+    scores: Dict[int, List[float]] = {}
+
+    for block in blocks:
+        cid = block["conversation_id"]
+        text = texts[cid]
+        block_scores = score_passages([text[s.start:s.end] for s in spans[cid]])
+        scores[cid] = block_scores
+
+        order = sorted(range(len(block_scores)), key=lambda i: -block_scores[i])
+        matched = [i for i in order if block_scores[i] > 0]
+        # No keyword hit (e.g. semantic match): fall back to the latest turns
+        ranked[cid] = matched or list(reversed(range(len(block_scores))))[:1]
+
+    # {conversation_id: {passage index: chars kept}}
+    chosen: Dict[int, Dict[int, int]] = {b["conversation_id"]: {} for b in blocks}
+    remaining = max_chars
+    depth = 0
+
+    while remaining > 0 and any(depth < len(r) for r in ranked.values()):
+        for block in blocks:
+            cid = block["conversation_id"]
+            if depth >= len(ranked[cid]):
+                continue
+
+            center = ranked[cid][depth]
+            window = range(
+                max(0, center - neighbors),
+                min(len(spans[cid]), center + neighbors + 1),
+            )
+
+            for index in [center] + [i for i in window if i != center]:
+                if index in chosen[cid] or remaining <= 0:
+                    continue
+
+                span = spans[cid][index]
+                length = span.end - span.start
+
+                if length > remaining and index != center:
+                    continue
+
+                kept = min(length, remaining)
+                chosen[cid][index] = kept
+                remaining -= kept
+
+        depth += 1
+
+    for block in blocks:
+        cid = block["conversation_id"]
+        text = texts[cid]
+        passages = []
+
+        for index in sorted(chosen[cid]):
+            span = spans[cid][index]
+            end = span.start + chosen[cid][index]
+
+            passages.append({
+                "position": span.position,
+                "role": span.role,
+                "start": span.start,
+                "end": end,
+                "text": text[span.start:end],
+                "score": round(scores[cid][index], 4),
+                "matched": scores[cid][index] > 0,
+            })
+
+        block["passages"] = passages
@@ -1,49 +1,150 @@
-from sqlalchemy.orm import Session
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, undefer_group
+
+from app.db.codec import unpack_text
 from app.models.conversation import Conversation
 from app.models.summary import Summary
 
 
-def get_latest_summary(user_id: int, db: Session):
-    latest_conversation = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == user_id)
+def _latest_conversation_id(user_id: int, db: Session) -> Optional[int]:
+    return db.scalar(
+        select(Conversation.id)
+        .where(Conversation.user_id == user_id)
         .order_by(Conversation.created_at.desc())
-        .first()
+        .limit(1)
     )
 
-    if not latest_conversation:
+
+def get_latest_summary(user_id: int, db: Session):
+    latest_id = _latest_conversation_id(user_id, db)
+
+    if latest_id is None:
         return None
 
     summary = (
         db.query(Summary)
-        .filter(Summary.conversation_id == latest_conversation.id)
+        .filter(Summary.conversation_id == latest_id)
         .first()
     )
 
     return summary
 
 
-def get_all_summaries(user_id: int, db: Session):
-    conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == user_id)
-        .all()
+# ---------------------------------------------------
+# mode=all: streamed as NDJSON, constant memory
+# ---------------------------------------------------
+STREAM_BATCH_SIZE = 500
+
+
+def summaries_statement(
+    user_id: int,
+    project_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    One join over the user's conversations, oldest first; raw_content
+    is never selected.
+    """
+    statement = (
+        select(
+            Summary.conversation_id,
+            Conversation.project_id,
+            Conversation.created_at,
+            Summary.updated_at,
+            Summary.content_text,
+            Summary.content_packed,
+        )
+        .join(Conversation, Conversation.id == Summary.conversation_id)
+        .where(Conversation.user_id == user_id)
     )
 
-    conversation_ids = [c.id for c in conversations]
-
-    summaries = (
-        db.query(Summary)
-        .filter(Summary.conversation_id.in_(conversation_ids))
-        .all()
+    if project_id is not None:
+        statement = statement.where(Conversation.project_id == project_id)
+    if since is not None:
+        statement = statement.where(Conversation.created_at >= since)
+    if until is not None:
+        statement = statement.where(Conversation.created_at < until)
+
+    return (
+        statement
+        .order_by(Conversation.created_at, Conversation.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
     )
 
-    return summaries
+
+class SummaryStreamEncoder:
+    """
+    Turns summary rows into NDJSON lines and stops once `max_bytes`
+    would be exceeded. `trailer()` is always the last line.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.sent = 0
+        self.count = 0
+        self.truncated = False
+
+    def encode(self, row) -> Optional[bytes]:
+        line = (json.dumps({
+            "conversation_id": row.conversation_id,
+            "project_id": row.project_id,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+            "summary": unpack_text(row.content_text, row.content_packed),
+        }) + "\n").encode("utf-8")
+
+        if self.max_bytes is not None and self.sent + len(line) > self.max_bytes:
+            self.truncated = True
+            return None
+
+        self.sent += len(line)
+        self.count += 1
+        return line
+
+    def trailer(self) -> bytes:
+        return (json.dumps({
+            "done": True,
+            "count": self.count,
+            "bytes": self.sent,
+            "truncated": self.truncated,
+        }) + "\n").encode("utf-8")
+
+
+def stream_all_summaries(db: Session, user_id: int, max_bytes: Optional[int] = None, **filters) -> Iterator[bytes]:
+    encoder = SummaryStreamEncoder(max_bytes)
+
+    for row in db.execute(summaries_statement(user_id, **filters)):
+        line = encoder.encode(row)
+        if line is None:
+            break
+        yield line
+
+    yield encoder.trailer()
+
+
+async def stream_all_summaries_async(db, user_id: int, max_bytes: Optional[int] = None, **filters) -> AsyncIterator[bytes]:
+    encoder = SummaryStreamEncoder(max_bytes)
+
+    result = await db.stream(summaries_statement(user_id, **filters))
+    async for row in result:
+        line = encoder.encode(row)
+        if line is None:
+            break
+        yield line
+
+    await result.close()
+    yield encoder.trailer()
 
 
 def get_latest_full_context(user_id: int, db: Session):
     latest_conversation = (
         db.query(Conversation)
+        .options(undefer_group("body"))
         .filter(Conversation.user_id == user_id)
         .order_by(Conversation.created_at.desc())
         .first()
@@ -59,4 +160,3 @@ def get_latest_full_context(user_id: int, db: Session):
     )
 
     return latest_conversation, summary
-
@@ -0,0 +1,58 @@
+"""
+Change markers for conditional requests.
+
+Every write that can change what a project's read endpoints return
+calls `touch_projects` in its transaction. It increments
+projects.revision and invalidates the /memory/context cache. Read
+endpoints build weak ETags from these markers with one small query
+before doing any real work.
+"""
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.project import Project
+from app.services.memory_cache import mark_project_changed
+
+
+def touch_projects(db: Session, project_ids: Iterable[int]) -> None:
+    project_ids = set(project_ids)
+    if not project_ids:
+        return
+
+    db.execute(
+        update(Project)
+        .where(Project.id.in_(project_ids))
+        .values(revision=Project.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    for project_id in project_ids:
+        mark_project_changed(db, project_id)
+
+
+def user_revision(db: Session, user_id: int) -> Tuple[int, int, int]:
+    """
+    Marker over all of a user's projects: changes when any project is
+    written to or a project is created.
+    """
+    count, revisions, last_id = db.execute(
+        select(
+            func.count(Project.id),
+            func.coalesce(func.sum(Project.revision), 0),
+            func.coalesce(func.max(Project.id), 0),
+        ).where(Project.user_id == user_id)
+    ).one()
+
+    return count, revisions, last_id
+
+
+def project_revision(db: Session, user_id: int, project_id: int) -> Optional[int]:
+    """Revision of one of the user's projects, None if not theirs."""
+    return db.scalar(
+        select(Project.revision).where(
+            Project.id == project_id,
+            Project.user_id == user_id,
+        )
+    )
@@ -0,0 +1,433 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field as dataclass_field
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Load, Session
+
+from app.models.conversation import Conversation
+from app.models.summary import Summary
+from app.models.search_index import (
+    SearchDocument,
+    SearchPosting,
+    SearchTermStat,
+    SearchCorpusStat,
+)
+from app.services.revisions import touch_projects
+
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+MAX_TERM_LENGTH = 64
+
+# Keeps multi-row statements under driver bind-parameter limits
+STATS_BATCH_SIZE = 500
+
+RAW_FIELD = "raw"
+SUMMARY_FIELD = "summary"
+FIELDS = (RAW_FIELD, SUMMARY_FIELD)
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because
+been before being below between both but by can could did do does doing
+down during each few for from further had has have having he her here hers
+herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves
+out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would
+you your yours yourself yourselves
+""".split())
+
+
+# ---------------------------------------------------
+# Tokenization
+# ---------------------------------------------------
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens (letters/digits, inner apostrophes kept,
+    underscores split). Overlong tokens (base64 blobs, hashes) are
+    dropped so they never bloat the postings table.
+    """
+    if not text:
+        return []
+
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def content_terms(tokens: Iterable[str]) -> List[str]:
+    """
+    Drop stopwords. If nothing is left (query was all stopwords),
+    keep the original tokens rather than matching nothing.
+    """
+    tokens = list(tokens)
+    kept = [t for t in tokens if t not in STOPWORDS]
+    return kept or tokens
+
+
+# ---------------------------------------------------
+# Corpus Statistics (incremental)
+# ---------------------------------------------------
+def _insert_for(db: Session):
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+
+    return None
+
+
+def _batches(terms: List[str]):
+    for start in range(0, len(terms), STATS_BATCH_SIZE):
+        yield terms[start:start + STATS_BATCH_SIZE]
+
+
+def _increment_df(db: Session, project_id: int, field: str, terms: List[str]) -> None:
+    for batch in _batches(terms):
+        _increment_df_batch(db, project_id, field, batch)
+
+
+def _increment_df_batch(db: Session, project_id: int, field: str, terms: List[str]) -> None:
+    insert = _insert_for(db)
+
+    if insert is not None:
+        stmt = insert(SearchTermStat).values([
+            {"project_id": project_id, "field": field, "term": term, "df": 1}
+            for term in terms
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["project_id", "field", "term"],
+            set_={"df": SearchTermStat.df + 1},
+        ))
+        return
+
+    # Generic fallback for other dialects
+    existing = {
+        term
+        for (term,) in db.query(SearchTermStat.term).filter(
+            SearchTermStat.project_id == project_id,
+            SearchTermStat.field == field,
+            SearchTermStat.term.in_(terms),
+        )
+    }
+    if existing:
+        db.execute(
+            update(SearchTermStat)
+            .where(
+                SearchTermStat.project_id == project_id,
+                SearchTermStat.field == field,
+                SearchTermStat.term.in_(existing),
+            )
+            .values(df=SearchTermStat.df + 1)
+        )
+    db.bulk_insert_mappings(SearchTermStat, [
+        {"project_id": project_id, "field": field, "term": term, "df": 1}
+        for term in terms
+        if term not in existing
+    ])
+
+
+def _decrement_df(db: Session, project_id: int, field: str, terms: List[str]) -> None:
+    if not terms:
+        return
+
+    for batch in _batches(terms):
+        db.execute(
+            update(SearchTermStat)
+            .where(
+                SearchTermStat.project_id == project_id,
+                SearchTermStat.field == field,
+                SearchTermStat.term.in_(batch),
+            )
+            .values(df=SearchTermStat.df - 1)
+        )
+        # Only terms this batch decremented can have reached zero
+        db.query(SearchTermStat).filter(
+            SearchTermStat.project_id == project_id,
+            SearchTermStat.field == field,
+            SearchTermStat.term.in_(batch),
+            SearchTermStat.df <= 0,
+        ).delete(synchronize_session=False)
+
+
+def _adjust_corpus(
+    db: Session,
+    project_id: int,
+    field: str,
+    old_length: int,
+    new_length: int,
+) -> None:
+    # Deltas applied in SQL: concurrent writers to other conversations
+    # of the project must not overwrite each other's totals
+    doc_delta = int(new_length > 0) - int(old_length > 0)
+    length_delta = new_length - old_length
+    insert = _insert_for(db)
+
+    if insert is not None:
+        stmt = insert(SearchCorpusStat).values(
+            project_id=project_id,
+            field=field,
+            doc_count=doc_delta,
+            total_length=length_delta,
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["project_id", "field"],
+            set_={
+                "doc_count": SearchCorpusStat.doc_count + doc_delta,
+                "total_length": SearchCorpusStat.total_length + length_delta,
+            },
+        ))
+        return
+
+    # Generic fallback for other dialects
+    updated = db.execute(
+        update(SearchCorpusStat)
+        .where(
+            SearchCorpusStat.project_id == project_id,
+            SearchCorpusStat.field == field,
+        )
+        .values(
+            doc_count=SearchCorpusStat.doc_count + doc_delta,
+            total_length=SearchCorpusStat.total_length + length_delta,
+        )
+    ).rowcount
+    if not updated:
+        db.add(SearchCorpusStat(
+            project_id=project_id,
+            field=field,
+            doc_count=doc_delta,
+            total_length=length_delta,
+        ))
+        db.flush()
+
+
+# ---------------------------------------------------
+# Index Maintenance (called inside the write transaction)
+# ---------------------------------------------------
+def _replace_field(
+    db: Session,
+    conversation: Conversation,
+    field: str,
+    text: str,
+    old_length: int,
+) -> int:
+    project_id = conversation.project_id
+
+    old_terms = [
+        term
+        for (term,) in db.query(SearchPosting.term).filter(
+            SearchPosting.conversation_id == conversation.id,
+            SearchPosting.field == field,
+        )
+    ]
+
+    db.query(SearchPosting).filter(
+        SearchPosting.conversation_id == conversation.id,
+        SearchPosting.field == field,
+    ).delete(synchronize_session=False)
+
+    tokens = tokenize(text)
+    counts = Counter(tokens)
+
+    db.bulk_insert_mappings(
+        SearchPosting,
+        [
+            {
+                "project_id": project_id,
+                "term": term,
+                "conversation_id": conversation.id,
+                "field": field,
+                "tf": tf,
+            }
+            for term, tf in counts.items()
+        ],
+    )
+
+    _decrement_df(db, project_id, field, old_terms)
+    _increment_df(db, project_id, field, list(counts))
+    _adjust_corpus(db, project_id, field, old_length, len(tokens))
+
+    return len(tokens)
+
+
+def _get_document(db: Session, conversation: Conversation) -> SearchDocument:
+    document = db.get(SearchDocument, conversation.id)
+
+    if not document:
+        document = SearchDocument(
+            conversation_id=conversation.id,
+            project_id=conversation.project_id,
+            created_at=conversation.created_at,
+            raw_length=0,
+            summary_length=0,
+        )
+        db.add(document)
+        db.flush()
+
+    return document
+
+
+def index_conversation(db: Session, conversation: Conversation) -> None:
+    """
+    Index the raw transcript of a conversation.
+    Conversation must already be flushed (id assigned).
+    """
+    document = _get_document(db, conversation)
+    document.raw_length = _replace_field(
+        db, conversation, RAW_FIELD, conversation.raw_content, document.raw_length
+    )
+    document.indexed_at = datetime.utcnow()
+
+
+def index_summary(db: Session, conversation: Conversation, content: str) -> None:
+    """
+    Re-index only the summary field; the raw postings are untouched.
+    """
+    document = _get_document(db, conversation)
+    document.summary_length = _replace_field(
+        db, conversation, SUMMARY_FIELD, content, document.summary_length
+    )
+    document.indexed_at = datetime.utcnow()
+
+
+def rebuild_project_index(db: Session, project_id: int) -> int:
+    """
+    Backfill / repair the index for one project.
+    Returns the number of conversations indexed.
+    """
+    for model in (SearchPosting, SearchDocument, SearchTermStat, SearchCorpusStat):
+        db.query(model).filter(
+            model.project_id == project_id
+        ).delete(synchronize_session=False)
+
+    rows = (
+        db.query(Conversation, Summary)
+        .options(Load(Conversation).undefer_group("body"))
+        .outerjoin(Summary, Summary.conversation_id == Conversation.id)
+        .filter(Conversation.project_id == project_id)
+        .yield_per(200)
+    )
+
+    indexed = 0
+
+    for conversation, summary in rows:
+        index_conversation(db, conversation)
+
+        if summary is not None:
+            index_summary(db, conversation, summary.content)
+
+        indexed += 1
+
+    # Rebuilt postings change rankings: new ETags, stale snapshots refresh
+    touch_projects(db, [project_id])
+    db.commit()
+
+    return indexed
+
+
+# ---------------------------------------------------
+# Retrieval
+# ---------------------------------------------------
+@dataclass
+class Candidate:
+    """A conversation reached through the posting lists."""
+
+    conversation_id: int
+    created_at: datetime
+    lengths: Dict[str, int]
+    tf: Dict[str, Dict[str, int]] = dataclass_field(
+        default_factory=lambda: {f: {} for f in FIELDS}
+    )
+
+
+@dataclass
+class CorpusStats:
+    """Precomputed statistics for one project, read once per query."""
+
+    doc_count: Dict[str, int]
+    avg_length: Dict[str, float]
+    df: Dict[str, Dict[str, int]]
+
+
+def lookup_candidates(
+    db: Session,
+    project_id: int,
+    terms: List[str],
+) -> Dict[int, Candidate]:
+    """
+    Read the posting lists for `terms` in one project.
+
+    Only posting and document rows are read; conversation bodies
+    are never loaded.
+    """
+    if not terms:
+        return {}
+
+    rows = (
+        db.query(
+            SearchPosting.conversation_id,
+            SearchPosting.field,
+            SearchPosting.term,
+            SearchPosting.tf,
+            SearchDocument.created_at,
+            SearchDocument.raw_length,
+            SearchDocument.summary_length,
+        )
+        .join(
+            SearchDocument,
+            SearchDocument.conversation_id == SearchPosting.conversation_id,
+        )
+        .filter(
+            SearchPosting.project_id == project_id,
+            SearchPosting.term.in_(set(terms)),
+        )
+        .all()
+    )
+
+    candidates: Dict[int, Candidate] = {}
+
+    for conversation_id, field, term, tf, created_at, raw_len, summary_len in rows:
+        candidate = candidates.get(conversation_id)
+        if candidate is None:
+            candidate = candidates[conversation_id] = Candidate(
+                conversation_id=conversation_id,
+                created_at=created_at,
+                lengths={RAW_FIELD: raw_len, SUMMARY_FIELD: summary_len},
+            )
+        candidate.tf[field][term] = tf
+
+    return candidates
+
+
+def load_corpus_stats(db: Session, project_id: int, terms: List[str]) -> CorpusStats:
+    doc_count = {f: 0 for f in FIELDS}
+    avg_length = {f: 0.0 for f in FIELDS}
+    df: Dict[str, Dict[str, int]] = {f: {} for f in FIELDS}
+
+    for stat in db.query(SearchCorpusStat).filter(
+        SearchCorpusStat.project_id == project_id
+    ):
+        doc_count[stat.field] = stat.doc_count
+        if stat.doc_count:
+            avg_length[stat.field] = stat.total_length / stat.doc_count
+
+    if terms:
+        for field, term, value in db.query(
+            SearchTermStat.field,
+            SearchTermStat.term,
+            SearchTermStat.df,
+        ).filter(
+            SearchTermStat.project_id == project_id,
+            SearchTermStat.term.in_(set(terms)),
+        ):
+            df[field][term] = value
+
+    return CorpusStats(doc_count=doc_count, avg_length=avg_length, df=df)
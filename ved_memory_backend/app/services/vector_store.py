@@ -0,0 +1,451 @@
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Row layout in rows.i64: conversation_id, field, start offset, end offset,
+# checksum of the chunk text
+ROW_WIDTH = 5
+FIELD_CODES = {"raw": 0, "summary": 1}
+TOMBSTONE = -1
+
+# Below this many vectors an exact scan is already fast enough
+IVF_MIN_VECTORS = 4096
+IVF_TRAIN_SAMPLE = 20000
+IVF_ITERATIONS = 8
+IVF_NPROBE = 8
+
+# Fewer tombstones than this are never worth rewriting the files
+COMPACT_MIN_ROWS = 256
+
+FILES = ("vectors.f32", "rows.i64", "ivf_centroids.f32", "ivf_assign.i32")
+
+# (start, end, checksum) of one chunk
+ChunkKey = Tuple[int, int, int]
+
+
+def chunk_key(text: str, start: int, end: int) -> ChunkKey:
+    return start, end, zlib.crc32(text[start:end].encode("utf-8"))
+
+
+# ---------------------------------------------------
+# IVF (inverted file) approximate nearest neighbour index
+# ---------------------------------------------------
+class IVFIndex:
+    """
+    Coarse k-means quantizer over normalized vectors.
+    Each vector belongs to the list of its nearest centroid; a query
+    only scans the `nprobe` closest lists.
+
+    Immutable once built: readers use an index without holding the
+    store lock, so appends build a new one (see `added`).
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        assignments: np.ndarray,
+        lists: Optional[List[np.ndarray]] = None,
+    ):
+        self.centroids = centroids
+        self.assignments = assignments
+        self.lists = lists if lists is not None else self._build_lists()
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, seed: int = 0) -> "IVFIndex":
+        n = len(vectors)
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n, IVF_TRAIN_SAMPLE)
+        sample = np.asarray(vectors[rng.choice(n, sample_size, replace=False)])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(IVF_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[c] = centroid / norm if norm else centroid
+
+        return cls(centroids, cls.assign(centroids, vectors))
+
+    @staticmethod
+    def assign(centroids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 8192):
+            block = np.asarray(vectors[start:start + 8192])
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def _build_lists(self) -> List[np.ndarray]:
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(
+            self.assignments[order], np.arange(len(self.centroids) + 1)
+        )
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def added(self, vectors: np.ndarray) -> Tuple["IVFIndex", np.ndarray]:
+        """
+        (index that also holds `vectors` as the next rows, their labels).
+        Only the lists the new rows land in are extended; this index is
+        left as it was for readers still using it.
+        """
+        labels = self.assign(self.centroids, vectors)
+        rows = np.arange(len(self.assignments), len(self.assignments) + len(labels))
+
+        lists = list(self.lists)
+        for label in np.unique(labels).tolist():
+            lists[label] = np.concatenate([lists[label], rows[labels == label]])
+
+        return IVFIndex(self.centroids, np.concatenate([self.assignments, labels]), lists), labels
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[i] for i in nearest])
+
+
+# ---------------------------------------------------
+# Per-project vector store (memory-mapped, append-only)
+# ---------------------------------------------------
+# One lock per store directory, shared by every instance opened on it
+_directory_locks: Dict[str, threading.RLock] = {}
+
+
+class ProjectVectorStore:
+    """
+    Files under VECTOR_STORE_DIR/project_<id>/:
+    - vectors.f32   float32 matrix, one row per chunk
+    - rows.i64      chunk metadata (see ROW_WIDTH)
+    - ivf_*.bin     persisted IVF centroids / assignments
+    - meta.json     dimension, embedder, row layout, sizes
+
+    Replaced chunks are tombstoned in rows.i64; chunks whose text did
+    not change keep their row and vector. Once tombstones pass
+    VECTOR_STORE_COMPACT_RATIO of the rows, and before every IVF
+    retrain, the files are rewritten without them.
+
+    Writes come from the embedding worker; reads take the lock only
+    long enough to snapshot the current views.
+    """
+
+    def __init__(self, directory: str, dim: int, embedder: str):
+        self.directory = directory
+        self.dim = dim
+        self.embedder = embedder
+        self.lock = _directory_locks.setdefault(directory, threading.RLock())
+        # Users holding the store (see open_project_store)
+        self.pins = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _reset(self) -> None:
+        for name in FILES:
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+        self.meta = {
+            "dim": self.dim,
+            "embedder": self.embedder,
+            "row_width": ROW_WIDTH,
+            "trained_on": 0,
+        }
+        self._write_meta(self.meta)
+
+    def _load(self) -> None:
+        meta = {}
+        if os.path.exists(self._path("meta.json")):
+            with open(self._path("meta.json")) as f:
+                meta = json.load(f)
+
+        if (meta.get("dim"), meta.get("embedder"), meta.get("row_width")) != (
+            self.dim, self.embedder, ROW_WIDTH
+        ):
+            # Different embedding space or row layout: start over
+            self._reset()
+        else:
+            self.meta = meta
+
+        if not self._open_views():
+            # e.g. interrupted compaction; vectors are derived data
+            logger.warning(
+                "Vector store %s is inconsistent, starting over "
+                "(python -m app.manage embed re-embeds)", self.directory
+            )
+            self._reset()
+            self._open_views()
+
+        self._index_rows()
+
+        self.ivf: Optional[IVFIndex] = None
+        if os.path.exists(self._path("ivf_centroids.f32")):
+            centroids = np.fromfile(self._path("ivf_centroids.f32"), dtype=np.float32)
+            assignments = np.fromfile(self._path("ivf_assign.i32"), dtype=np.int32)
+            if len(assignments) == self.count:
+                self.ivf = IVFIndex(centroids.reshape(-1, self.dim), assignments)
+
+    def _write_meta(self, meta: dict) -> None:
+        with open(self._path("meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    def _sizes(self) -> Tuple[int, int]:
+        return tuple(
+            os.path.getsize(self._path(name)) if os.path.exists(self._path(name)) else 0
+            for name in ("vectors.f32", "rows.i64")
+        )
+
+    def _open_views(self) -> bool:
+        """Map the files; False if vectors and rows disagree."""
+        vector_bytes, row_bytes = self._sizes()
+        count = vector_bytes // (4 * self.dim)
+        if vector_bytes != count * 4 * self.dim or row_bytes != count * 8 * ROW_WIDTH:
+            return False
+
+        self.count = count
+        if count:
+            self.vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(count, self.dim))
+            self.rows = np.memmap(self._path("rows.i64"), dtype=np.int64, mode="r+", shape=(count, ROW_WIDTH))
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+            self.rows = np.empty((0, ROW_WIDTH), dtype=np.int64)
+        return True
+
+    def _index_rows(self) -> None:
+        """Live rows per (conversation, field), and the tombstone count."""
+        live = np.flatnonzero(self.rows[:, 0] != TOMBSTONE)
+        self.chunks: Dict[Tuple[int, int], List[int]] = {}
+
+        for row, conversation_id, code in zip(
+            live.tolist(), self.rows[live, 0].tolist(), self.rows[live, 1].tolist()
+        ):
+            self.chunks.setdefault((conversation_id, code), []).append(row)
+
+        self.tombstones = self.count - len(live)
+
+    def _sync(self) -> None:
+        """Reload if the files were changed through another instance or process."""
+        if self._sizes() != (self.count * 4 * self.dim, self.count * 8 * ROW_WIDTH):
+            self._load()
+
+    # ---------------------------------------------
+    # Writes (embedding worker only)
+    # ---------------------------------------------
+    def _current(self, conversation_id: int, code: int) -> Dict[ChunkKey, int]:
+        return {
+            tuple(self.rows[row, 2:].tolist()): row
+            for row in self.chunks.get((conversation_id, code), [])
+        }
+
+    def stored_chunks(self, conversation_id: int, field: str) -> Dict[ChunkKey, int]:
+        """Chunk key -> row of the chunks currently stored for a field."""
+        with self.lock:
+            self._sync()
+            return self._current(conversation_id, FIELD_CODES[field])
+
+    def replace(
+        self,
+        conversation_id: int,
+        field: str,
+        chunks: List[ChunkKey],
+        vectors: Dict[ChunkKey, np.ndarray],
+    ) -> bool:
+        """
+        Make `chunks` the field's chunks. Stored chunks with the same key
+        are kept; `vectors` must hold the others. Returns False (nothing
+        written) if one of them is missing, e.g. because the stored
+        chunks changed since stored_chunks: ask again and retry.
+        """
+        code = FIELD_CODES[field]
+
+        with self.lock:
+            self._sync()
+            current = self._current(conversation_id, code)
+            added = [key for key in chunks if key not in current]
+            if any(key not in vectors for key in added):
+                return False
+
+            wanted = set(chunks)
+            stale = [row for key, row in current.items() if key not in wanted]
+            kept = [row for key, row in current.items() if key in wanted]
+
+            if stale:
+                self.rows[stale, 0] = TOMBSTONE
+                self.rows.flush()
+                self.tombstones += len(stale)
+
+            if added:
+                first = self.count
+                matrix = np.stack([vectors[key] for key in added]).astype(np.float32)
+                rows = np.array(
+                    [[conversation_id, code, *key] for key in added], dtype=np.int64
+                )
+
+                with open(self._path("vectors.f32"), "ab") as f:
+                    f.write(np.ascontiguousarray(matrix).tobytes())
+                with open(self._path("rows.i64"), "ab") as f:
+                    f.write(rows.tobytes())
+
+                if self.ivf is not None:
+                    self.ivf, labels = self.ivf.added(matrix)
+                    with open(self._path("ivf_assign.i32"), "ab") as f:
+                        f.write(labels.astype(np.int32).tobytes())
+
+                self._open_views()
+                kept += range(first, first + len(added))
+
+            if kept:
+                self.chunks[(conversation_id, code)] = kept
+            else:
+                self.chunks.pop((conversation_id, code), None)
+
+            if (
+                self.tombstones >= COMPACT_MIN_ROWS
+                and self.tombstones > settings.VECTOR_STORE_COMPACT_RATIO * self.count
+            ):
+                self._compact()
+
+            return True
+
+    def _rewrite(self, name: str, array: np.ndarray) -> None:
+        temporary = self._path(name + ".tmp")
+        np.ascontiguousarray(array).tofile(temporary)
+        os.replace(temporary, self._path(name))
+
+    def _compact(self) -> None:
+        """Rewrite the files without tombstoned rows (lock held)."""
+        keep = np.flatnonzero(self.rows[:, 0] != TOMBSTONE)
+
+        # Readers keep the old mappings; replaced files stay readable
+        self._rewrite("vectors.f32", np.asarray(self.vectors[keep], dtype=np.float32))
+        self._rewrite("rows.i64", np.asarray(self.rows[keep], dtype=np.int64))
+
+        if self.ivf is not None:
+            assignments = self.ivf.assignments[keep]
+            self._rewrite("ivf_assign.i32", assignments.astype(np.int32))
+            self.ivf = IVFIndex(self.ivf.centroids, assignments)
+
+        self._open_views()
+        self._index_rows()
+
+    def maybe_train(self) -> None:
+        """(Re)train the IVF index once the store has doubled in size."""
+        with self.lock:
+            self._sync()
+            if self.count - self.tombstones < IVF_MIN_VECTORS:
+                return
+            if self.ivf is not None and self.count < 2 * self.meta.get("trained_on", 0):
+                return
+
+            # Train on live vectors only
+            if self.tombstones:
+                self._compact()
+
+            ivf = IVFIndex.train(self.vectors)
+            ivf.centroids.astype(np.float32).tofile(self._path("ivf_centroids.f32"))
+            ivf.assignments.astype(np.int32).tofile(self._path("ivf_assign.i32"))
+
+            self.ivf = ivf
+            self.meta["trained_on"] = self.count
+            self._write_meta(self.meta)
+
+    # ---------------------------------------------
+    # Reads
+    # ---------------------------------------------
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[int, int, int, int, float]]:
+        """
+        Top-k chunks by cosine similarity.
+        Returns [(conversation_id, field_code, start, end, similarity)].
+        """
+        with self.lock:
+            self._sync()
+            vectors, rows, ivf = self.vectors, self.rows, self.ivf
+
+        if not len(vectors):
+            return []
+
+        if ivf is not None:
+            candidates = ivf.candidates(query, IVF_NPROBE)
+        else:
+            candidates = np.arange(len(vectors))
+
+        # Rows appended after the snapshot are not in `vectors` / `rows`
+        candidates = candidates[candidates < len(vectors)]
+        candidates = candidates[rows[candidates, 0] != TOMBSTONE]
+        if not len(candidates):
+            return []
+
+        similarities = np.asarray(vectors[candidates]) @ query
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+
+        return [
+            (*(int(v) for v in rows[candidates[i], :4]), float(similarities[i]))
+            for i in top
+        ]
+
+
+# ---------------------------------------------------
+# Open-store registry (bounded)
+# ---------------------------------------------------
+_stores: "OrderedDict[int, ProjectVectorStore]" = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def _evict() -> None:
+    # Least recently used first; stores in use stay open, so the
+    # registry can briefly hold more than VECTOR_STORE_MAX_OPEN
+    for project_id in list(_stores):
+        if len(_stores) <= settings.VECTOR_STORE_MAX_OPEN:
+            return
+        if not _stores[project_id].pins:
+            del _stores[project_id]
+
+
+@contextmanager
+def open_project_store(project_id: int, dim: int, embedder: str) -> Iterator[ProjectVectorStore]:
+    """
+    The project's store, pinned for the duration of the block so it is
+    not evicted (and reopened as a second instance) while in use.
+    """
+    with _stores_lock:
+        store = _stores.get(project_id)
+
+        if store is None or store.dim != dim or store.embedder != embedder:
+            store = ProjectVectorStore(
+                os.path.join(settings.VECTOR_STORE_DIR, f"project_{project_id}"),
+                dim=dim,
+                embedder=embedder,
+            )
+            _stores[project_id] = store
+
+        _stores.move_to_end(project_id)
+        store.pins += 1
+        _evict()
+
+    try:
+        yield store
+    finally:
+        with _stores_lock:
+            store.pins -= 1
+            _evict()
@@ -0,0 +1,117 @@
+"""
+Import throughput: one POST /conversations/save per conversation versus
+POST /conversations/bulk (JSON array and streamed NDJSON).
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.bulk_ingest [--conversations N] [--body-bytes B]
+
+Uses a temporary SQLite database unless DATABASE_URL is set; a set
+DATABASE_URL must point at a scratch database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bulk_ingest.db")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.main import app
+from app.services.jobs import drain
+from benchmarks.query_plans import migrate
+
+
+def conversations(tag: str, count: int, body_bytes: int, project_id: int) -> list:
+    filler = "bulk import of exported chat history. "
+    return [
+        {
+            "project_id": project_id,
+            "raw_content": f"USER:\n{tag} question {i}\n\nASSISTANT:\n" + filler * (body_bytes // len(filler)),
+            "conversation_key": f"{tag}-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+async def run(count: int, body_bytes: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        token = (await client.post(
+            "/auth/register", json={"email": "bulk@example.com", "password": "pw"}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        project_id = (await client.post(
+            "/projects/create", json={"name": "bulk"}, headers=headers
+        )).json()["id"]
+
+        started = time.perf_counter()
+        for item in conversations("single", count, body_bytes, project_id):
+            response = await client.post("/conversations/save", json=item, headers=headers)
+            response.raise_for_status()
+        single_insert = count / (time.perf_counter() - started)
+        drain()
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/conversations/bulk",
+            json=conversations("array", count, body_bytes, project_id),
+            headers=headers,
+        )
+        response.raise_for_status()
+        array_insert = response.json()["per_second"]
+        drain()
+        array = time.perf_counter() - started
+
+        lines = [json.dumps(item) + "\n" for item in conversations("ndjson", count, body_bytes, project_id)]
+
+        async def stream():
+            for line in lines:
+                yield line.encode("utf-8")
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/conversations/bulk",
+            content=stream(),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        ndjson_insert = response.json()["per_second"]
+        drain()
+        ndjson = time.perf_counter() - started
+
+    # End-to-end timings include running the indexing jobs (drained in
+    # this process; the ASGI transport starts no workers); "insert" is
+    # the requests alone.
+    print(f"{count} conversations of ~{body_bytes} bytes, batch size {settings.BULK_INGEST_BATCH_SIZE}")
+    for label, seconds, insert_rate in (
+        ("single saves", single, single_insert),
+        ("bulk JSON array", array, array_insert),
+        ("bulk NDJSON stream", ndjson, ndjson_insert),
+    ):
+        print(
+            f"{label:<20} {seconds:8.2f} s  {count / seconds:10.1f} conversations/s end-to-end"
+            f"  {insert_rate:10.1f} conversations/s insert"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--body-bytes", type=int, default=4000)
+    args = parser.parse_args()
+
+    migrate(create_engine(settings.DATABASE_URL, poolclass=NullPool), "head")
+    asyncio.run(run(args.conversations, args.body_bytes))
+
+
+if __name__ == "__main__":
+    main()
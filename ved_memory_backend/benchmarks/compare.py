@@ -0,0 +1,72 @@
+"""
+Compare two result files written with --output (benchmarks.micro or
+benchmarks.load): p50 / p95 / p99 per case, with the relative change.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 10] [--fail]
+
+Cases slower by more than --threshold percent (at p50 or p95) are
+marked; with --fail the exit status is 1 when any case is.
+"""
+import argparse
+import json
+import sys
+
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    parser.add_argument("--fail", action="store_true", help="exit 1 on a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline["benchmark"] != candidate["benchmark"]:
+        sys.exit(f"Different benchmarks: {baseline['benchmark']} vs {candidate['benchmark']}")
+
+    for label, document in (("baseline", baseline), ("candidate", candidate)):
+        env = document["environment"]
+        print(
+            f"{label}: {document['started_at']} commit {env['git_commit']} "
+            f"{env['database']} {env['cpus']} CPU(s)"
+        )
+    if baseline["parameters"].get("dataset") != candidate["parameters"].get("dataset"):
+        print("warning: the runs used different datasets")
+
+    print(f"\n{'case':<40}" + "".join(f"{m[:3]:>22}" for m in METRICS))
+
+    regressions = 0
+    for name, old in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if not new or not old.get("count") or not new.get("count"):
+            continue
+
+        cells = []
+        slower = False
+        for metric in METRICS:
+            delta = change(old[metric], new[metric])
+            cells.append(f"{old[metric]:8.2f} → {new[metric]:8.2f} {delta:+4.0f}%")
+            slower |= metric != "p99_ms" and delta > args.threshold
+
+        regressions += slower
+        print(f"{name:<40}" + "".join(f"{cell:>22}" for cell in cells) + ("  SLOWER" if slower else ""))
+
+    print(f"\n{regressions} case(s) slower by more than {args.threshold:g}%")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
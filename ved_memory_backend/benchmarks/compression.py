@@ -0,0 +1,122 @@
+"""
+Compression ratio and encode / decode throughput of the body codecs
+(app.db.codec) on chat transcripts.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.compression [--from-db] [--samples N]
+
+By default synthetic USER/ASSISTANT transcripts are used; --from-db
+samples the latest conversations from DATABASE_URL instead.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.core.config import settings
+from app.db import codec
+
+
+WORDS = (
+    "the a to of and in is it you that for on with this be as can not are "
+    "query index database table column function python sqlalchemy fastapi "
+    "cache latency request response error memory project conversation "
+    "summary token model search vector async session commit transaction"
+).split()
+
+
+def synthetic_transcripts(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    transcripts = []
+
+    for _ in range(count):
+        turns = []
+        for turn in range(rng.randint(4, 40)):
+            role = "USER" if turn % 2 == 0 else "ASSISTANT"
+            words = rng.randint(10, 30) if role == "USER" else rng.randint(60, 400)
+            turns.append(f"{role}:\n" + " ".join(rng.choice(WORDS) for _ in range(words)) + "\n")
+        transcripts.append("\n".join(turns))
+
+    return transcripts
+
+
+def database_transcripts(count: int) -> list:
+    from app.db.session import SessionLocal
+    from app.models.conversation import Conversation
+
+    db = SessionLocal()
+    try:
+        return [
+            c.raw_content
+            for c in db.query(Conversation).order_by(Conversation.id.desc()).limit(count)
+        ]
+    finally:
+        db.close()
+
+
+def measure(label: str, bodies: list) -> None:
+    codec.reset_codecs()
+
+    plain = sum(len(body.encode("utf-8")) for body in bodies)
+
+    started = time.perf_counter()
+    packed = [codec.pack(body, force=True) for body in bodies]
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for blob in packed:
+        codec.unpack(blob)
+    decode_seconds = time.perf_counter() - started
+
+    stored = sum(len(blob) for blob in packed)
+    mb = plain / 1e6
+
+    print(
+        f"{label:<22} {plain:>12} -> {stored:>11} bytes  "
+        f"ratio {plain / stored:5.2f}x  saved {1 - stored / plain:6.1%}  "
+        f"encode {mb / encode_seconds:8.1f} MB/s  decode {mb / decode_seconds:8.1f} MB/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--from-db", action="store_true")
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.from_db:
+        bodies = database_transcripts(args.samples)
+    else:
+        bodies = synthetic_transcripts(args.samples)
+
+    if not bodies:
+        print("no conversations to measure")
+        return
+
+    configurations = [("zlib level 6", "zlib", 6, None)]
+
+    if codec.zstandard is not None:
+        dictionary_path = os.path.join(tempfile.mkdtemp(), "bodies.dict")
+        with open(dictionary_path, "wb") as f:
+            # Train on a held-out half so the dictionary does not see the test set
+            f.write(codec.train_dictionary(bodies[::2]))
+
+        configurations += [
+            ("zstd level 3", "zstd", 3, None),
+            ("zstd level 9", "zstd", 9, None),
+            ("zstd level 3 + dict", "zstd", 3, dictionary_path),
+        ]
+        bodies = bodies[1::2]
+    else:
+        print("zstandard not installed: zlib only")
+
+    for label, name, level, dictionary in configurations:
+        settings.BODY_COMPRESSION = name
+        settings.BODY_COMPRESSION_LEVEL = level
+        settings.BODY_COMPRESSION_DICT_PATH = dictionary
+        measure(label, bodies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Synthetic, reproducible benchmark data: users, projects and
+USER:/ASSISTANT: transcripts with summaries, written through the ORM
+(body codec, ingest hashes, search index and passages included) so the
+engines see the same rows as after real saves.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.datagen [--url URL] [--profile P] [--seed S]
+
+Without --url, DATABASE_URL is used (SQLite or a local PostgreSQL). The
+database is migrated to head and seeded, so point it at a scratch
+database. Every seeded user has the password PASSWORD.
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.conversation import Conversation
+from app.models.project import Project
+from app.models.summary import Summary
+from app.models.user import User
+from app.services.ingest import set_hashes
+from app.services.passages import store_passages
+from app.services.revisions import touch_projects
+from app.services.search_index import index_conversation, index_summary
+
+
+PASSWORD = "benchmark-password"
+EMAIL_DOMAIN = "bench.example.com"
+
+# users x projects per user x conversations per project
+PROFILES = {
+    "tiny": dict(users=2, projects_per_user=2, conversations_per_project=10),
+    "small": dict(users=4, projects_per_user=3, conversations_per_project=40),
+    "medium": dict(users=10, projects_per_user=4, conversations_per_project=150),
+    "large": dict(users=25, projects_per_user=5, conversations_per_project=500),
+}
+
+SUMMARY_RATIO = 0.6
+
+COMMON = (
+    "the a to of and in is it you that for on with this be as can not are "
+    "we if so but when then use make sure need should would could also "
+    "here there what how why because first next after before again still"
+).split()
+
+# One topic per project; queries are drawn from the same vocabulary
+TOPICS = {
+    "databases": "postgres index query planner vacuum transaction isolation deadlock "
+                 "migration alembic sqlalchemy session pool replica partition",
+    "frontend": "react component state hook render props css layout flexbox "
+                "webpack bundle typescript router form validation",
+    "ml": "model training epoch gradient loss embedding tokenizer dataset "
+          "batch inference checkpoint accuracy transformer attention",
+    "devops": "docker kubernetes deployment container helm ingress nginx "
+              "terraform pipeline secrets rollout logs metrics",
+    "backend": "fastapi endpoint pydantic schema async worker cache redis "
+               "latency throughput jwt auth middleware request response",
+    "writing": "essay draft outline paragraph argument thesis tone edit "
+               "chapter introduction conclusion citation feedback",
+}
+
+CODE = (
+    "```python\n"
+    "def handler(request):\n"
+    "    result = service.run(request.{term})\n"
+    "    return {{\"{term}\": result}}\n"
+    "```\n"
+)
+
+
+@dataclass
+class SeededProject:
+    id: int
+    topic: str
+
+
+@dataclass
+class SeededUser:
+    id: int
+    email: str
+    projects: List[SeededProject] = field(default_factory=list)
+    conversation_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class Dataset:
+    profile: str
+    seed: int
+    users: List[SeededUser]
+    conversations: int
+    summaries: int
+    body_bytes: int
+
+    def describe(self) -> Dict:
+        return {
+            "profile": self.profile,
+            "seed": self.seed,
+            "users": len(self.users),
+            "projects": sum(len(u.projects) for u in self.users),
+            "conversations": self.conversations,
+            "summaries": self.summaries,
+            "body_bytes": self.body_bytes,
+        }
+
+
+# ---------------------------------------------------
+# Text
+# ---------------------------------------------------
+def _sentence(rng: random.Random, vocabulary: List[str]) -> str:
+    words = [
+        rng.choice(vocabulary) if rng.random() < 0.35 else rng.choice(COMMON)
+        for _ in range(rng.randint(6, 18))
+    ]
+    return " ".join(words).capitalize() + "."
+
+
+def _message(rng: random.Random, vocabulary: List[str], sentences: int) -> str:
+    text = " ".join(_sentence(rng, vocabulary) for _ in range(sentences))
+    if rng.random() < 0.2:
+        text += "\n\n" + CODE.format(term=rng.choice(vocabulary))
+    return text
+
+
+def transcript(rng: random.Random, topic: str) -> str:
+    """
+    Turn pairs follow a long-tailed distribution (most chats are a few
+    exchanges, some run to dozens); assistant turns are several times
+    longer than user turns.
+    """
+    vocabulary = TOPICS[topic].split()
+    pairs = min(40, max(1, int(rng.lognormvariate(1.3, 0.8))))
+
+    turns = []
+    for _ in range(pairs):
+        turns.append("USER:\n" + _message(rng, vocabulary, rng.randint(1, 3)))
+        turns.append("ASSISTANT:\n" + _message(rng, vocabulary, rng.randint(3, 14)))
+
+    return "\n\n".join(turns) + "\n"
+
+
+def summary(rng: random.Random, topic: str) -> str:
+    vocabulary = TOPICS[topic].split()
+    return " ".join(_sentence(rng, vocabulary) for _ in range(rng.randint(2, 6)))
+
+
+def queries(topic: str, count: int, seed: int = 0) -> List[str]:
+    """Memory search queries for a project of `topic` (1-4 words)."""
+    rng = random.Random(f"{seed}:{topic}")
+    vocabulary = TOPICS[topic].split()
+    return [
+        " ".join(rng.sample(vocabulary, rng.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+# ---------------------------------------------------
+# Seeding
+# ---------------------------------------------------
+def populate(engine, profile: str = "small", seed: int = 0) -> Dataset:
+    """Write the profile's data; the same (profile, seed) gives the same rows."""
+    shape = PROFILES[profile]
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    topics = sorted(TOPICS)
+    hashed_password = get_password_hash(PASSWORD)   # one hash for everyone
+
+    users: List[SeededUser] = []
+    conversations = summaries = body_bytes = 0
+
+    with Session(bind=engine) as db:
+        for u in range(shape["users"]):
+            user = User(
+                email=f"user{u}@{EMAIL_DOMAIN}",
+                hashed_password=hashed_password,
+                is_active=True,
+                resume_mode="summary",
+            )
+            db.add(user)
+            db.flush()
+            seeded = SeededUser(user.id, user.email)
+
+            for p in range(shape["projects_per_user"]):
+                topic = topics[(u + p) % len(topics)]
+                project = Project(name=f"{topic} {p}", user_id=user.id)
+                db.add(project)
+                db.flush()
+                seeded.projects.append(SeededProject(project.id, topic))
+
+                for c in range(shape["conversations_per_project"]):
+                    text = transcript(rng, topic)
+                    conversation = Conversation(
+                        user_id=user.id,
+                        project_id=project.id,
+                        conversation_key=f"bench-{project.id}-{c}",
+                        created_at=start + timedelta(minutes=rng.randint(0, 180 * 24 * 60)),
+                    )
+                    conversation.raw_content = text
+                    set_hashes(conversation)
+                    db.add(conversation)
+                    db.flush()
+
+                    index_conversation(db, conversation)
+                    store_passages(db, conversation)
+
+                    if rng.random() < SUMMARY_RATIO:
+                        content = summary(rng, topic)
+                        row = Summary(conversation_id=conversation.id, updated_at=conversation.created_at)
+                        row.content = content
+                        db.add(row)
+                        index_summary(db, conversation, content)
+                        summaries += 1
+
+                    seeded.conversation_ids.append(conversation.id)
+                    conversations += 1
+                    body_bytes += len(text.encode("utf-8"))
+
+                touch_projects(db, [project.id])
+                db.commit()
+
+            users.append(seeded)
+
+    return Dataset(profile, seed, users, conversations, summaries, body_bytes)
+
+
+def load(engine, profile: str = "", seed: int = 0) -> Dataset:
+    """Dataset descriptor of an already seeded database."""
+    users: List[SeededUser] = []
+    conversations = summaries = 0
+
+    with Session(bind=engine) as db:
+        for user in (
+            db.query(User)
+            .filter(User.email.like(f"%@{EMAIL_DOMAIN}"))
+            .order_by(User.id)
+        ):
+            seeded = SeededUser(user.id, user.email)
+
+            for project in db.query(Project).filter(Project.user_id == user.id).order_by(Project.id):
+                seeded.projects.append(SeededProject(project.id, project.name.split()[0]))
+
+            seeded.conversation_ids = [
+                row.id
+                for row in db.query(Conversation.id)
+                .filter(Conversation.user_id == user.id)
+                .order_by(Conversation.id)
+            ]
+            conversations += len(seeded.conversation_ids)
+            users.append(seeded)
+
+        summaries = db.query(func.count(Summary.id)).scalar()
+
+    return Dataset(profile, seed, users, conversations, summaries, 0)
+
+
+def ensure(engine, profile: str = "small", seed: int = 0) -> Dataset:
+    """Seed an empty database, or describe the data already there."""
+    dataset = load(engine, profile, seed)
+    if dataset.users:
+        return dataset
+    return populate(engine, profile, seed)
+
+
+def main() -> None:
+    from benchmarks.query_plans import migrate
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=settings.DATABASE_URL)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url, poolclass=NullPool)
+    migrate(engine, "head")
+
+    started = time.perf_counter()
+    dataset = populate(engine, args.profile, args.seed)
+    engine.dispose()
+
+    print(dataset.describe())
+    print(f"seeded in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Bytes fetched into ORM entities per endpoint, checked against a budget.
+
+Seeds conversations with large bodies and fails (exit 1) when an
+endpoint materializes more than its budget, e.g. because a query
+started loading raw_content again.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.fetch_bytes [--conversations N] [--body-bytes B]
+
+Uses a temporary SQLite database unless DATABASE_URL is set; a set
+DATABASE_URL must point at a scratch database.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "fetch_bytes.db")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.instrumentation import track_fetches
+from app.main import app
+from app.services.jobs import drain
+from benchmarks.query_plans import migrate
+
+
+# Everything that is not a conversation body
+OVERHEAD = 16 * 1024
+
+
+def body(index: int, size: int) -> str:
+    turn = f"USER:\nquestion {index} about sqlalchemy deferred loading\n\nASSISTANT:\n"
+    filler = "deferred columns keep large bodies out of list queries. "
+    return turn + filler * (size // len(filler))
+
+
+async def run(conversations: int, body_bytes: int) -> int:
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        token = (await client.post(
+            "/auth/register", json={"email": "bench@example.com", "password": "pw"}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        project_id = (await client.post(
+            "/projects/create", json={"name": "bench"}, headers=headers
+        )).json()["id"]
+
+        ids = []
+        for index in range(conversations):
+            saved = (await client.post(
+                "/conversations/save",
+                json={
+                    "project_id": project_id,
+                    "raw_content": body(index, body_bytes),
+                    "conversation_key": f"chat-{index}",
+                },
+                headers=headers,
+            )).json()
+            ids.append(saved["id"])
+
+            await client.post(
+                f"/summaries/{saved['id']}",
+                json={"content": f"summary {index}"},
+                headers=headers,
+            )
+
+        # Index the seeded conversations (no workers under ASGITransport)
+        drain()
+
+        one = body_bytes + OVERHEAD
+
+        # (label, method, path, json, budget in bytes)
+        checks = [
+            ("GET /projects", "GET", "/projects", None, OVERHEAD),
+            ("GET /conversations", "GET", f"/conversations?project_id={project_id}", None, OVERHEAD),
+            ("GET /conversations/{id}", "GET", f"/conversations/{ids[0]}", None, one),
+            ("GET /resume/context latest", "GET", "/resume/context?mode=latest", None, OVERHEAD),
+            ("GET /resume/context all", "GET", "/resume/context?mode=all", None, OVERHEAD),
+            ("GET /resume/context full", "GET", "/resume/context?mode=full", None, one),
+            ("POST /summaries/{id}", "POST", f"/summaries/{ids[0]}", {"content": "updated"}, OVERHEAD),
+            (
+                "POST /memory/context", "POST", "/memory/context",
+                {"project_id": project_id, "query": "deferred loading"},
+                5 * body_bytes + OVERHEAD,
+            ),
+            (
+                "POST /conversations/save (duplicate)", "POST", "/conversations/save",
+                {"project_id": project_id, "raw_content": body(0, body_bytes), "conversation_key": "chat-0"},
+                one,
+            ),
+        ]
+
+        failures = 0
+        print(f"{'endpoint':<40} {'rows':>6} {'bytes':>12} {'budget':>12}")
+
+        for label, method, path, payload, budget in checks:
+            with track_fetches() as stats:
+                response = await client.request(method, path, json=payload, headers=headers)
+
+            ok = response.status_code < 400 and stats.bytes <= budget
+            failures += not ok
+            print(
+                f"{label:<40} {stats.rows:>6} {stats.bytes:>12} {budget:>12}"
+                f"  {'ok' if ok else 'OVER BUDGET / ' + str(response.status_code)}"
+            )
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--body-bytes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    migrate(create_engine(settings.DATABASE_URL, poolclass=NullPool), "head")
+
+    failures = asyncio.run(run(args.conversations, args.body_bytes))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
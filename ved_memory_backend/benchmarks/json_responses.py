@@ -0,0 +1,155 @@
+"""
+Latency and bytes on the wire for large JSON responses: the standard
+response_model path versus JSON_RESPONSE_BACKEND=orjson, each with and
+without gzip.
+
+/memory/context is measured on result-cache hits (one warm-up request
+per configuration), so ranking time does not drown out serialization.
+Also checks that both paths return the same JSON (exit 1 otherwise).
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.json_responses [--conversations N] [--body-bytes B] [--requests R]
+
+Uses a temporary SQLite database unless DATABASE_URL is set; a set
+DATABASE_URL must point at a scratch database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "json_responses.db")
+
+import httpx
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.main import app
+from app.services.jobs import drain
+from benchmarks.query_plans import migrate
+
+
+def body(index: int, size: int) -> str:
+    turns = []
+    while sum(len(turn) for turn in turns) < size:
+        n = len(turns)
+        turns.append(
+            f"USER:\nquestion {index}.{n} about serializing large responses\n\n"
+            f"ASSISTANT:\nanswer {n} with \"quotes\", unicode ✓ and numbers {index * n}\n\n"
+        )
+    return "".join(turns)
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def measure(client, method, path, payload, headers, requests):
+    latencies = []
+    wire = 0
+
+    # Warm-up: fills the memory cache and the connection pool
+    (await client.request(method, path, json=payload, headers=headers)).raise_for_status()
+
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.request(method, path, json=payload, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        wire = response.num_bytes_downloaded
+
+    return response.json(), latencies, wire
+
+
+async def run(conversations: int, body_bytes: int, requests: int) -> int:
+    plain = httpx.ASGITransport(app=app)
+    gzipped = httpx.ASGITransport(app=GZipMiddleware(
+        app,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+        compresslevel=settings.RESPONSE_COMPRESSION_LEVEL,
+    ))
+
+    async with httpx.AsyncClient(transport=plain, base_url="http://test", timeout=None) as client:
+        token = (await client.post(
+            "/auth/register", json={"email": "json@example.com", "password": "pw"}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        project_id = (await client.post(
+            "/projects/create", json={"name": "json"}, headers=headers
+        )).json()["id"]
+
+        for index in range(conversations):
+            saved = (await client.post(
+                "/conversations/save",
+                json={"project_id": project_id, "raw_content": body(index, body_bytes)},
+                headers=headers,
+            )).json()
+            await client.post(
+                f"/summaries/{saved['id']}", json={"content": f"summary {index}"}, headers=headers
+            )
+        drain()
+
+    checks = [
+        (
+            "POST /memory/context (include_raw)", "POST", "/memory/context",
+            {"project_id": project_id, "query": "serializing responses", "include_raw": True},
+        ),
+        ("GET /conversations/{id}", "GET", f"/conversations/{saved['id']}", None),
+        ("GET /resume/context full", "GET", "/resume/context?mode=full", None),
+    ]
+
+    failures = 0
+    print(f"{conversations} conversations of ~{body_bytes} bytes, {requests} requests each")
+    print(f"{'endpoint':<36} {'backend':<9} {'gzip':<5} {'p50 ms':>8} {'p99 ms':>8} {'wire bytes':>11}")
+
+    for label, method, path, payload in checks:
+        baseline = None
+
+        for backend in ("standard", "orjson"):
+            settings.JSON_RESPONSE_BACKEND = backend
+
+            for gzip, transport in (("no", plain), ("yes", gzipped)):
+                async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+                    data, latencies, wire = await measure(
+                        client, method, path, payload,
+                        {**headers, "Accept-Encoding": "gzip" if gzip == "yes" else "identity"},
+                        requests,
+                    )
+
+                if baseline is None:
+                    baseline = data
+                elif data != baseline:
+                    failures += 1
+                    print(f"{label}: {backend} response differs from standard")
+
+                print(
+                    f"{label:<36} {backend:<9} {gzip:<5} "
+                    f"{statistics.median(latencies):8.2f} {percentile(latencies, 0.99):8.2f} {wire:>11}"
+                )
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--body-bytes", type=int, default=400_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    migrate(create_engine(settings.DATABASE_URL, poolclass=NullPool), "head")
+
+    failures = asyncio.run(run(args.conversations, args.body_bytes, args.requests))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
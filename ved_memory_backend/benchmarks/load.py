@@ -0,0 +1,199 @@
+"""
+HTTP load driver: concurrent virtual users against the FastAPI app
+in-process (httpx ASGI transport, no network), with a weighted mix of
+read and write requests. Reports throughput and p50/p95/p99 per
+scenario and overall.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.load [--profile P] [--concurrency C] [--duration S]
+                              [--mix memory=6,projects=1,...] [--output results.json]
+
+The app's lifespan runs as under uvicorn, so background job workers
+index the conversations saved during the run. Seeds a temporary SQLite
+database with benchmarks.datagen unless DATABASE_URL is set; a set
+DATABASE_URL must point at a scratch database (an already seeded one is
+reused as is).
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "load.db")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.main import app
+from app.services.memory_cache import reset_memory_cache
+from benchmarks import datagen, results
+from benchmarks.query_plans import migrate
+
+
+QUERIES_PER_TOPIC = 20
+
+# Scenario weights: mostly memory lookups and listings, a few saves
+DEFAULT_MIX = "memory=6,projects=1,conversations=2,conversation=2,resume_latest=1,resume_all=1,save=1"
+
+
+# ---------------------------------------------------
+# Scenarios: (method, path, json) for one virtual user
+# ---------------------------------------------------
+class VirtualUser:
+    def __init__(self, index: int, user: datagen.SeededUser, dataset: datagen.Dataset):
+        self.index = index
+        self.user = user
+        self.rng = random.Random(f"{dataset.seed}:{index}")
+        self.queries = {
+            project.topic: datagen.queries(project.topic, QUERIES_PER_TOPIC, dataset.seed)
+            for project in user.projects
+        }
+        self.saved = 0
+        self.headers = {}
+
+    def project(self):
+        return self.rng.choice(self.user.projects)
+
+    def memory(self):
+        project = self.project()
+        return "POST", "/memory/context", {
+            "project_id": project.id,
+            "query": self.rng.choice(self.queries[project.topic]),
+        }
+
+    def projects(self):
+        return "GET", "/projects", None
+
+    def conversations(self):
+        return "GET", f"/conversations?project_id={self.project().id}", None
+
+    def conversation(self):
+        return "GET", f"/conversations/{self.rng.choice(self.user.conversation_ids)}", None
+
+    def resume_latest(self):
+        return "GET", "/resume/context?mode=latest", None
+
+    def resume_all(self):
+        return "GET", "/resume/context?mode=all", None
+
+    def save(self):
+        project = self.project()
+        self.saved += 1
+        return "POST", "/conversations/save", {
+            "project_id": project.id,
+            "raw_content": datagen.transcript(self.rng, project.topic),
+            "conversation_key": f"load-{self.index}-{self.saved}",
+        }
+
+
+SCENARIOS = (
+    "memory", "projects", "conversations", "conversation",
+    "resume_latest", "resume_all", "save",
+)
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+# ---------------------------------------------------
+# Driver
+# ---------------------------------------------------
+async def virtual_user(client, vu: VirtualUser, weights: dict, deadline: float, latencies, errors):
+    login = await client.post(
+        "/auth/login", json={"email": vu.user.email, "password": datagen.PASSWORD}
+    )
+    login.raise_for_status()
+    vu.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    names = list(weights)
+    cumulative = list(weights.values())
+
+    while time.perf_counter() < deadline:
+        name = vu.rng.choices(names, cumulative)[0]
+        method, path, payload = getattr(vu, name)()
+
+        started = time.perf_counter()
+        response = await client.request(method, path, json=payload, headers=vu.headers)
+        await response.aread()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        if response.status_code >= 400:
+            errors[name][response.status_code] += 1
+        else:
+            latencies[name].append(elapsed)
+
+
+async def run(dataset: datagen.Dataset, concurrency: int, duration: float, weights: dict) -> dict:
+    latencies = defaultdict(list)
+    errors = defaultdict(lambda: defaultdict(int))
+    users = [
+        VirtualUser(i, dataset.users[i % len(dataset.users)], dataset)
+        for i in range(concurrency)
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                virtual_user(client, vu, weights, started + duration, latencies, errors)
+                for vu in users
+            ))
+            elapsed = time.perf_counter() - started
+
+    out = {name: results.summarize(latencies[name], elapsed) for name in weights}
+    out["all"] = results.summarize(
+        [ms for name in weights for ms in latencies[name]], elapsed
+    )
+
+    for name, statuses in errors.items():
+        out[name]["errors"] = dict(statuses)
+    out["all"]["errors"] = sum(sum(statuses.values()) for statuses in errors.values())
+
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(datagen.PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--no-cache", action="store_true", help="MEMORY_CACHE_BACKEND=off")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        settings.MEMORY_CACHE_BACKEND = "off"
+        reset_memory_cache()
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    migrate(engine, "head")
+    dataset = datagen.ensure(engine, args.profile, args.seed)
+    engine.dispose()
+
+    print(dataset.describe())
+    out = asyncio.run(run(dataset, args.concurrency, args.duration, parse_mix(args.mix)))
+    results.print_table(out)
+    print(f"errors: {out['all']['errors']}")
+
+    results.write(args.output, "load", {**vars(args), "dataset": dataset.describe()}, out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Login latency under a burst of concurrent logins, and what the burst
+does to an unrelated route (GET /projects), with password hashing in
+the API threadpool (PASSWORD_HASH_WORKERS=0) versus the process pool.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.login [--logins N] [--concurrency C] [--workers W]
+
+Uses a temporary SQLite database unless DATABASE_URL is set; a set
+DATABASE_URL must point at a scratch database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "login.db")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.security import shutdown_hash_pool
+from app.main import app
+from benchmarks.query_plans import migrate
+
+
+EMAIL = "login-bench@example.com"
+PASSWORD = "login-bench-password"
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def timed(coro) -> float:
+    started = time.perf_counter()
+    response = await coro
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def burst(client, token: str, logins: int, concurrency: int):
+    limit = asyncio.Semaphore(concurrency)
+    login_ms, other_ms = [], []
+    done = asyncio.Event()
+
+    async def login():
+        async with limit:
+            login_ms.append(await timed(client.post(
+                "/auth/login", json={"email": EMAIL, "password": PASSWORD}
+            )))
+
+    async def probe():
+        # Another user of the API, one request at a time during the burst
+        while not done.is_set():
+            other_ms.append(await timed(client.get(
+                "/projects", headers={"Authorization": f"Bearer {token}"}
+            )))
+            await asyncio.sleep(0.01)
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+
+    return login_ms, other_ms, elapsed
+
+
+def row(name: str, values) -> str:
+    return (
+        f"  {name:<16} p50 {statistics.median(values):8.1f} ms"
+        f"   p99 {percentile(values, 0.99):8.1f} ms   n={len(values)}"
+    )
+
+
+async def run(logins: int, concurrency: int, workers: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        token = (await client.post(
+            "/auth/register", json={"email": EMAIL, "password": PASSWORD}
+        )).json()["access_token"]
+
+        for mode in (0, workers):
+            settings.PASSWORD_HASH_WORKERS = mode
+            shutdown_hash_pool()
+
+            # Warm-up: starts the pool processes outside the measurement
+            await timed(client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD}))
+
+            login_ms, other_ms, elapsed = await burst(client, token, logins, concurrency)
+            label = "threadpool" if mode == 0 else f"{mode} hash processes"
+            print(f"{label}: {logins / elapsed:.1f} logins/s")
+            print(row("POST /auth/login", login_ms))
+            print(row("GET /projects", other_ms))
+
+    shutdown_hash_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=max(1, settings.PASSWORD_HASH_WORKERS))
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    migrate(engine, "head")
+    engine.dispose()
+
+    print(
+        f"{settings.PASSWORD_SCHEME} (bcrypt rounds {settings.BCRYPT_ROUNDS}), "
+        f"{args.logins} logins, {args.concurrency} concurrent, {os.cpu_count()} CPU(s)"
+    )
+    asyncio.run(run(args.logins, args.concurrency, args.workers))
+
+
+if __name__ == "__main__":
+    main()
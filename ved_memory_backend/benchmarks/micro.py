@@ -0,0 +1,212 @@
+"""
+Microbenchmarks for the engines and serialization, called directly (no
+HTTP): get_memory_context per scorer, a batch of lookups against
+get_memory_context_batch versus the same lookups one by one, the resume
+summary stream and latest full context, and response serialization
+(response_model + stdlib json versus orjson).
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.micro [--profile P] [--repeat N] [--scorers legacy,bm25]
+                               [--output results.json]
+
+Seeds a temporary SQLite database with benchmarks.datagen unless
+DATABASE_URL is set; a set DATABASE_URL must point at a scratch
+database (an already seeded one is reused as is).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "micro.db")
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.api.fast_json import ORJSONResponse, orjson
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.schemas.memory import MemoryContextResponse
+from app.services.memory_engine import get_memory_context, get_memory_context_batch
+from app.services.resume_engine import get_latest_full_context, stream_all_summaries
+from benchmarks import datagen, results
+from benchmarks.query_plans import migrate
+
+
+QUERIES_PER_TOPIC = 20
+WARMUP = 3
+# Lookups per batch case: queries x every project of one user
+BATCH_QUERIES = 3
+
+
+def measure(fn, repeat: int):
+    """Per-call latencies (ms) of fn(i) for i in range(repeat), after a warm-up."""
+    for i in range(WARMUP):
+        fn(i)
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    return results.summarize(latencies, time.perf_counter() - started)
+
+
+# ---------------------------------------------------
+# Cases
+# ---------------------------------------------------
+def lookups(dataset: datagen.Dataset):
+    """Deterministic (user id, project id, query) rotation over the dataset."""
+    pairs = [(user.id, project) for user in dataset.users for project in user.projects]
+    topic_queries = {
+        topic: datagen.queries(topic, QUERIES_PER_TOPIC, dataset.seed) for topic in datagen.TOPICS
+    }
+
+    def lookup(i: int):
+        user_id, project = pairs[i % len(pairs)]
+        return user_id, project.id, topic_queries[project.topic][i % QUERIES_PER_TOPIC]
+
+    return lookup
+
+
+def memory_case(lookup, scorer: str, include_raw: bool = False):
+    def run(i: int):
+        user_id, project_id, query = lookup(i)
+        with SessionLocal() as db:
+            return get_memory_context(
+                project_id=project_id,
+                query=query,
+                db=db,
+                current_user=db.get(User, user_id),
+                scorer=scorer,
+                include_raw=include_raw,
+            )
+
+    return run
+
+
+def batch_cases(dataset: datagen.Dataset, scorer: str):
+    """
+    BATCH_QUERIES queries over all of a user's projects: one
+    get_memory_context_batch call versus one get_memory_context call
+    per (project, query).
+    """
+    def lookups(i: int):
+        user = dataset.users[i % len(dataset.users)]
+        topic = user.projects[0].topic
+        offset = i % (QUERIES_PER_TOPIC - BATCH_QUERIES)
+        queries = datagen.queries(topic, QUERIES_PER_TOPIC, dataset.seed)[offset:offset + BATCH_QUERIES]
+        return user, [(project.id, query) for project in user.projects for query in queries]
+
+    def batch(i: int):
+        user, pairs = lookups(i)
+        with SessionLocal() as db:
+            return get_memory_context_batch(
+                db, db.get(User, user.id), pairs, scorer=scorer
+            )
+
+    def single(i: int):
+        user, pairs = lookups(i)
+        with SessionLocal() as db:
+            current_user = db.get(User, user.id)
+            return [
+                get_memory_context(project_id, query, db, current_user, scorer=scorer)
+                for project_id, query in pairs
+            ]
+
+    return {"batch": batch, "single": single}
+
+
+def summaries_case(dataset: datagen.Dataset):
+    def run(i: int):
+        user = dataset.users[i % len(dataset.users)]
+        with SessionLocal() as db:
+            return sum(len(line) for line in stream_all_summaries(db, user.id))
+
+    return run
+
+
+def full_context_case(dataset: datagen.Dataset):
+    def run(i: int):
+        user = dataset.users[i % len(dataset.users)]
+        with SessionLocal() as db:
+            conversation, summary = get_latest_full_context(user.id, db)
+            return len(conversation.raw_content), summary
+
+    return run
+
+
+def serialization_cases(payloads):
+    """
+    standard: what FastAPI does for response_model (validate, dump to
+    JSON-compatible data, stdlib json); orjson: fast_json's response.
+    """
+    def standard(i: int):
+        data = MemoryContextResponse.model_validate(payloads[i % len(payloads)])
+        return json.dumps(
+            data.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def fast(i: int):
+        return ORJSONResponse(payloads[i % len(payloads)]).body
+
+    cases = {"standard": standard}
+    if orjson is not None:
+        cases["orjson"] = fast
+    return cases
+
+
+def run(dataset: datagen.Dataset, repeat: int, scorers) -> dict:
+    lookup = lookups(dataset)
+    out = {}
+
+    for scorer in scorers:
+        out[f"memory_context[{scorer}]"] = measure(memory_case(lookup, scorer), repeat)
+
+    for name, case in batch_cases(dataset, scorers[0]).items():
+        out[f"memory_context.{name}[{scorers[0]}]"] = measure(case, repeat)
+
+    out["resume.stream_all_summaries"] = measure(summaries_case(dataset), repeat)
+    out["resume.latest_full_context"] = measure(full_context_case(dataset), repeat)
+
+    # Response-shaped payloads, with and without transcripts
+    for label, include_raw in (("memory", False), ("memory+raw", True)):
+        compute = memory_case(lookup, scorers[0], include_raw)
+        payloads = [compute(i) for i in range(QUERIES_PER_TOPIC)]
+        for name, case in serialization_cases(payloads).items():
+            out[f"serialize.{label}[{name}]"] = measure(case, repeat)
+            size = len(case(0))
+            out[f"serialize.{label}[{name}]"]["bytes"] = size
+
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(datagen.PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--scorers", default="legacy,bm25",
+                        help="comma separated: legacy, bm25, fulltext")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    migrate(engine, "head")
+    dataset = datagen.ensure(engine, args.profile, args.seed)
+    engine.dispose()
+
+    print(dataset.describe())
+    out = run(dataset, args.repeat, args.scorers.split(","))
+    results.print_table(out)
+
+    results.write(args.output, "micro", {**vars(args), "dataset": dataset.describe()}, out)
+
+
+if __name__ == "__main__":
+    main()
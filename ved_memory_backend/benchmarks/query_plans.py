@@ -0,0 +1,161 @@
+"""
+Query plans and timings for the hot conversation / summary lookups,
+before (revision 0001) and after (head) the composite indexes.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.query_plans [--url URL] [--conversations N]
+
+Without --url a temporary SQLite file is used. A --url database is
+migrated and seeded, so point it at a scratch database.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import column, create_engine, insert, table, text
+from sqlalchemy.pool import NullPool
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seeded at revision 0001: only its columns, without the ORM models'
+# defaults for columns added later
+User = table("users", column("id"), column("email"), column("hashed_password"))
+Project = table("projects", column("id"), column("name"), column("user_id"))
+Conversation = table(
+    "conversations",
+    column("id"),
+    column("raw_content"),
+    column("created_at"),
+    column("user_id"),
+    column("project_id"),
+)
+Summary = table("summaries", column("conversation_id"), column("content"), column("updated_at"))
+
+# (name, sql) with the parameters of a busy user / project
+QUERIES = [
+    (
+        "memory latest conversations",
+        "SELECT id, created_at FROM conversations "
+        "WHERE project_id = :project_id AND user_id = :user_id "
+        "ORDER BY created_at DESC LIMIT 5",
+    ),
+    (
+        "resume latest conversation",
+        "SELECT id FROM conversations "
+        "WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1",
+    ),
+    (
+        "listing page (project)",
+        "SELECT id, project_id, created_at FROM conversations "
+        "WHERE user_id = :user_id AND project_id = :project_id "
+        "ORDER BY created_at DESC, id DESC LIMIT 51",
+    ),
+    (
+        "summary by conversation",
+        "SELECT id, content FROM summaries WHERE conversation_id = :conversation_id",
+    ),
+]
+
+
+def migrate(engine, revision: str) -> None:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def seed(engine, conversations: int, users: int = 20, projects_per_user: int = 5) -> dict:
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": u, "email": f"user{u}@example.com", "hashed_password": "x"}
+            for u in range(1, users + 1)
+        ])
+        connection.execute(insert(Project), [
+            {"id": (u - 1) * projects_per_user + p, "name": f"p{p}", "user_id": u}
+            for u in range(1, users + 1)
+            for p in range(1, projects_per_user + 1)
+        ])
+
+        rows = []
+        for cid in range(1, conversations + 1):
+            user_id = rng.randint(1, users)
+            rows.append({
+                "id": cid,
+                "raw_content": "USER:\nhello\nASSISTANT:\nhi",
+                "created_at": start + timedelta(minutes=cid),
+                "user_id": user_id,
+                "project_id": (user_id - 1) * projects_per_user + rng.randint(1, projects_per_user),
+            })
+            if len(rows) == 5000:
+                connection.execute(insert(Conversation), rows)
+                rows = []
+        if rows:
+            connection.execute(insert(Conversation), rows)
+
+        connection.execute(insert(Summary), [
+            {"conversation_id": cid, "content": "summary", "updated_at": start}
+            for cid in range(1, conversations + 1, 3)
+        ])
+
+    return {"user_id": 1, "project_id": 1, "conversation_id": conversations // 2}
+
+
+def explain(connection, sql: str, params: dict) -> str:
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+        return "\n".join(row[-1] for row in rows)
+
+    rows = connection.execute(text("EXPLAIN " + sql), params).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def timed(connection, sql: str, params: dict, repeat: int = 50) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        connection.execute(text(sql), params).all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def report(engine, label: str, params: dict) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+
+        print(f"\n=== {label} ===")
+        for name, sql in QUERIES:
+            print(f"\n-- {name}: {timed(connection, sql, params):.3f} ms")
+            print(explain(connection, sql, params))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url")
+    parser.add_argument("--conversations", type=int, default=100000)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "query_plans.db")
+
+    engine = create_engine(url, poolclass=NullPool)
+
+    migrate(engine, "0001")
+    params = seed(engine, args.conversations)
+    report(engine, "before (revision 0001)", params)
+
+    migrate(engine, "head")
+    report(engine, "after (head)", params)
+
+
+if __name__ == "__main__":
+    main()
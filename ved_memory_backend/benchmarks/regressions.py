@@ -0,0 +1,306 @@
+"""
+Regression checks for bugs that were fixed and must stay fixed.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.regressions [--only NAME[,NAME...]]
+
+Every check drives the API in process against one scratch database
+(migrated to head) with its own user and project, prints ok / FAIL
+with the reason, and the run exits 1 if any check failed.
+
+Uses a temporary SQLite database unless DATABASE_URL is set; a set
+DATABASE_URL must point at a scratch database.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import traceback
+from contextlib import contextmanager
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "regressions.db")
+# Checks drain the job queue themselves
+os.environ.setdefault("JOBS_WORKERS", "0")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.conversation import Conversation
+from app.models.project import Project
+from app.services import ingest
+from app.services.jobs import drain
+from benchmarks.query_plans import migrate
+
+
+CHECKS = {}
+_users = itertools.count(1)
+
+
+def check(fn):
+    CHECKS[fn.__name__] = fn
+    return fn
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+@contextmanager
+def override(**values):
+    """Temporarily change settings (read at call time by the code under test)."""
+    saved = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+@contextmanager
+def queries_on_event_loop():
+    """Collects SQL run on the event loop thread (blocking the loop)."""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return   # threadpool / run_sync
+        statements.append(" ".join(statement.split())[:80])
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def new_project(client: TestClient):
+    """(auth headers, project id) for a fresh user."""
+    token = client.post(
+        "/auth/register",
+        json={"email": f"check{next(_users)}@example.com", "password": "pw"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    project_id = client.post("/projects/create", json={"name": "checks"}, headers=headers).json()["id"]
+    return headers, project_id
+
+
+def save(client: TestClient, headers: dict, project_id: int, text: str, **extra) -> dict:
+    response = client.post(
+        "/conversations/save",
+        json={"project_id": project_id, "raw_content": text, **extra},
+        headers=headers,
+    )
+    expect(response.status_code < 400, f"save returned {response.status_code}: {response.text}")
+    drain()
+    return response.json()
+
+
+# ---------------------------------------------------
+# Checks
+# ---------------------------------------------------
+@check
+def fulltext_packed_bodies(client: TestClient) -> None:
+    """The fulltext scorer must find conversations stored compressed."""
+    headers, project_id = new_project(client)
+
+    with override(BODY_COMPRESSION="zlib", BODY_COMPRESSION_MIN_BYTES=16):
+        packed = save(client, headers, project_id, "USER:\nwhere do quokkas live?\n\nASSISTANT:\nRottnest Island.\n" * 4)
+        # Newer and without the term: what a no-match fallback would return first
+        save(client, headers, project_id, "USER:\nhello\n\nASSISTANT:\nhi there, nothing else here\n" * 4)
+
+        with SessionLocal() as db:
+            row = db.get(Conversation, packed["id"])
+            expect(row.raw_packed is not None and row.raw_text == "", "body was not stored packed")
+
+        response = client.post(
+            "/memory/context",
+            json={"project_id": project_id, "query": "quokkas", "scorer": "fulltext"},
+            headers=headers,
+        )
+
+    blocks = response.json()["context_blocks"]
+    expect(response.status_code == 200, f"memory/context returned {response.status_code}")
+    expect(
+        blocks and blocks[0]["conversation_id"] == packed["id"],
+        f"packed conversation {packed['id']} not ranked first: {[b['conversation_id'] for b in blocks]}",
+    )
+
+
+@check
+def auth_tokens_off_event_loop(client: TestClient) -> None:
+    """Issuing and rotating tokens must not load the user on the event loop."""
+    email = f"check{next(_users)}@example.com"
+
+    with queries_on_event_loop() as statements:
+        tokens = client.post("/auth/register", json={"email": email, "password": "pw"}).json()
+        tokens = client.post("/auth/login", json={"email": email, "password": "pw"}).json()
+        refreshed = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        expect(refreshed.status_code == 200, f"refresh returned {refreshed.status_code}")
+
+        changed = client.post(
+            "/auth/password",
+            json={"current_password": "pw", "new_password": "pw2"},
+            headers={"Authorization": "Bearer " + refreshed.json()["access_token"]},
+        )
+        expect(changed.status_code == 200, f"password change returned {changed.status_code}")
+
+    expect(not statements, f"{len(statements)} queries on the event loop: {statements[:3]}")
+
+
+def bulk(client: TestClient, headers: dict, items: list) -> list:
+    response = client.post("/conversations/bulk", json=items, headers=headers)
+    expect(response.status_code == 200, f"bulk returned {response.status_code}: {response.text[:200]}")
+    drain()
+    return [(item["status"], item.get("id")) for item in response.json()["items"]]
+
+
+@check
+def bulk_duplicate_keys(client: TestClient) -> None:
+    """Repeated conversation_keys give per-item results, never a 500."""
+    headers, project_id = new_project(client)
+
+    def item(key: str, text: str) -> dict:
+        return {"project_id": project_id, "conversation_key": key, "raw_content": f"USER:\n{text}\n"}
+
+    # Within one batch: same content resolves to the first copy
+    first = bulk(client, headers, [item("a", "one"), item("a", "one"), item("a", "two")])
+    expect(
+        [status for status, _ in first] == ["created", "duplicate", "error"] and first[1][1] == first[0][1],
+        f"within a batch: {first}",
+    )
+
+    # Across batches of the same request, and against earlier requests
+    with override(BULK_INGEST_BATCH_SIZE=1):
+        across = bulk(client, headers, [item("b", "three"), item("b", "three"), item("a", "one"), item("b", "four")])
+    expect(
+        [status for status, _ in across] == ["created", "duplicate", "duplicate", "error"]
+        and across[1][1] == across[0][1] and across[2][1] == first[0][1],
+        f"across batches: {across}",
+    )
+
+    # A concurrent import commits the same keys between the lookup and the INSERT
+    real_pack = ingest.pack
+    raced = []
+
+    def pack_after_concurrent_import(text):
+        if not raced:
+            raced.append(True)
+            with SessionLocal() as other:
+                for key, body in (("c", "five"), ("d", "other")):
+                    other.add(Conversation(
+                        user_id=user_id, project_id=project_id, conversation_key=key,
+                        raw_content=f"USER:\n{body}\n", content_hash=ingest.content_hash(f"USER:\n{body}\n"),
+                    ))
+                other.commit()
+        return real_pack(text)
+
+    with SessionLocal() as db:
+        user_id = db.get(Project, project_id).user_id
+
+    ingest.pack = pack_after_concurrent_import
+    try:
+        raced_results = bulk(client, headers, [item("c", "five"), item("d", "six"), item("e", "seven")])
+    finally:
+        ingest.pack = real_pack
+
+    expect(
+        [status for status, _ in raced_results] == ["duplicate", "error", "created"],
+        f"concurrent import: {raced_results}",
+    )
+
+
+@check
+def listing_pagination_created_at(client: TestClient) -> None:
+    """Every conversation has a created_at, and cursors page through all of them."""
+    headers, project_id = new_project(client)
+
+    with SessionLocal() as db:
+        user_id = db.get(Project, project_id).user_id
+        try:
+            db.execute(insert(Conversation).values(
+                user_id=user_id, project_id=project_id, raw_text="USER:\nno date\n", created_at=None,
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        else:
+            raise CheckFailed("a conversation without created_at was accepted")
+
+    # Same created_at for several rows: the id breaks the tie
+    same_time = "2026-01-01T00:00:00"
+    ids = [
+        item_id for _, item_id in bulk(client, headers, [
+            {"project_id": project_id, "raw_content": f"USER:\npage {i}\n", "created_at": same_time if i % 2 else None}
+            for i in range(7)
+        ])
+    ]
+
+    seen, cursor = [], None
+    while True:
+        url = f"/conversations?project_id={project_id}&limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=headers)
+        expect(response.status_code == 200, f"listing returned {response.status_code}")
+        page = response.json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    expect(sorted(seen) == sorted(ids) and len(seen) == len(set(seen)), f"paged {seen}, expected {ids}")
+
+
+def run(names) -> int:
+    failures = 0
+
+    with TestClient(app) as client:
+        for name in names:
+            try:
+                CHECKS[name](client)
+            except Exception as exc:
+                failures += 1
+                print(f"FAIL  {name}: {exc}")
+                if not isinstance(exc, CheckFailed):
+                    traceback.print_exc()
+            else:
+                print(f"ok    {name}")
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", help="comma separated check names: " + ", ".join(CHECKS))
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(CHECKS)
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(unknown)}")
+
+    migrate(create_engine(settings.DATABASE_URL, poolclass=NullPool), "head")
+
+    failures = run(names)
+    print(f"{len(names) - failures}/{len(names)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Shared result format for the suite (micro, load): latency summaries,
+run metadata and JSON output, so runs can be diffed with
+`python -m benchmarks.compare`.
+
+    {
+      "benchmark": "micro",
+      "started_at": "...",
+      "environment": {...},       # python, platform, CPUs, git commit, settings
+      "parameters": {...},        # CLI arguments and the dataset shape
+      "results": {"<case>": {"count": ..., "p50_ms": ..., ...}, ...}
+    }
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+
+# Settings that change what is being measured
+RELEVANT_SETTINGS = (
+    "DB_ASYNC",
+    "MEMORY_DEFAULT_SCORER",
+    "MEMORY_KEYWORD_ENGINE",
+    "MEMORY_RECENCY_HALF_LIFE_DAYS",
+    "MEMORY_CACHE_BACKEND",
+    "JSON_RESPONSE_BACKEND",
+    "RESPONSE_COMPRESSION",
+    "BODY_COMPRESSION",
+    "SEMANTIC_SEARCH_ENABLED",
+    "PASSWORD_HASH_WORKERS",
+)
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def summarize(latencies_ms: List[float], elapsed_s: Optional[float] = None) -> Dict:
+    """Latency distribution of one case; throughput when `elapsed_s` is given."""
+    if not latencies_ms:
+        return {"count": 0}
+
+    summary = {
+        "count": len(latencies_ms),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "min_ms": round(min(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+    if elapsed_s:
+        summary["per_second"] = round(len(latencies_ms) / elapsed_s, 2)
+
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> Dict:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "database": make_url(settings.DATABASE_URL).get_backend_name(),
+        "settings": {name: getattr(settings, name) for name in RELEVANT_SETTINGS},
+    }
+
+
+def write(path: Optional[str], benchmark: str, parameters: Dict, results: Dict) -> Dict:
+    """Build the result document and write it to `path` (if given)."""
+    document = {
+        "benchmark": benchmark,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": parameters,
+        "results": results,
+    }
+
+    if path:
+        with open(path, "w") as f:
+            json.dump(document, f, indent=2, default=str)
+            f.write("\n")
+
+    return document
+
+
+def print_table(results: Dict) -> None:
+    print(f"{'case':<44} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for name, summary in results.items():
+        if not summary.get("count"):
+            print(f"{name:<44} {0:>6}")
+            continue
+        print(
+            f"{name:<44} {summary['count']:>6} {summary['p50_ms']:>9.2f} "
+            f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} "
+            f"{summary.get('per_second', 0):>9.1f}"
+        )
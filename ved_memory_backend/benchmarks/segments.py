@@ -0,0 +1,217 @@
+"""
+How much a segmented, early-terminating keyword scan would read:
+each project's documents split into time segments (SPAN days back
+from the newest conversation), scanned newest first with per-segment
+max-score bounds (block-max, MaxScore style), stopping once no
+unread segment can beat the k-th best result.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.segments [--profile P] [--spans 7,30] [--limit K]
+                                  [--scorers legacy,bm25] [--output results.json]
+
+For every benchmark query and segment span it reports the share of
+segments and postings such a scan reads before the top k is settled.
+A segment's bound is the scorer evaluated at the segment's largest
+term frequency and shortest field length for each query term, plus
+the recency boost of its newest possible document. The pruned top k
+must equal the full ranking; the run exits with status 1 otherwise.
+Database handling is the same as benchmarks.micro.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "segments.db")
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.memory_engine import FIELD_WEIGHTS, Recency, get_scorer
+from app.services.memory_snapshot import get_snapshot_cache
+from app.services.search_index import tokenize
+from benchmarks import datagen, micro, results
+from benchmarks.query_plans import migrate
+
+
+def scan(snapshot, scorer, query_term_counts, limit: int, span_days: float):
+    """(segments read, segments, postings read, postings, pruned top k == full top k)"""
+    rows = np.flatnonzero(snapshot.alive)
+    newest = snapshot.created_at[rows].max()
+    recency = Recency(newest.item(), settings.MEMORY_RECENCY_HALF_LIFE_DAYS)
+
+    # Segment 0 holds the newest SPAN days, 1 the SPAN days before...
+    span = np.timedelta64(int(span_days * 86400 * 10**6), "us")
+    segment_of = ((newest - snapshot.created_at) // span).astype(np.int64)
+
+    keyword = np.zeros(snapshot.size)
+    postings = Counter()
+    bounds: Counter = Counter()
+
+    for field in FIELD_WEIGHTS:
+        lengths = snapshot.lengths[field]
+        for term, occurrences in query_term_counts.items():
+            term_rows, tf = snapshot.postings_for(field, term)
+            if not len(term_rows):
+                continue
+
+            keyword[term_rows] += scorer.score_postings(
+                field, term, occurrences, tf, lengths[term_rows]
+            )
+
+            segments = segment_of[term_rows]
+            present = np.unique(segments)
+            max_tf = np.zeros(segments.max() + 1, dtype=np.int64)
+            min_length = np.full(segments.max() + 1, np.iinfo(np.int64).max)
+            np.maximum.at(max_tf, segments, tf)
+            np.minimum.at(min_length, segments, lengths[term_rows])
+
+            bound = scorer.score_postings(
+                field, term, occurrences, max_tf[present], min_length[present]
+            )
+            for segment, value, count in zip(
+                present.tolist(), bound.tolist(), np.bincount(segments)[present].tolist()
+            ):
+                bounds[segment] += value
+                postings[segment] += count
+
+    if not postings:
+        return 0, 0, 0, 0, True
+
+    weight = scorer.recency_weight
+    matched = np.flatnonzero(keyword > 0)
+
+    key = {
+        row: (
+            round(keyword[row] + weight * recency.boost(snapshot.created_at_of(row)), 4),
+            snapshot.created_at[row],
+            -snapshot.conversation_ids[row],
+        )
+        for row in matched.tolist()
+    }
+    full = sorted(key, key=key.get, reverse=True)[:limit]
+
+    order = sorted(postings)   # newest first
+    # Best score any document in segment s or older could reach
+    reach = [
+        bounds[s] + weight * recency.boost(newest.item() - timedelta(days=span_days * s))
+        for s in order
+    ]
+    for i in range(len(reach) - 2, -1, -1):
+        reach[i] = max(reach[i], reach[i + 1])
+
+    by_segment = {}
+    for row in key:
+        by_segment.setdefault(int(segment_of[row]), []).append(row)
+
+    seen, read = [], 0
+    for i, segment in enumerate(order):
+        if len(seen) >= limit:
+            kth = sorted((key[row][0] for row in seen), reverse=True)[limit - 1]
+            if reach[i] < kth:
+                break
+        read += 1
+        seen.extend(by_segment.get(segment, []))
+
+    pruned = sorted(seen, key=key.get, reverse=True)[:limit]
+
+    return (
+        read,
+        len(order),
+        sum(postings[s] for s in order[:read]),
+        sum(postings.values()),
+        pruned == full,
+    )
+
+
+def run(dataset: datagen.Dataset, scorers, spans, limit: int):
+    lookup = micro.lookups(dataset)
+    queries = sum(len(user.projects) for user in dataset.users) * micro.QUERIES_PER_TOPIC
+    out, mismatches = {}, 0
+
+    for name in scorers:
+        scorer = get_scorer(name)
+        totals = {span: Counter() for span in spans}
+
+        for i in range(queries):
+            _user_id, project_id, query = lookup(i)
+            counts = Counter(scorer.query_terms(tokenize(query)))
+
+            with SessionLocal() as db:
+                snapshot = get_snapshot_cache().get(db, project_id)
+                scorer.prepare(db, project_id, list(counts))
+
+            for span in spans:
+                read, segments, postings_read, postings, same = scan(
+                    snapshot, scorer, counts, limit, span
+                )
+                totals[span].update(
+                    queries=1,
+                    segments_read=read,
+                    segments=segments,
+                    postings_read=postings_read,
+                    postings=postings,
+                    early_stops=int(read < segments),
+                )
+                if not same:
+                    mismatches += 1
+                    print(f"MISMATCH [{name}, {span}d] {lookup(i)}")
+
+        for span, total in totals.items():
+            out[f"{name},{span:g}d"] = dict(total)
+
+    return out, mismatches
+
+
+def print_table(out) -> None:
+    print(f"{'case':<16} {'queries':>8} {'segments read':>16} {'postings read':>16} {'early stops':>12}")
+    for name, total in out.items():
+        segments = total.get("segments") or 1
+        postings = total.get("postings") or 1
+        print(
+            f"{name:<16} {total.get('queries', 0):>8} "
+            f"{total.get('segments_read', 0) / segments:>16.1%} "
+            f"{total.get('postings_read', 0) / postings:>16.1%} "
+            f"{total.get('early_stops', 0):>12}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(datagen.PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spans", default="7,30", help="comma separated segment spans, in days")
+    parser.add_argument("--limit", type=int, default=settings.MEMORY_CONTEXT_LIMIT)
+    parser.add_argument("--scorers", default="legacy,bm25", help="comma separated: legacy, bm25")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    migrate(engine, "head")
+    dataset = datagen.ensure(engine, args.profile, args.seed)
+    engine.dispose()
+
+    print(dataset.describe())
+    out, mismatches = run(
+        dataset,
+        args.scorers.split(","),
+        [float(span) for span in args.spans.split(",")],
+        args.limit,
+    )
+    print_table(out)
+    print(f"half-life {settings.MEMORY_RECENCY_HALF_LIFE_DAYS:g} days, {mismatches} mismatch(es)")
+
+    results.write(args.output, "segments", {**vars(args), "dataset": dataset.describe()}, out)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
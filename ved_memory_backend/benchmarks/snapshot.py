@@ -0,0 +1,165 @@
+"""
+Snapshot engine (MEMORY_KEYWORD_ENGINE=snapshot) check and timings:
+every benchmark query must rank the same with both engines; then cold
+snapshot builds, refreshes after a re-indexed conversation, and
+get_memory_context latency per engine and scorer.
+
+Usage (from ved_memory_backend/):
+    python -m benchmarks.snapshot [--profile P] [--repeat N] [--scorers legacy,bm25]
+                                  [--output results.json]
+
+Exits with status 1 when the engines disagree. Database handling is
+the same as benchmarks.micro; the refresh case re-indexes existing
+summaries unchanged, so the data stays as seeded.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "snapshot.db")
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.conversation import Conversation
+from app.services.memory_snapshot import get_snapshot_cache, reset_snapshot_cache
+from app.services.revisions import touch_projects
+from app.services.search_index import index_summary
+from benchmarks import datagen, micro, results
+from benchmarks.query_plans import migrate
+
+
+ENGINES = ("index", "snapshot")
+
+
+def ranking(lookup, scorer: str, engine: str, i: int):
+    settings.MEMORY_KEYWORD_ENGINE = engine
+    context = micro.memory_case(lookup, scorer)(i)
+    return context["total_scanned"], [
+        (block["conversation_id"], block["score"]) for block in context["context_blocks"]
+    ]
+
+
+def check_parity(dataset: datagen.Dataset, scorers) -> int:
+    """Number of queries the two engines rank differently."""
+    lookup = micro.lookups(dataset)
+    queries = sum(len(user.projects) for user in dataset.users) * micro.QUERIES_PER_TOPIC
+    mismatches = 0
+
+    for scorer in scorers:
+        for i in range(queries):
+            expected = ranking(lookup, scorer, "index", i)
+            actual = ranking(lookup, scorer, "snapshot", i)
+            if expected != actual:
+                mismatches += 1
+                print(f"MISMATCH [{scorer}] {lookup(i)}\n  index:    {expected}\n  snapshot: {actual}")
+
+    print(f"parity: {queries * len(scorers)} queries, {mismatches} mismatch(es)")
+    return mismatches
+
+
+def project_ids(dataset: datagen.Dataset):
+    return [project.id for user in dataset.users for project in user.projects]
+
+
+def build_case(dataset: datagen.Dataset):
+    latencies = []
+    started = time.perf_counter()
+
+    for project_id in project_ids(dataset):
+        reset_snapshot_cache()
+        with SessionLocal() as db:
+            t0 = time.perf_counter()
+            get_snapshot_cache().get(db, project_id)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    return results.summarize(latencies, time.perf_counter() - started)
+
+
+def refresh_case(dataset: datagen.Dataset, repeat: int):
+    """Re-index one summary (same content), then bring the snapshot up to date."""
+    ids = project_ids(dataset)
+    latencies = []
+    started = time.perf_counter()
+
+    for i in range(repeat):
+        project_id = ids[i % len(ids)]
+
+        with SessionLocal() as db:
+            conversation = (
+                db.query(Conversation)
+                .filter(Conversation.project_id == project_id, Conversation.summary != None)  # noqa: E711
+                .order_by(Conversation.id)
+                .offset(i // len(ids))
+                .first()
+            )
+            if conversation is None:
+                continue
+            index_summary(db, conversation, conversation.summary.content)
+            touch_projects(db, [project_id])
+            db.commit()
+
+        with SessionLocal() as db:
+            t0 = time.perf_counter()
+            get_snapshot_cache().get(db, project_id)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    return results.summarize(latencies, time.perf_counter() - started)
+
+
+def run(dataset: datagen.Dataset, repeat: int, scorers) -> dict:
+    lookup = micro.lookups(dataset)
+    out = {"snapshot.build": build_case(dataset)}
+
+    # Warm every project, then measure refreshes against warm snapshots
+    for project_id in project_ids(dataset):
+        with SessionLocal() as db:
+            get_snapshot_cache().get(db, project_id)
+    out["snapshot.refresh"] = refresh_case(dataset, repeat)
+
+    for scorer in scorers:
+        for engine in ENGINES:
+            settings.MEMORY_KEYWORD_ENGINE = engine
+            out[f"memory_context[{scorer},{engine}]"] = micro.measure(
+                micro.memory_case(lookup, scorer), repeat
+            )
+
+    out["snapshot.cache"] = {"count": 0, **get_snapshot_cache().stats()}
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(datagen.PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--scorers", default="legacy,bm25", help="comma separated: legacy, bm25")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    migrate(engine, "head")
+    dataset = datagen.ensure(engine, args.profile, args.seed)
+    engine.dispose()
+
+    print(dataset.describe())
+    scorers = args.scorers.split(",")
+    mismatches = check_parity(dataset, scorers)
+
+    out = run(dataset, args.repeat, scorers)
+    results.print_table(out)
+    print("snapshot cache:", get_snapshot_cache().stats())
+
+    results.write(args.output, "snapshot", {**vars(args), "dataset": dataset.describe()}, out)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
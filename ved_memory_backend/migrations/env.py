@@ -0,0 +1,64 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.fulltext import is_fulltext_object
+
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # Full-text objects (migration 0010) live outside the ORM metadata
+    return not (reflected and compare_to is None and is_fulltext_object(name, type_))
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_with_connection(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite can only ALTER through table copies
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Programmatic callers (benchmarks) may hand over their own connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_with_connection(connection)
+        return
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,139 @@
+"""Initial schema
+
+Baseline for databases created before migrations existed: every table
+is created only if it is missing, so `alembic upgrade head` is safe on
+both empty and existing databases.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns, indexes=()):
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(name):
+        return
+
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("resume_mode", sa.String(), nullable=True),
+        indexes=[
+            ("ix_users_id", ["id"], False),
+            ("ix_users_email", ["email"], True),
+        ],
+    )
+
+    _create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        indexes=[("ix_projects_id", ["id"], False)],
+    )
+
+    _create_table(
+        "conversations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("raw_content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        indexes=[("ix_conversations_id", ["id"], False)],
+    )
+
+    _create_table(
+        "summaries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_summaries_id", ["id"], False)],
+    )
+
+    _create_table(
+        "conversation_passages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id"), nullable=False),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(16), nullable=True),
+        sa.Column("start_offset", sa.Integer(), nullable=False),
+        sa.Column("end_offset", sa.Integer(), nullable=False),
+        indexes=[
+            ("ix_conversation_passages_conversation_id", ["conversation_id"], False),
+        ],
+    )
+
+    _create_table(
+        "search_documents",
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id"), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("raw_length", sa.Integer(), nullable=False),
+        sa.Column("summary_length", sa.Integer(), nullable=False),
+        indexes=[("ix_search_documents_project_id", ["project_id"], False)],
+    )
+
+    _create_table(
+        "search_postings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("term", sa.String(64), nullable=False),
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id"), nullable=False),
+        sa.Column("field", sa.String(16), nullable=False),
+        sa.Column("tf", sa.Integer(), nullable=False),
+        indexes=[
+            ("ix_search_postings_project_term", ["project_id", "term"], False),
+            ("ix_search_postings_conversation_id", ["conversation_id"], False),
+        ],
+    )
+
+    _create_table(
+        "search_term_stats",
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), primary_key=True),
+        sa.Column("field", sa.String(16), primary_key=True),
+        sa.Column("term", sa.String(64), primary_key=True),
+        sa.Column("df", sa.Integer(), nullable=False),
+    )
+
+    _create_table(
+        "search_corpus_stats",
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), primary_key=True),
+        sa.Column("field", sa.String(16), primary_key=True),
+        sa.Column("doc_count", sa.Integer(), nullable=False),
+        sa.Column("total_length", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        "search_corpus_stats",
+        "search_term_stats",
+        "search_postings",
+        "search_documents",
+        "conversation_passages",
+        "summaries",
+        "conversations",
+        "projects",
+        "users",
+    ):
+        op.drop_table(name)
@@ -0,0 +1,65 @@
+"""Composite indexes for the hot query shapes
+
+- conversations (user_id, project_id, created_at): memory context and
+  project listing, filtered by user + project, newest first
+- conversations (user_id, created_at): resume and unfiltered listing
+- summaries (conversation_id) UNIQUE: one summary per conversation,
+  looked up on every resume / summary call
+
+Duplicate summaries (possible before the unique index) are collapsed
+to the most recently updated row first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+DEDUPLICATE_SUMMARIES = """
+DELETE FROM summaries
+WHERE id NOT IN (
+    SELECT id FROM (
+        SELECT id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY conversation_id
+                   ORDER BY updated_at DESC, id DESC
+               ) AS rank
+        FROM summaries
+    ) ranked
+    WHERE rank = 1
+)
+"""
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_conversations_user_project_created",
+        "conversations",
+        ["user_id", "project_id", "created_at"],
+    )
+    op.create_index(
+        "ix_conversations_user_created",
+        "conversations",
+        ["user_id", "created_at"],
+    )
+
+    op.execute(DEDUPLICATE_SUMMARIES)
+    op.create_index(
+        "ux_summaries_conversation_id",
+        "summaries",
+        ["conversation_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_summaries_conversation_id", table_name="summaries")
+    op.drop_index("ix_conversations_user_created", table_name="conversations")
+    op.drop_index("ix_conversations_user_project_created", table_name="conversations")
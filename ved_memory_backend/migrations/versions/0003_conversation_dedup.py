@@ -0,0 +1,95 @@
+"""Conversation keys and content hashes for ingest dedup
+
+Adds conversation_key, content_hash and head_hash to conversations,
+backfills the hashes for existing rows, and indexes all three per
+(user_id, project_id). Existing duplicates are left in place.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.ingest import content_hash, head_hash
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_BATCH = 500
+
+conversations = sa.table(
+    "conversations",
+    sa.column("id", sa.Integer),
+    sa.column("raw_content", sa.Text),
+    sa.column("content_hash", sa.String),
+    sa.column("head_hash", sa.String),
+)
+
+
+def _backfill_hashes() -> None:
+    bind = op.get_bind()
+    last_id = 0
+
+    while True:
+        rows = bind.execute(
+            sa.select(conversations.c.id, conversations.c.raw_content)
+            .where(conversations.c.id > last_id)
+            .order_by(conversations.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return
+
+        for row in rows:
+            bind.execute(
+                conversations.update()
+                .where(conversations.c.id == row.id)
+                .values(
+                    content_hash=content_hash(row.raw_content),
+                    head_hash=head_hash(row.raw_content),
+                )
+            )
+
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column("conversations", sa.Column("conversation_key", sa.String(255), nullable=True))
+    op.add_column("conversations", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.add_column("conversations", sa.Column("head_hash", sa.String(64), nullable=True))
+
+    if not op.get_context().as_sql:
+        _backfill_hashes()
+
+    op.create_index(
+        "ux_conversations_user_project_key",
+        "conversations",
+        ["user_id", "project_id", "conversation_key"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_conversations_user_project_content_hash",
+        "conversations",
+        ["user_id", "project_id", "content_hash"],
+    )
+    op.create_index(
+        "ix_conversations_user_project_head_hash",
+        "conversations",
+        ["user_id", "project_id", "head_hash"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_conversations_user_project_head_hash", table_name="conversations")
+    op.drop_index("ix_conversations_user_project_content_hash", table_name="conversations")
+    op.drop_index("ux_conversations_user_project_key", table_name="conversations")
+
+    with op.batch_alter_table("conversations") as batch:
+        batch.drop_column("head_hash")
+        batch.drop_column("conversation_key")
+        batch.drop_column("content_hash")
@@ -0,0 +1,32 @@
+"""Compressed body columns
+
+Adds conversations.raw_content_packed and summaries.content_packed.
+Rows stay plain until written with BODY_COMPRESSION enabled or
+repacked by `python -m app.manage compress`.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("conversations", sa.Column("raw_content_packed", sa.LargeBinary(), nullable=True))
+    op.add_column("summaries", sa.Column("content_packed", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    # Run `python -m app.manage compress` with BODY_COMPRESSION=none first
+    with op.batch_alter_table("summaries") as batch:
+        batch.drop_column("content_packed")
+
+    with op.batch_alter_table("conversations") as batch:
+        batch.drop_column("raw_content_packed")
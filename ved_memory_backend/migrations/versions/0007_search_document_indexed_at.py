@@ -0,0 +1,30 @@
+"""Search document change marker
+
+Adds search_documents.indexed_at, set every time a conversation's raw
+or summary postings are rewritten. In-memory project snapshots compare
+it to find the documents that changed since they were built.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "search_documents",
+        sa.Column("indexed_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("search_documents") as batch:
+        batch.drop_column("indexed_at")
@@ -0,0 +1,24 @@
+"""Finished job retention
+
+Adds jobs (status, finished_at), used by the periodic purge of
+succeeded / failed jobs older than JOBS_RETENTION_DAYS.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_jobs_status_finished_at", "jobs", ["status", "finished_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_status_finished_at", table_name="jobs")
@@ -0,0 +1,33 @@
+"""Server-side refresh tokens
+
+Refresh tokens carry a `jti` that must have a row here to be accepted,
+so they can be rotated and revoked. Tokens issued before this revision
+have no row: their users log in again.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("jti", sa.String(32), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("refresh_tokens")
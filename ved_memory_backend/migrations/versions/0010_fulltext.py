@@ -0,0 +1,30 @@
+"""Full-text search objects
+
+Dialect-specific (see app.db.fulltext): generated tsvector columns with
+GIN indexes on PostgreSQL, FTS5 tables and sync triggers on SQLite.
+Other dialects get nothing and the fulltext scorer falls back to bm25.
+
+On SQLite, a later batch migration that recreates conversations or
+summaries drops their triggers; run install_fulltext again after it.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+from app.db.fulltext import install_fulltext, uninstall_fulltext
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    install_fulltext(op.get_bind())
+
+
+def downgrade() -> None:
+    uninstall_fulltext(op.get_bind())
@@ -0,0 +1,45 @@
+"""conversations.created_at NOT NULL
+
+The listing's keyset cursor and the search index both need a
+created_at on every conversation. Rows without one (possible since
+0001) get the epoch, so they sort as the oldest.
+
+On SQLite the column change copies the table, which drops the
+full-text triggers of migration 0010; they are installed again.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.fulltext import install_fulltext
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+UNKNOWN_CREATED_AT = "1970-01-01 00:00:00"
+
+
+def _set_nullable(nullable: bool) -> None:
+    with op.batch_alter_table("conversations") as batch:
+        batch.alter_column("created_at", existing_type=sa.DateTime(), nullable=nullable)
+
+    if op.get_bind().dialect.name == "sqlite":
+        install_fulltext(op.get_bind())
+
+
+def upgrade() -> None:
+    op.execute(
+        sa.text("UPDATE conversations SET created_at = :unknown WHERE created_at IS NULL")
+        .bindparams(unknown=UNKNOWN_CREATED_AT)
+    )
+    _set_nullable(False)
+
+
+def downgrade() -> None:
+    _set_nullable(True)
@@ -13,15 +13,70 @@ function setToken(token) {
     localStorage.setItem("token", token);
 }
 
+function setRefreshToken(token) {
+    if (token) {
+        localStorage.setItem("refresh_token", token);
+    }
+}
+
 function clearToken() {
     localStorage.removeItem("token");
+    localStorage.removeItem("refresh_token");
+    responseCache.clear();
+}
+
+// Exchange the refresh token for a new access token (no password prompt)
+async function refreshToken() {
+    const refresh = localStorage.getItem("refresh_token");
+
+    if (!refresh) {
+        return false;
+    }
+
+    const response = await fetch(`${BASE_URL}/auth/refresh`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ refresh_token: refresh })
+    });
+
+    if (!response.ok) {
+        return false;
+    }
+
+    const data = await response.json();
+    setToken(data.access_token);
+    setRefreshToken(data.refresh_token);
+    return true;
+}
+
+// Revoke the refresh token server-side (best effort: logging out
+// locally must still work when the server is unreachable)
+async function revokeRefreshToken() {
+    const refresh = localStorage.getItem("refresh_token");
+
+    if (!refresh) {
+        return;
+    }
+
+    try {
+        await fetch(`${BASE_URL}/auth/logout`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ refresh_token: refresh })
+        });
+    } catch (error) {
+        console.warn("Could not revoke refresh token:", error);
+    }
 }
 
 /* =============================
    FETCH WITH AUTH
 ============================= */
 
-async function fetchWithAuth(url, method = "GET", body = null) {
+// Responses with an ETag, reused when the server answers 304
+const responseCache = new Map();
+
+async function fetchWithAuth(url, method = "GET", body = null, retried = false) {
     const token = getToken();
 
     const options = {
@@ -36,9 +91,24 @@ async function fetchWithAuth(url, method = "GET", body = null) {
         options.body = JSON.stringify(body);
     }
 
+    const cacheKey = `${method} ${url} ${options.body || ""}`;
+    const cached = responseCache.get(cacheKey);
+
+    if (cached) {
+        options.headers["If-None-Match"] = cached.etag;
+    }
+
     const response = await fetch(url, options);
 
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+
     if (response.status === 401) {
+        if (!retried && await refreshToken()) {
+            return fetchWithAuth(url, method, body, true);
+        }
+
         clearToken();
         window.location.href = "index.html";
         return;
@@ -50,7 +120,14 @@ async function fetchWithAuth(url, method = "GET", body = null) {
         throw new Error(errorText);
     }
 
-    return response.json();
+    const data = await response.json();
+    const etag = response.headers.get("ETag");
+
+    if (etag) {
+        responseCache.set(cacheKey, { etag, data });
+    }
+
+    return data;
 }
 
 /* =============================
@@ -83,6 +160,7 @@ async function handleLogin(event) {
 
         const data = await response.json();
         setToken(data.access_token);
+        setRefreshToken(data.refresh_token);
 
         window.location.href = "dashboard.html";
 
@@ -103,12 +181,14 @@ function initDashboard() {
 
     loadProjects();
 
-    document.getElementById("logoutBtn").onclick = () => {
+    document.getElementById("logoutBtn").onclick = async () => {
+        await revokeRefreshToken();
         clearToken();
         window.location.href = "index.html";
     };
 
     document.getElementById("testMemoryBtn").onclick = testMemory;
+    document.getElementById("searchAllBtn").onclick = searchAllProjects;
 }
 
 /* =============================
@@ -138,26 +218,44 @@ async function loadProjects() {
    LOAD CONVERSATIONS
 ============================= */
 
-async function loadConversations(projectId) {
-    const conversations = await fetchWithAuth(
-        `${BASE_URL}/conversations?project_id=${projectId}`
-    );
+async function loadConversations(projectId, cursor = null) {
+    let url = `${BASE_URL}/conversations?project_id=${projectId}`;
+    if (cursor) {
+        url += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+
+    const page = await fetchWithAuth(url);
 
     const list = document.getElementById("conversationList");
-    list.innerHTML = "";
+    if (!cursor) {
+        list.innerHTML = "";
+    }
 
-    conversations.forEach(conv => {
+    page.items.forEach(conv => {
         const div = document.createElement("div");
         div.className = "conversation-item";
         div.innerText = `#${conv.id} - ${conv.created_at}`;
 
-        div.onclick = () => {
+        div.onclick = async () => {
+            const detail = await fetchWithAuth(
+                `${BASE_URL}/conversations/${conv.id}`
+            );
             document.getElementById("conversationDetail").innerText =
-                conv.raw_content;
+                detail.raw_content;
         };
 
         list.appendChild(div);
     });
+
+    if (page.next_cursor) {
+        const more = document.createElement("button");
+        more.innerText = "Load more";
+        more.onclick = () => {
+            more.remove();
+            loadConversations(projectId, page.next_cursor);
+        };
+        list.appendChild(more);
+    }
 }
 
 /* =============================
@@ -186,13 +284,47 @@ async function testMemory() {
     );
 
     const container = document.getElementById("memoryResult");
-    container.innerHTML = `<p>Total Scanned: ${result.total_scanned}</p>`;
+    container.innerHTML = "";
+    renderMemoryResult(container, result);
+}
+
+// One batch request instead of a /memory/context call per project
+async function searchAllProjects() {
+    const query = document.getElementById("memoryQuery").value.trim();
+    if (!query) {
+        alert("Enter query");
+        return;
+    }
+
+    const batch = await fetchWithAuth(
+        `${BASE_URL}/memory/context/batch`,
+        "POST",
+        {
+            lookups: [{ project_id: "*", query }]
+        }
+    );
+
+    const container = document.getElementById("memoryResult");
+    container.innerHTML = "";
+
+    batch.results.forEach(result => {
+        container.innerHTML += `<h3>Project ${result.project_id}</h3>`;
+        renderMemoryResult(container, result);
+    });
+}
+
+function renderMemoryResult(container, result) {
+    container.innerHTML += `<p>Total Scanned: ${result.total_scanned}</p>`;
 
     result.context_blocks.forEach(block => {
+        const passages = block.passages
+            .map(p => `<pre>${p.text}</pre>`)
+            .join("");
+
         container.innerHTML += `
             <div>
                 <strong>Score:</strong> ${block.score}<br>
-                <pre>${block.raw_content.slice(0, 400)}</pre>
+                ${passages}
             </div>
         `;
     });
@@ -7,7 +7,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     if (request.type === "EXTRACT_CONVERSATION") {
       try {
         const conversation = extractConversation();
-        sendResponse({ text: conversation });
+        sendResponse({ text: conversation, conversationKey: getConversationKey() });
       } catch (error) {
         console.error("Extract conversation error:", error);
         sendResponse({ text: "", error: error.message });
@@ -15,6 +15,12 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     }
   });
   
+  // Chat id from the URL (/c/<id>), so repeated saves update one conversation
+  function getConversationKey() {
+    const match = window.location.pathname.match(/\/c\/([\w-]+)/);
+    return match ? match[1] : null;
+  }
+  
   function extractConversation() {
     const messages = [];
     
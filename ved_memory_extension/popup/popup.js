@@ -34,7 +34,47 @@ function hideStatus() {
   statusDiv.textContent = "";
 }
 
-async function apiCall(url, method = "GET", body = null, token = null) {
+/* GET responses with an ETag, revalidated with If-None-Match */
+
+async function getCachedResponse(url) {
+  const { http_cache: cache = {} } = await chrome.storage.local.get("http_cache");
+  return cache[url] || null;
+}
+
+async function setCachedResponse(url, etag, data) {
+  const { http_cache: cache = {} } = await chrome.storage.local.get("http_cache");
+  cache[url] = { etag, data };
+  await chrome.storage.local.set({ http_cache: cache });
+}
+
+// Exchange the stored refresh token for a new access token; null if it
+// is missing or rejected
+async function refreshAccessToken() {
+  const { refresh_token: refreshToken } = await chrome.storage.local.get("refresh_token");
+  if (!refreshToken) {
+    return null;
+  }
+
+  const response = await fetch(`${BASE_URL}/auth/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken })
+  });
+
+  if (!response.ok) {
+    await chrome.storage.local.remove("refresh_token");
+    return null;
+  }
+
+  const data = await response.json();
+  await chrome.storage.local.set({
+    access_token: data.access_token,
+    refresh_token: data.refresh_token
+  });
+  return data.access_token;
+}
+
+async function apiCall(url, method = "GET", body = null, token = null, retried = false) {
   try {
     if (!url) {
       throw new Error("URL is required");
@@ -56,6 +96,11 @@ async function apiCall(url, method = "GET", body = null, token = null) {
     if (body) {
       options.body = JSON.stringify(body);
     }
+
+    const cached = method === "GET" ? await getCachedResponse(url) : null;
+    if (cached) {
+      headers["If-None-Match"] = cached.etag;
+    }
     
     console.log("Calling:", url);
     console.log("Method:", method);
@@ -63,10 +108,23 @@ async function apiCall(url, method = "GET", body = null, token = null) {
     if (body) console.log("Payload:", JSON.stringify(body));
     
     const response = await fetch(url, options);
+
+    if (response.status === 304 && cached) {
+      console.log("Not modified, using cached response");
+      return cached.data;
+    }
     
     if (!response.ok) {
       let errorMessage = `HTTP ${response.status}`;
       
+      if (response.status === 401 && token && !retried) {
+        const newToken = await refreshAccessToken();
+        if (newToken) {
+          console.log("Access token refreshed, retrying");
+          return apiCall(url, method, body, newToken, true);
+        }
+      }
+
       if (response.status === 401) {
         await chrome.storage.local.remove("access_token");
         console.log("Token cleared due to 401");
@@ -87,10 +145,18 @@ async function apiCall(url, method = "GET", body = null, token = null) {
       }
       
       console.error("API error response:", errorMessage);
-      throw new Error(errorMessage);
+      const apiError = new Error(errorMessage);
+      apiError.status = response.status;
+      throw apiError;
     }
     
     const data = await response.json();
+
+    const etag = response.headers.get("ETag");
+    if (method === "GET" && etag) {
+      await setCachedResponse(url, etag, data);
+    }
+
     return data;
   } catch (error) {
     console.error("API call failed:", error.message);
@@ -98,6 +164,88 @@ async function apiCall(url, method = "GET", body = null, token = null) {
   }
 }
 
+/* Delta saves: remember what the server has for each chat */
+
+async function sha256Hex(text) {
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest))
+    .map(b => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+async function getSavedChat(chatKey) {
+  const storage = await chrome.storage.local.get("saved_chats");
+  return (storage.saved_chats || {})[chatKey] || null;
+}
+
+async function setSavedChat(chatKey, result) {
+  const storage = await chrome.storage.local.get("saved_chats");
+  const savedChats = storage.saved_chats || {};
+  savedChats[chatKey] = {
+    id: result.id,
+    content_hash: result.content_hash,
+    content_length: result.content_length
+  };
+  await chrome.storage.local.set({ saved_chats: savedChats });
+}
+
+// Append only the new messages when the saved text is still a prefix;
+// otherwise (first save, edited chat, stale state) send everything.
+async function saveConversation(projectId, text, conversationKey, token) {
+  const chatKey = conversationKey ? `${projectId}:${conversationKey}` : null;
+  const saved = chatKey ? await getSavedChat(chatKey) : null;
+
+  // content_length counts code points (Python len), not UTF-16 units:
+  // compare and slice by code point so emoji etc. do not shift the split
+  const codePoints = Array.from(text);
+
+  if (saved && codePoints.length >= saved.content_length) {
+    const prefix = codePoints.slice(0, saved.content_length).join("");
+    const prefixHash = await sha256Hex(prefix);
+
+    if (prefixHash === saved.content_hash) {
+      if (codePoints.length === saved.content_length) {
+        return { status: "duplicate" };
+      }
+
+      try {
+        const result = await apiCall(
+          `${BASE_URL}/conversations/${saved.id}/append`,
+          "POST",
+          {
+            base_hash: saved.content_hash,
+            content: codePoints.slice(saved.content_length).join("")
+          },
+          token
+        );
+        await setSavedChat(chatKey, result);
+        return result;
+      } catch (error) {
+        if (error.status !== 409 && error.status !== 404) {
+          throw error;
+        }
+        console.warn("Append rejected, sending full conversation");
+      }
+    }
+  }
+
+  const result = await apiCall(
+    `${BASE_URL}/conversations/save`,
+    "POST",
+    {
+      project_id: parseInt(projectId, 10),
+      raw_content: text,
+      conversation_key: conversationKey
+    },
+    token
+  );
+
+  if (chatKey) {
+    await setSavedChat(chatKey, result);
+  }
+  return result;
+}
+
 async function loadProjects(token) {
   if (!token) {
     console.error("No token provided to loadProjects");
@@ -232,7 +380,10 @@ if (loginBtn) {
         throw new Error("No access token in response");
       }
       
-      await chrome.storage.local.set({ access_token: data.access_token });
+      await chrome.storage.local.set({
+        access_token: data.access_token,
+        refresh_token: data.refresh_token
+      });
       
       emailInput.value = "";
       passwordInput.value = "";
@@ -285,6 +436,7 @@ if (saveBtn) {
       }
       
       let conversationText;
+      let conversationKey = null;
       try {
         const response = await chrome.tabs.sendMessage(tabId, {
           type: "EXTRACT_CONVERSATION"
@@ -295,6 +447,7 @@ if (saveBtn) {
         }
         
         conversationText = response.text;
+        conversationKey = response.conversationKey || null;
       } catch (messageError) {
         console.error("Message error:", messageError.message);
         showStatus("Could not extract conversation. Make sure you're on ChatGPT", "error");
@@ -318,19 +471,17 @@ if (saveBtn) {
         return;
       }
       
-      const url = `${BASE_URL}/conversations/save`;
-      const body = {
-        project_id: parseInt(projectId, 10),
-        raw_content: trimmedText
-      };
-      
-      const result = await apiCall(url, "POST", body, token);
+      const result = await saveConversation(projectId, trimmedText, conversationKey, token);
       
       if (!result) {
         throw new Error("Empty response from save endpoint");
       }
       
-      showStatus("Conversation saved successfully", "success");
+      if (result.status === "duplicate") {
+        showStatus("Conversation already saved", "success");
+      } else {
+        showStatus("Conversation saved successfully", "success");
+      }
     } catch (error) {
       console.error("Save error:", error);
       showStatus("Error saving: " + error.message, "error");
@@ -341,7 +492,22 @@ if (saveBtn) {
 if (logoutBtn) {
   logoutBtn.addEventListener("click", async () => {
     try {
-      await chrome.storage.local.remove("access_token");
+      // Revoke the refresh token server-side; logging out locally must
+      // still work when the server is unreachable
+      const { refresh_token: refreshToken } = await chrome.storage.local.get("refresh_token");
+      if (refreshToken) {
+        try {
+          await fetch(`${BASE_URL}/auth/logout`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ refresh_token: refreshToken })
+          });
+        } catch (error) {
+          console.warn("Could not revoke refresh token:", error);
+        }
+      }
+
+      await chrome.storage.local.remove(["access_token", "refresh_token", "saved_chats", "http_cache"]);
       
       if (loginSection) {
         loginSection.style.display = "block";